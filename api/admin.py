@@ -1,3 +1,177 @@
-from django.contrib import admin
+from django.contrib                 import admin, messages
+from django.contrib.auth.admin      import UserAdmin
+from django.contrib.auth.models     import User
+from django.contrib.sessions.models import Session
+from django.http                    import HttpResponseRedirect, JsonResponse
+from django.shortcuts               import render
+from django.utils                   import timezone
+from .audit_pipeline                import audit
+from .backchannel_logout            import get_backchannel_logout_notifier
+from .bulk_revoker                  import BulkRevoker
+from .database_router               import get_database_metrics
+from .memory_diagnostics            import GROUP_BY, get_memory_diagnostics
+from .models                        import Consent
+from .tenant_registry               import service_apis
 
-# Register your models here.
+
+# The User admin with an action to revoke the tokens of selected users, e.g.
+# when their accounts are compromised. Large numbers of tokens are better
+# revoked by 'python manage.py revoke_tokens', which can be resumed.
+# Another action logs the users out of all their sessions, and the client
+# applications are told by back-channel logout (see backchannel_logout.py).
+# Users are shared by all tenants (see tenant_registry.py), so both actions
+# act on the default service and on every tenant.
+class TokenRevokingUserAdmin(UserAdmin):
+    actions = ['revoke_tokens', 'log_out']
+
+
+    @admin.action(description='Revoke all tokens of selected users')
+    def revoke_tokens(self, request, queryset):
+        revoked = failed = 0
+
+        for tenant, api in service_apis():
+            revoker = BulkRevoker(api)
+
+            for user in queryset:
+                try:
+                    stats = revoker.revoke(subject=str(user.pk))
+                except Exception:
+                    failed += 1
+                    continue
+
+                revoked += stats['revoked']
+                failed  += stats['failed']
+
+                audit('bulk_revocation', request, 'failure' if stats['failed'] else 'success',
+                    subject=str(user.pk), tenant=tenant, revoked=stats['revoked'], failed=stats['failed'])
+
+        if failed:
+            self.message_user(request,
+                '{} tokens revoked. {} revocations failed.'.format(revoked, failed), messages.WARNING)
+        else:
+            self.message_user(request, '{} tokens revoked.'.format(revoked), messages.SUCCESS)
+
+
+    @admin.action(description='Log selected users out everywhere')
+    def log_out(self, request, queryset):
+        subjects = { str(pk) for pk in queryset.values_list('pk', flat=True) }
+
+        # Sessions are not indexed by user.
+        ended = [ session.pk for session in Session.objects.filter(expire_date__gt=timezone.now())
+                  if session.get_decoded().get('_auth_user_id') in subjects ]
+        Session.objects.filter(pk__in=ended).delete()
+
+        for subject in subjects:
+            audit('logout', request, 'success', user=subject, forced=True)
+
+        notifier = get_backchannel_logout_notifier()
+
+        if notifier is not None:
+            for _, api in service_apis():
+                for subject in subjects:
+                    notifier.notify(subject, api)
+
+        self.message_user(request, '{} sessions ended.'.format(len(ended)), messages.SUCCESS)
+
+
+admin.site.unregister(User)
+admin.site.register(User, TokenRevokingUserAdmin)
+
+
+# Remembered consents (see consent_store.py). A revoked consent is kept for
+# the record, and the user sees the authorization page again.
+@admin.register(Consent)
+class ConsentAdmin(admin.ModelAdmin):
+    list_display    = ('user', 'client_id', 'scopes', 'granted_at', 'expires_at', 'revoked_at')
+    list_filter     = ('client_id', 'revoked_at')
+    search_fields   = ('user__username', 'client_id')
+    readonly_fields = ('scope_hash',)
+    actions         = ['revoke_consents']
+
+
+    @admin.action(description='Revoke selected consents')
+    def revoke_consents(self, request, queryset):
+        revoked = queryset.filter(revoked_at__isnull=True).update(revoked_at=timezone.now())
+
+        audit('consent_revocation', request, 'success', revoked=revoked)
+
+        self.message_user(request, '{} consents revoked.'.format(revoked), messages.SUCCESS)
+
+
+# The page of memory diagnostics (see memory_diagnostics.py), available to
+# staff users at /admin/memory/ when MEMORY_DIAGNOSTICS_ENABLED is True.
+#
+#   POST action=start&frames=N, action=stop, action=snapshot&name=NAME or
+#   action=reset changes the state. GET shows the state, the allocations of
+#   views, the top allocations of a snapshot (top=NAME), the difference
+#   between two snapshots (first=NAME&second=NAME) and the live objects by
+#   type (objects=1). 'group' is 'filename', 'lineno' (default) or
+#   'traceback'. 'format=json' returns the same data in JSON.
+def memory_diagnostics_view(request):
+    diagnostics = get_memory_diagnostics()
+
+    if request.method == 'POST':
+        try:
+            _apply_memory_action(diagnostics, request.POST)
+        except ValueError as exception:
+            messages.error(request, str(exception))
+
+        return HttpResponseRedirect(request.path)
+
+    params = request.GET
+    data   = {
+        'status': diagnostics.status(),
+        'views':  diagnostics.viewStats(),
+    }
+
+    try:
+        group = params.get('group', 'lineno')
+        if group not in GROUP_BY:
+            raise ValueError('Unknown group: {}'.format(group))
+
+        limit = params.get('limit', '25')
+        if not limit.isdigit() or int(limit) == 0:
+            raise ValueError('The limit must be a positive integer.')
+
+        limit = int(limit)
+
+        if params.get('top'):
+            data['top'] = diagnostics.top(params['top'], group, limit)
+
+        if params.get('first') and params.get('second'):
+            data['diff'] = diagnostics.diff(params['first'], params['second'], group, limit)
+
+        if params.get('objects'):
+            data['objects'] = diagnostics.objectCounts(limit)
+    except KeyError as exception:
+        messages.error(request, exception.args[0])
+    except ValueError as exception:
+        messages.error(request, str(exception))
+
+    if params.get('format') == 'json':
+        return JsonResponse(data)
+
+    return render(request, 'api/memory_diagnostics.html',
+        dict(admin.site.each_context(request), title='Memory diagnostics', params=params, **data))
+
+
+def _apply_memory_action(diagnostics, params):
+    action = params.get('action')
+
+    if action == 'start':
+        diagnostics.start(int(params.get('frames') or 1))
+    elif action == 'stop':
+        diagnostics.stop()
+    elif action == 'snapshot':
+        diagnostics.takeSnapshot(params.get('name') or 'snapshot')
+    elif action == 'reset':
+        diagnostics.reset()
+    else:
+        raise ValueError('Unknown action: {}'.format(action))
+
+
+# The number of queries and the time spent per database alias in this
+# process (see database_router.py), available to staff users at
+# /admin/database/.
+def database_metrics_view(request):
+    return JsonResponse(get_database_metrics().stats())
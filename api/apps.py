@@ -2,4 +2,23 @@ from django.apps import AppConfig
 
 
 class ApiConfig(AppConfig):
-    name = 'api'
+    name               = 'api'
+    default_auto_field = 'django.db.models.BigAutoField'
+
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals   import post_delete, post_save
+        from .database_router           import install_database_metrics
+        from .user_claim_cache          import invalidate_user_claims
+
+        # Cached claims of a user are discarded when the user is updated.
+        post_save.connect(invalidate_user_claims, sender=User,
+            dispatch_uid='api.invalidate_user_claims.post_save')
+        post_delete.connect(invalidate_user_claims, sender=User,
+            dispatch_uid='api.invalidate_user_claims.post_delete')
+
+        # Queries are counted per database alias.
+        connection_created.connect(install_database_metrics,
+            dispatch_uid='api.install_database_metrics')
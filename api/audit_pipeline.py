@@ -0,0 +1,270 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Structured audit events of security-relevant actions (user login, consent,
+# token issuance, token revocation, etc.)
+#
+# `audit(event, request, ...)` builds an event (a dictionary) and puts it into
+# a bounded in-memory queue. It never performs I/O. A background thread takes
+# events from the queue in batches and writes them to a sink, an object which
+# has `write(events)` (see rotating_file_audit_sink.py). The sink is specified
+# by settings.AUDIT_SINK.
+#
+# When the queue is full, settings.AUDIT_QUEUE_POLICY decides what happens.
+#
+#   'drop_new'    : The new event is dropped. (default)
+#   'drop_oldest' : The oldest event in the queue is dropped.
+#   'block'       : The caller waits for at most AUDIT_BLOCK_TIMEOUT seconds
+#                   and the new event is dropped if the queue is still full.
+#
+# Dropped events are counted (see `AuditPipeline.stats()`) and reported by
+# the background thread as a warning.
+
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections                 import deque
+from django.conf                 import settings
+from django.utils.functional     import empty
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+POLICIES = ('drop_new', 'drop_oldest', 'block')
+
+
+class AuditPipeline(object):
+    def __init__(self, sink, capacity=10000, batchSize=100, flushInterval=1.0,
+                 policy='drop_new', blockTimeout=0.05):
+        if policy not in POLICIES:
+            raise ValueError("Unknown audit queue policy '{}'.".format(policy))
+
+        self._sink          = sink
+        self._capacity      = capacity
+        self._batchSize     = batchSize
+        self._flushInterval = flushInterval
+        self._policy        = policy
+        self._blockTimeout  = blockTimeout
+        self._emitted       = 0
+        self._written       = 0
+        self._dropped       = 0
+        self._failed        = 0
+        self.__reset()
+
+
+    def __reset(self):
+        # Also called in a child process after fork(), where the thread of
+        # the parent process does not exist.
+        self._queue    = deque()
+        self._cond     = threading.Condition(threading.Lock())
+        self._thread   = None
+        self._closing  = False
+        self._reported = 0
+
+
+    def emit(self, event):
+        """Put the event into the queue without blocking (unless the policy
+        is 'block').
+
+        Returns:
+            bool : False if the event was dropped.
+        """
+
+        with self._cond:
+            if self._thread is None:
+                self.__start()
+
+            if len(self._queue) >= self._capacity:
+                if self._policy == 'drop_oldest':
+                    self._queue.popleft()
+                    self._dropped += 1
+                elif self._policy != 'block' or not self._cond.wait_for(
+                        lambda: len(self._queue) < self._capacity, self._blockTimeout):
+                    self._dropped += 1
+                    return False
+
+            self._queue.append(event)
+            self._emitted += 1
+
+            if len(self._queue) >= self._batchSize:
+                self._cond.notify_all()
+
+        return True
+
+
+    def stats(self):
+        with self._cond:
+            return {
+                'emitted': self._emitted,
+                'written': self._written,
+                'dropped': self._dropped,
+                'failed':  self._failed,
+                'queued':  len(self._queue),
+            }
+
+
+    def close(self, timeout=5.0):
+        """Write the queued events and stop the background thread."""
+
+        with self._cond:
+            thread, self._closing = self._thread, True
+            self._cond.notify_all()
+
+        if thread is not None:
+            thread.join(timeout)
+
+
+    def __start(self):
+        self._thread = threading.Thread(
+            target=self.__run, name='audit-writer', daemon=True)
+        self._thread.start()
+
+
+    def __run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._queue) >= self._batchSize or self._closing,
+                    self._flushInterval)
+
+                count = min(len(self._queue), self._batchSize)
+                batch = [ self._queue.popleft() for _ in range(count) ]
+                done  = self._closing and not self._queue
+
+                # Producers waiting with the 'block' policy.
+                self._cond.notify_all()
+
+            if batch:
+                self.__write(batch)
+
+            self.__reportDrops()
+
+            if done:
+                return
+
+
+    def __write(self, batch):
+        try:
+            self._sink.write(batch)
+        except Exception:
+            logger.error("audit: Failed to write %d audit events.", len(batch), exc_info=True)
+            with self._cond:
+                self._failed += len(batch)
+            return
+
+        with self._cond:
+            self._written += len(batch)
+
+
+    def __reportDrops(self):
+        dropped = self._dropped
+        if dropped == self._reported:
+            return
+
+        logger.warning("audit: %d audit events have been dropped because the queue was full (%d in total).",
+            dropped - self._reported, dropped)
+
+        self._reported = dropped
+
+
+    def _reset_after_fork(self):
+        self.__reset()
+
+
+_pipeline      = None
+_pipeline_lock = threading.Lock()
+
+
+def get_audit_pipeline():
+    """Get the AuditPipeline configured by settings, or None if auditing is
+    disabled."""
+
+    global _pipeline
+
+    if _pipeline is not None or not getattr(settings, 'AUDIT_SINK', None):
+        return _pipeline
+
+    with _pipeline_lock:
+        if _pipeline is None:
+            sink = import_string(settings.AUDIT_SINK)(**getattr(settings, 'AUDIT_SINK_OPTIONS', {}))
+
+            _pipeline = AuditPipeline(sink,
+                capacity      = getattr(settings, 'AUDIT_QUEUE_SIZE',     10000),
+                batchSize     = getattr(settings, 'AUDIT_BATCH_SIZE',     100),
+                flushInterval = getattr(settings, 'AUDIT_FLUSH_INTERVAL', 1.0),
+                policy        = getattr(settings, 'AUDIT_QUEUE_POLICY',   'drop_new'),
+                blockTimeout  = getattr(settings, 'AUDIT_BLOCK_TIMEOUT',  0.05))
+
+            atexit.register(_pipeline.close)
+
+    return _pipeline
+
+
+def audit(event, request=None, outcome='success', **details):
+    """Record an audit event.
+
+    Args:
+        event (str) : The type of the event, e.g. 'login'.
+        request (django.http.HttpRequest) : The request which caused the event.
+        outcome (str) : The outcome, e.g. 'success' and 'failure'.
+        details : Other attributes of the event. None values are omitted.
+    """
+
+    pipeline = get_audit_pipeline()
+    if pipeline is None:
+        return
+
+    entry = { 'ts': time.time(), 'event': event, 'outcome': outcome }
+
+    if request is not None:
+        entry['ip']   = request.META.get('REMOTE_ADDR')
+        entry['path'] = request.path
+
+        user = _loaded_user(request)
+        if user is not None and user.is_authenticated:
+            entry['user'] = user.pk
+
+    for name, value in details.items():
+        if value is not None:
+            entry[name] = value
+
+    pipeline.emit(entry)
+
+
+def _loaded_user(request):
+    # request.user is a lazy object set by AuthenticationMiddleware. It is
+    # not evaluated here because it may need database access.
+    user = request.__dict__.get('user')
+
+    if getattr(user, '_wrapped', None) is empty:
+        return None
+
+    return getattr(user, '_wrapped', user)
+
+
+def _reset_after_fork():
+    if _pipeline is not None:
+        _pipeline._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,221 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Selection of an Authlete endpoint (base URL) among several ones, e.g. the
+# same Authlete cluster reachable in several regions.
+#
+# Each endpoint has a score: the exponentially weighted moving average of the
+# latencies of calls to it, multiplied by a penalty which grows with its
+# recent error rate. An endpoint becomes unhealthy after `maxFailures`
+# consecutive failures and stays so for `cooldown` seconds (or until a probe
+# succeeds).
+#
+# `candidates()` returns the endpoints in the order they should be tried:
+# healthy ones by score, then unhealthy ones as a last resort.
+# PooledAuthleteApi reports the result of every call with `report()` and
+# tries the next candidate when a call fails before reaching Authlete.
+#
+# A background thread probes every endpoint every `probeInterval` seconds
+# with a HEAD request to its base URL (any HTTP response means reachable), so
+# that scores stay current for endpoints which are not being used and a
+# recovered endpoint is noticed without sacrificing a real request.
+
+
+import logging
+import os
+import threading
+import time
+import weakref
+import requests
+
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointState(object):
+    __slots__ = ('baseUrl', 'latency', 'errorRate', 'failures', 'failedAt')
+
+
+    def __init__(self, baseUrl):
+        self.baseUrl   = baseUrl
+        self.latency   = None
+        self.errorRate = 0.0
+        self.failures  = 0
+        self.failedAt  = None
+
+
+class AuthleteEndpointSelector(object):
+    def __init__(self, baseUrls, probeInterval=10.0, probeTimeout=2.0,
+                 maxFailures=3, cooldown=30.0, alpha=0.2):
+        if not baseUrls:
+            raise ValueError('At least one base URL is required.')
+
+        self._states        = [ EndpointState(url.rstrip('/')) for url in baseUrls ]
+        self._probeInterval = probeInterval
+        self._probeTimeout  = probeTimeout
+        self._maxFailures   = maxFailures
+        self._cooldown      = cooldown
+        self._alpha         = alpha
+        self._lock          = threading.Lock()
+        self._prober        = None
+
+        _instances.add(self)
+
+
+    @property
+    def baseUrls(self):
+        return [ s.baseUrl for s in self._states ]
+
+
+    def candidates(self):
+        """Get the base URLs in the order they should be tried."""
+
+        self.__startProber()
+
+        now = time.monotonic()
+
+        with self._lock:
+            healthy   = [ s for s in self._states if self.__isHealthy(s, now) ]
+            unhealthy = [ s for s in self._states if not self.__isHealthy(s, now) ]
+
+            healthy.sort(key=self.__score)
+            unhealthy.sort(key=lambda s: s.failedAt or 0)
+
+        return [ s.baseUrl for s in healthy + unhealthy ]
+
+
+    def report(self, baseUrl, latency, ok):
+        """Record the result of a call to the endpoint."""
+
+        with self._lock:
+            state = self.__find(baseUrl)
+            if state is None:
+                return
+
+            alpha = self._alpha
+            state.errorRate = (1 - alpha) * state.errorRate + (0.0 if ok else alpha)
+
+            if ok:
+                state.latency  = latency if state.latency is None else \
+                                 (1 - alpha) * state.latency + alpha * latency
+                state.failures = 0
+            else:
+                state.failures += 1
+                state.failedAt  = time.monotonic()
+
+                if state.failures == self._maxFailures:
+                    logger.warning("authlete_endpoint_selector: %s is unhealthy.", baseUrl)
+
+
+    def stats(self):
+        now = time.monotonic()
+
+        with self._lock:
+            return [ {
+                'base_url':   s.baseUrl,
+                'healthy':    self.__isHealthy(s, now),
+                'latency':    s.latency,
+                'error_rate': round(s.errorRate, 3),
+                'score':      self.__score(s),
+            } for s in self._states ]
+
+
+    def probe(self):
+        """Probe every endpoint once."""
+
+        for state in list(self._states):
+            started = time.monotonic()
+
+            try:
+                requests.head(state.baseUrl + '/', timeout=self._probeTimeout, allow_redirects=False)
+            except Exception:
+                self.report(state.baseUrl, None, False)
+                continue
+
+            self.report(state.baseUrl, time.monotonic() - started, True)
+
+
+    def __isHealthy(self, state, now):
+        return state.failures < self._maxFailures or \
+               now - state.failedAt >= self._cooldown
+
+
+    def __score(self, state):
+        # Endpoints which have not been measured yet are tried in the
+        # configured order after measured fast ones.
+        latency = state.latency if state.latency is not None else self._probeTimeout
+
+        return latency * (1.0 + 10.0 * state.errorRate)
+
+
+    def __find(self, baseUrl):
+        for state in self._states:
+            if state.baseUrl == baseUrl:
+                return state
+
+        return None
+
+
+    def __startProber(self):
+        if self._prober is not None or self._probeInterval <= 0 or len(self._states) < 2:
+            return
+
+        with self._lock:
+            if self._prober is not None:
+                return
+
+            self._prober = threading.Thread(
+                target=_probe_forever, args=(weakref.ref(self), self._probeInterval),
+                name='authlete-prober', daemon=True)
+            self._prober.start()
+
+
+    def _reset_after_fork(self):
+        # The prober of the parent process does not exist in the child.
+        self._lock   = threading.Lock()
+        self._prober = None
+
+
+def _probe_forever(ref, interval):
+    # The thread holds the selector weakly so that the selector can be
+    # garbage-collected.
+    while True:
+        selector = ref()
+        if selector is None:
+            return
+
+        try:
+            selector.probe()
+        except Exception:
+            logger.warning("authlete_endpoint_selector: Probing failed.", exc_info=True)
+
+        del selector
+        time.sleep(interval)
+
+
+# Selectors are created per tenant and again when the base URLs of a tenant
+# change. Fork hooks cannot be unregistered, so one hook resets them all.
+_instances = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for selector in list(_instances):
+        selector._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,196 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# This class records pairs of a request to and a response from an Authlete
+# API, with the time the API took, into a file. The file can be served later
+# by AuthleteTrafficReplayer as a local stand-in for Authlete, so that the
+# traffic mix of production can be rerun offline.
+#
+# The file is a JSON Lines file. Each line looks like below.
+#
+#   {"t":1767225600.0,"m":"POST","api":"auth/token","req":{...},
+#    "status":200,"res":{...},"ms":42.1}
+#
+# 'api' is the path of the Authlete API after the prefix ('/api' or
+# '/api/{serviceId}'), so a recording can be replayed for another service.
+#
+# Secrets, tokens and personal data in requests and responses are redacted.
+# Their values are replaced with 'x' repeated as many times as the length of
+# the original values so that the sizes of messages are kept. Properties of
+# Authlete's requests and responses are redacted by name (REDACTED_NAMES).
+# Form parameters in 'parameters' and JSON or URLs in 'responseContent' come
+# from or go to client applications and may carry any claim of a user, so
+# only the values of the protocol parameters in PRESERVED_PARAMETERS are kept
+# there.
+#
+# Lines are appended with a single write(2) on a file opened with O_APPEND,
+# so worker processes of a prefork server can share one file.
+
+
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode
+
+
+# Names (lowercased and without '_') of values to be redacted.
+REDACTED_NAMES = frozenset([
+    'accesstoken', 'actortoken', 'assertion', 'authorizationcode',
+    'claims', 'claimsfortx', 'clientassertion', 'clientcertificate',
+    'clientsecret', 'code', 'codeverifier', 'dpop', 'email', 'idtoken',
+    'idtokenclaims', 'idtokenhint', 'jwtaccesstoken', 'loginhint', 'nonce',
+    'password', 'refreshtoken', 'request', 'requestobjectpayload', 'sub',
+    'subject', 'subjecttoken', 'ticket', 'token', 'userinfoclaims',
+    'username', 'verifiedclaimsfortx',
+])
+
+
+# Names of form parameters and members of JSON in 'responseContent' whose
+# values are kept. The values of the others are redacted.
+PRESERVED_PARAMETERS = frozenset([
+    'acr_values', 'active', 'aud', 'claims_locales', 'client_id',
+    'code_challenge_method', 'display', 'error', 'error_description',
+    'error_uri', 'exp', 'expires_in', 'grant_type', 'iat', 'iss',
+    'issued_token_type', 'max_age', 'nbf', 'prompt', 'redirect_uri',
+    'request_uri', 'requested_token_type', 'resource', 'response_mode',
+    'response_type', 'scope', 'token_type', 'token_type_hint', 'ui_locales',
+])
+
+
+def redact(value, name=None):
+    """Redact secrets in the value (a dict, a list or a str)."""
+
+    if isinstance(value, dict):
+        return { k: redact(v, k) for k, v in value.items() }
+
+    if isinstance(value, list):
+        return [ redact(v, name) for v in value ]
+
+    if not isinstance(value, str):
+        return value
+
+    if name == 'parameters':
+        # Form parameters, e.g. 'grant_type=...&code=...'
+        return _redact_form(value)
+
+    if name == 'responseContent':
+        return _redact_content(value)
+
+    if name is not None and name.replace('_', '').lower() in REDACTED_NAMES:
+        return _mask(value)
+
+    return value
+
+
+def _mask(value):
+    return 'x' * len(value)
+
+
+def _redact_parameters(value, name=None):
+    # Values of form parameters or of members of JSON in 'responseContent'.
+    if isinstance(value, dict):
+        return { k: _redact_parameters(v, k) for k, v in value.items() }
+
+    if isinstance(value, list):
+        return [ _redact_parameters(v, name) for v in value ]
+
+    if isinstance(value, str) and name not in PRESERVED_PARAMETERS:
+        return _mask(value)
+
+    return value
+
+
+def _redact_form(value):
+    pairs = parse_qsl(value, keep_blank_values=True)
+
+    return urlencode([ (k, _redact_parameters(v, k)) for k, v in pairs ])
+
+
+def _redact_content(value):
+    # JSON, e.g. a token response or a userinfo response.
+    if value.startswith('{'):
+        try:
+            return json.dumps(_redact_parameters(json.loads(value)), separators=(',', ':'))
+        except ValueError:
+            return _mask(value)
+
+    # A URL to redirect to, e.g. an authorization response. The query and
+    # the fragment hold response parameters.
+    if value.startswith('https://') or value.startswith('http://'):
+        base, sep, params = value.partition('#') if '#' in value else value.partition('?')
+        return base + sep + _redact_form(params)
+
+    # Others, e.g. an HTML for 'form_post' or a JWT.
+    return _mask(value)
+
+
+class AuthleteTrafficRecorder(object):
+    def __init__(self, path):
+        self._path = path
+        self._fd   = None
+        self._lock = threading.Lock()
+
+
+    @property
+    def path(self):
+        return self._path
+
+
+    def record(self, method, api, data, response, elapsed):
+        """Record a pair of a request and a response.
+
+        Args:
+            method (str) : The HTTP method.
+            api (str) : The path of the Authlete API after the prefix.
+            data (str or bytes) : The request body in JSON, or None.
+            response (requests.Response) : The response from Authlete.
+            elapsed (float) : The seconds the API took.
+        """
+
+        entry = {
+            't':      round(time.time(), 3),
+            'm':      method,
+            'api':    api,
+            'req':    redact(self.__parse(data)),
+            'status': response.status_code,
+            'res':    redact(self.__parse(response.content)),
+            'ms':     round(elapsed * 1000, 1),
+        }
+
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+
+        os.write(self.__open(), line.encode('utf-8'))
+
+
+    def __open(self):
+        if self._fd is None:
+            with self._lock:
+                if self._fd is None:
+                    self._fd = os.open(self._path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+
+        return self._fd
+
+
+    def __parse(self, body):
+        if not body:
+            return None
+
+        try:
+            return json.loads(body)
+        except ValueError:
+            return body.decode('utf-8', 'replace') if isinstance(body, bytes) else body
@@ -0,0 +1,112 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# This class serves responses recorded by AuthleteTrafficRecorder as a local
+# stand-in for Authlete.
+#
+# Recorded requests are redacted, so they cannot be matched with incoming
+# requests exactly. Instead, the responses recorded for each Authlete API are
+# served in the recorded order, round-robin. The mix of actions (e.g.
+# INTERACTION vs NO_INTERACTION, error actions) and the sizes of responses
+# therefore follow the recorded traffic.
+#
+# The recorded latency of each response is reproduced, scaled by `speed`.
+# 0 serves responses without delay.
+
+
+import itertools
+import json
+import threading
+import time
+import requests
+
+
+class AuthleteTrafficReplayer(object):
+    def __init__(self, path, speed=1.0):
+        self._path    = path
+        self._speed   = speed
+        self._entries = self.load(path)
+        self._counter = { api: itertools.count() for api in self._entries }
+        self._lock    = threading.Lock()
+
+
+    @classmethod
+    def load(cls, path):
+        """Load a recording and group its entries by the Authlete API."""
+
+        entries = {}
+
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+
+                entry = json.loads(line)
+                entries.setdefault((entry['m'], entry['api']), []).append(entry)
+
+        return entries
+
+
+    @property
+    def apis(self):
+        """Pairs of an HTTP method and an Authlete API in the recording."""
+        return sorted(self._entries.keys(), key=lambda k: k[1])
+
+
+    def entries(self, key):
+        """Recorded entries of the pair of an HTTP method and an Authlete API."""
+        return self._entries.get(key, [])
+
+
+    def respond(self, method, api):
+        """Build the next recorded response of the Authlete API.
+
+        Returns:
+            requests.Response
+        """
+
+        key     = (method, api)
+        entries = self._entries.get(key)
+
+        if not entries:
+            return self.__response(404, {
+                'resultMessage': 'No recording for {} {}.'.format(method, api) }, api)
+
+        with self._lock:
+            entry = entries[next(self._counter[key]) % len(entries)]
+
+        if self._speed > 0:
+            time.sleep(entry['ms'] / 1000 * self._speed)
+
+        return self.__response(entry['status'], entry['res'], api)
+
+
+    def __response(self, status, body, api):
+        response = requests.Response()
+        response.status_code = status
+        response.url         = api
+        response.encoding    = 'utf-8'
+
+        if body is None:
+            response._content = b''
+        elif isinstance(body, str):
+            response._content = body.encode('utf-8')
+        else:
+            response._content = json.dumps(body, separators=(',', ':')).encode('utf-8')
+            response.headers['Content-Type'] = 'application/json;charset=UTF-8'
+
+        return response
@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2019 Authlete, Inc.
+# Copyright (C) 2019-2026 Authlete, Inc.
 #
 # Licensed under the Apache License, Version 2.0 (the "License");
 # you may not use this file except in compliance with the License.
@@ -18,7 +18,9 @@
 import logging
 from django.contrib.auth import authenticate, login
 from authlete.django.handler.authorization_request_decision_handler import AuthorizationRequestDecisionHandler
+from .audit_pipeline                                                import audit
 from .base_endpoint                                                 import BaseEndpoint
+from .consent_store                                                 import ConsentStore
 from .spi.authorization_request_decision_handler_spi_impl           import AuthorizationRequestDecisionHandlerSpiImpl
 
 
@@ -54,10 +56,12 @@ class AuthorizationDecisionEndpoint(BaseEndpoint):
         user = authenticate(username=loginId, password=password)
         if user is None:
             # User authentication failed.
-            logger.debug("authorization_decision_endpoint: User authentication failed. The presented login ID is {}.".format(loginId))
+            logger.debug("authorization_decision_endpoint: User authentication failed. The presented login ID is %s.", loginId)
+            audit('login', request, 'failure', login_id=loginId)
             return
 
-        logger.debug("authorization_decision_endpoint: User authentication succeeded. The presented login ID is {}.".format(loginId))
+        logger.debug("authorization_decision_endpoint: User authentication succeeded. The presented login ID is %s.", loginId)
+        audit('login', request, 'success', login_id=loginId, user=user.pk)
 
         # Let the user log in.
         login(request, user)
@@ -79,4 +83,12 @@ class AuthorizationDecisionEndpoint(BaseEndpoint):
         claimNames   = session.get('claimNames')
         claimLocales = session.get('claimLocales')
 
+        audit('consent', request, 'granted' if authorized else 'denied',
+            client_id=session.get('clientId'))
+
+        # Skip the authorization page next time if the user wishes.
+        if authorized and request.user.is_authenticated and 'remember' in request.POST:
+            ConsentStore().remember(request.user, session.get('clientId'),
+                                    session.get('scopes'), claimNames)
+
         return handler.handle(ticket, claimNames, claimLocales)
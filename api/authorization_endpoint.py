@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2019-2021 Authlete, Inc.
+# Copyright (C) 2019-2026 Authlete, Inc.
 #
 # Licensed under the Apache License, Version 2.0 (the "License");
 # you may not use this file except in compliance with the License.
@@ -15,24 +15,34 @@
 # License.
 
 
+import json
 import logging
 import time
+from urllib.parse               import parse_qs
+from django.conf                import settings
 from django.contrib.auth        import logout
 from django.contrib.auth.models import User
 from django.shortcuts           import render
-from authlete.django.handler.authorization_request_base_handler  import AuthorizationRequestBaseHandler
-from authlete.django.handler.authorization_request_error_handler import AuthorizationRequestErrorHandler
-from authlete.django.handler.no_interaction_handler              import NoInteractionHandler
-from authlete.django.web.request_utility                         import RequestUtility
-from authlete.dto.authorization_action                           import AuthorizationAction
-from authlete.dto.authorization_fail_action                      import AuthorizationFailAction
-from authlete.dto.authorization_fail_reason                      import AuthorizationFailReason
-from authlete.dto.authorization_fail_request                     import AuthorizationFailRequest
-from authlete.dto.authorization_request                          import AuthorizationRequest
-from authlete.types.prompt                                       import Prompt
-from .authorization_page_model                                   import AuthorizationPageModel
-from .base_endpoint                                              import BaseEndpoint
-from .spi.no_interaction_handler_spi_impl                        import NoInteractionHandlerSpiImpl
+from authlete.django.handler.authorization_request_base_handler     import AuthorizationRequestBaseHandler
+from authlete.django.handler.authorization_request_decision_handler import AuthorizationRequestDecisionHandler
+from authlete.django.handler.authorization_request_error_handler    import AuthorizationRequestErrorHandler
+from authlete.django.handler.no_interaction_handler                 import NoInteractionHandler
+from authlete.django.web.request_utility                            import RequestUtility
+from authlete.django.web.response_utility                           import ResponseUtility
+from authlete.dto.authorization_action                              import AuthorizationAction
+from authlete.dto.authorization_fail_action                         import AuthorizationFailAction
+from authlete.dto.authorization_fail_reason                         import AuthorizationFailReason
+from authlete.dto.authorization_fail_request                        import AuthorizationFailRequest
+from authlete.dto.authorization_request                             import AuthorizationRequest
+from authlete.types.prompt                                          import Prompt
+from .audit_pipeline                                                import audit
+from .authorization_page_model                                      import AuthorizationPageModel
+from .base_endpoint                                                 import BaseEndpoint
+from .client_registry                                               import get_client_registry
+from .consent_store                                                 import ConsentStore
+from .page_fragment_cache                                           import get_page_fragment_cache
+from .spi.authorization_request_decision_handler_spi_impl           import AuthorizationRequestDecisionHandlerSpiImpl
+from .spi.no_interaction_handler_spi_impl                           import NoInteractionHandlerSpiImpl
 
 
 logger = logging.getLogger(__name__)
@@ -48,6 +58,11 @@ class AuthorizationEndpoint(BaseEndpoint):
         # the authorization endpoint support both GET and POST methods.
         params = RequestUtility.extractParameters(request)
 
+        # Reject obviously invalid requests without calling Authlete.
+        rejection = self.__precheck(params)
+        if rejection is not None:
+            return rejection
+
         # Call Authlete's /api/auth/authorization API.
         res = self.__callAuthorizationApi(params)
 
@@ -68,6 +83,30 @@ class AuthorizationEndpoint(BaseEndpoint):
             return self.__handleError(res)
 
 
+    def __precheck(self, parameters):
+        registry = get_client_registry(self.api)
+        if registry is None:
+            return None
+
+        values = parse_qs(parameters or '')
+
+        # When a request object is used, 'redirect_uri' in it takes precedence.
+        redirectUri = None
+        if 'request' not in values and 'request_uri' not in values:
+            redirectUri = values.get('redirect_uri', [None])[0]
+
+        reason = registry.check(values.get('client_id', [None])[0], redirectUri)
+        if reason is None:
+            return None
+
+        logger.debug("authorization_endpoint: The request was rejected locally: %s", reason)
+
+        # The same as the response which Authlete would return. The client
+        # is not redirected to because it cannot be trusted.
+        return ResponseUtility.badRequest(json.dumps(
+            { 'error': 'invalid_request', 'error_description': reason }))
+
+
     def __callAuthorizationApi(self, parameters):
         # Create a request for /api/auth/authorization API.
         req = AuthorizationRequest()
@@ -88,7 +127,7 @@ class AuthorizationEndpoint(BaseEndpoint):
 
 
     def __handleError(self, response):
-        logger.debug("authorization_endpoint: The request caused an error: {}".format(response.resultMessage))
+        logger.debug("authorization_endpoint: The request caused an error: %s", response.resultMessage)
 
         # Make AuthorizationRequestErrorHandler handle the error case.
         return AuthorizationRequestErrorHandler().handle(response)
@@ -97,6 +136,11 @@ class AuthorizationEndpoint(BaseEndpoint):
     def __handleInteraction(self, request, response):
         logger.debug("authorization_endpoint: Processing the request with user interaction.")
 
+        # Skip the authorization page if the logged-in user has already
+        # consented to the client for the requested scopes and claims.
+        if self.__isConsentRemembered(request, response):
+            return self.__handleRememberedConsent(request, response)
+
         # Prepare a model object which is needed to render the authorization page.
         model = self.__prepareModel(request, response)
 
@@ -112,9 +156,57 @@ class AuthorizationEndpoint(BaseEndpoint):
         session['ticket']       = response.ticket
         session['claimNames']   = response.claims
         session['claimLocales'] = response.claimsLocales
+        session['clientId']     = response.client.clientId if response.client else None
+        session['scopes']       = self.__scopeNames(response)
+
+        # Render the authorization page. The part about the client is the
+        # same for all users and is rendered once per client.
+        engine   = getattr(settings, 'AUTHORIZATION_PAGE_TEMPLATE_ENGINE', None)
+        fragment = get_page_fragment_cache().render('api/authorization_client.html', model, engine)
 
-        # Render the authorization page.
-        return render(request, 'api/authorization.html', {'model':model})
+        return render(request, 'api/authorization.html',
+                      { 'model': model, 'clientFragment': fragment }, using=engine)
+
+
+    def __isConsentRemembered(self, request, response):
+        store = ConsentStore()
+
+        if not store.isEnabled() or response.client is None:
+            return False
+
+        # The client explicitly asks the user to consent or to select an account.
+        if response.prompts is not None and \
+           any(prompt in (Prompt.CONSENT, Prompt.SELECT_ACCOUNT) for prompt in response.prompts):
+            return False
+
+        if self.__isLoginRequired(request, response):
+            return False
+
+        # Remembered consents are about scopes and claims only. Requests for
+        # other things (RFC 9396 authorization details, RFC 8707 resources,
+        # authentication context classes) are always shown to the user.
+        details = response.authorizationDetails
+        if (details is not None and details.elements) or response.resources or response.acrs:
+            return False
+
+        return store.covers(request.user, response.client.clientId,
+                            self.__scopeNames(response), response.claims)
+
+
+    def __handleRememberedConsent(self, request, response):
+        logger.debug("authorization_endpoint: Issuing without user interaction by the remembered consent.")
+
+        audit('consent', request, 'remembered', client_id=response.client.clientId)
+
+        # The same as the user pressing "Authorize" on the authorization page.
+        spi = AuthorizationRequestDecisionHandlerSpiImpl(request, True)
+
+        return AuthorizationRequestDecisionHandler(self.api, spi).handle(
+            response.ticket, response.claims, response.claimsLocales)
+
+
+    def __scopeNames(self, response):
+        return [ scope.name for scope in (response.scopes or ()) ]
 
 
     def __prepareModel(self, request, response):
@@ -124,6 +216,9 @@ class AuthorizationEndpoint(BaseEndpoint):
         # Check if login is required.
         model.loginRequired = self.__isLoginRequired(request, response)
 
+        # Offer to remember the consent.
+        model.rememberConsent = ConsentStore().isEnabled()
+
         if model.loginRequired == False:
             # The user's name that will be referred to in the authorization page.
             model.userName = request.user.first_name or request.user.username
@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2019 Authlete, Inc.
+# Copyright (C) 2019-2026 Authlete, Inc.
 #
 # Licensed under the Apache License, Version 2.0 (the "License");
 # you may not use this file except in compliance with the License.
@@ -15,98 +15,38 @@
 # License.
 
 
+# The model of the authorization page. One is created per request, so it is
+# a plain object with __slots__ and no per-instance dictionary.
 class AuthorizationPageModel(object):
-    def __init__(self, response):
-        client = response.client
-
-        self._serviceName     = response.service.serviceName
-        self._clientName      = client.clientName
-        self._description     = client.description
-        self._logoUri         = client.logoUri
-        self._clientUri       = client.clientUri
-        self._policyUri       = client.policyUri
-        self._tosUri          = client.tosUri
-        self._scopes          = response.scopes
-        self._loginId         = ''
-        self._loginIdReadOnly = ''
-        self._userName        = None
-
-
-    @property
-    def serviceName(self):
-        return self._serviceName
-
-
-    @property
-    def clientName(self):
-        return self._clientName
-
-
-    @property
-    def description(self):
-        return self._description
-
-
-    @property
-    def logoUri(self):
-        return self._logoUri
-
-
-    @property
-    def clientUri(self):
-        return self._clientUri
-
-
-    @property
-    def policyUri(self):
-        return self._policyUri
-
-
-    @property
-    def tosUri(self):
-        return self._tosUri
-
-
-    @property
-    def scopes(self):
-        return self._scopes
-
-
-    @property
-    def loginId(self):
-        return self._loginId
-
-
-    @loginId.setter
-    def loginId(self, value):
-        self._loginId = value
-
-
-    @property
-    def loginIdReadOnly(self):
-        return self._loginIdReadOnly
+    __slots__ = ('serviceName', 'clientId', 'clientName', 'description',
+                 'logoUri', 'clientUri', 'policyUri', 'tosUri', 'scopes',
+                 'loginId', 'loginIdReadOnly', 'loginRequired', 'userName',
+                 'rememberConsent')
 
 
-    @loginIdReadOnly.setter
-    def loginIdReadOnly(self, value):
-        self._loginIdReadOnly = value
-
-
-    @property
-    def loginRequired(self):
-        return self._loginRequired
-
-
-    @loginRequired.setter
-    def loginRequired(self, value):
-        self._loginRequired = value
-
-
-    @property
-    def userName(self):
-        return self._userName
-
+    def __init__(self, response):
+        client = response.client
 
-    @userName.setter
-    def userName(self, value):
-        self._userName = value
+        self.serviceName     = response.service.serviceName
+        self.clientId        = client.clientId
+        self.clientName      = client.clientName
+        self.description     = client.description
+        self.logoUri         = client.logoUri
+        self.clientUri       = client.clientUri
+        self.policyUri       = client.policyUri
+        self.tosUri          = client.tosUri
+        self.scopes          = response.scopes
+        self.loginId         = ''
+        self.loginIdReadOnly = ''
+        self.loginRequired   = False
+        self.userName        = None
+        self.rememberConsent = False
+
+
+    @property
+    def clientMetadata(self):
+        """The metadata of the client shown on the page. It is the same for
+        all users, and is the version of the cached client fragment."""
+
+        return (self.serviceName, self.clientName, self.description, self.logoUri,
+                self.clientUri, self.policyUri, self.tosUri)
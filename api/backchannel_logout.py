@@ -0,0 +1,420 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# OpenID Connect Back-Channel Logout.
+#
+# When a user logs out (see end_session_endpoint.py) or staff users log users
+# out on the admin site, every client application (RP) which the user has
+# authorized is sent a logout token to its back-channel logout URI.
+#
+# The work is done outside the request which triggers it. notify(subject)
+# only queues a job. A bounded pool of worker threads lists the clients the
+# subject has authorized (Authlete's /client/authorization/get/list API),
+# signs a logout token for each of them and POSTs it to the client, each
+# with its own timeout. A step which fails (listing the clients, signing the
+# token of a client, or a delivery) is retried later with an exponential
+# backoff, up to BACKCHANNEL_LOGOUT_RETRIES times. A client which fails does
+# not hold up the others.
+#
+# The back-channel logout URI of a client is taken from BACKCHANNEL_LOGOUT_URIS
+# in settings.py, or from 'backchannel_logout_uri' in the custom metadata of
+# the client registered in Authlete. Clients without one are skipped.
+#
+# Authlete does not issue logout tokens. They are signed here with the key of
+# the Authlete service which signs ID tokens (the JWK Set of the service with
+# private keys, so the API key must be allowed to read them), with the issuer
+# of the service. This requires PyJWT with the 'crypto' extra
+# (pip install "pyjwt[crypto]").
+#
+# References:
+#
+#   OpenID Connect Back-Channel Logout 1.0
+#     https://openid.net/specs/openid-connect-backchannel-1_0.html
+
+
+import heapq
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+import weakref
+import requests
+from django.conf      import settings
+from .audit_pipeline  import audit
+
+try:
+    import jwt
+except ImportError:
+    jwt = None
+
+
+logger = logging.getLogger(__name__)
+
+
+BACKCHANNEL_LOGOUT_EVENT = 'http://schemas.openid.net/event/backchannel-logout'
+
+
+class LogoutTokenIssuer(object):
+    """Signs logout tokens with the ID token signing key of the service."""
+
+    def __init__(self, api, lifetime=120, refresh=3600):
+        self._api        = api
+        self._lifetime   = lifetime
+        self._refresh    = refresh
+        self._loadedAt   = None
+        self._issuer     = None
+        self._keys       = None
+        self._signingKid = None
+        self._lock       = threading.Lock()
+
+
+    def issue(self, subject, clientId):
+        """Create a logout token for the client."""
+
+        issuer, key, alg, kid = self.__signingKey()
+        now = int(time.time())
+
+        claims = {
+            'iss':    issuer,
+            'sub':    subject,
+            'aud':    str(clientId),
+            'iat':    now,
+            'exp':    now + self._lifetime,
+            'jti':    uuid.uuid4().hex,
+            'events': { BACKCHANNEL_LOGOUT_EVENT: {} },
+        }
+
+        return jwt.encode(claims, key, algorithm=alg, headers={ 'kid': kid, 'typ': 'logout+jwt' })
+
+
+    def verifyIdToken(self, idToken):
+        """Verify the signature and the issuer of an ID token issued by the
+        service, ignoring its expiration (e.g. 'id_token_hint').
+
+        Returns:
+            dict : The claims, or None if the ID token is invalid.
+        """
+
+        if jwt is None or not idToken:
+            return None
+
+        try:
+            issuer, _, _, _ = self.__signingKey()
+            kid = jwt.get_unverified_header(idToken).get('kid')
+
+            with self._lock:
+                jwk = self._keys.get(kid)
+
+            if jwk is None:
+                return None
+
+            # The JWK Set includes the private keys.
+            key = jwk.key.public_key() if hasattr(jwk.key, 'public_key') else jwk.key
+
+            return jwt.decode(idToken, key, algorithms=[ jwk.algorithm_name ],
+                issuer=issuer, options={ 'verify_exp': False, 'verify_aud': False })
+        except Exception:
+            logger.debug("backchannel_logout: Invalid ID token.", exc_info=True)
+            return None
+
+
+    def __signingKey(self):
+        with self._lock:
+            if self._loadedAt is None or time.monotonic() - self._loadedAt >= self._refresh:
+                self.__load()
+
+            kid = getattr(settings, 'LOGOUT_TOKEN_KEY_ID', None) or self._signingKid
+            jwk = self._keys.get(kid)
+
+            if jwk is None:
+                raise ValueError('No private key to sign logout tokens.')
+
+            return self._issuer, jwk.key, jwk.algorithm_name, kid
+
+
+    def __load(self):
+        configuration = json.loads(self._api.getServiceConfiguration())
+        jwks          = json.loads(self._api.getServiceJwks(pretty=False, includePrivateKeys=True))
+
+        keys       = {}
+        signingKid = None
+
+        for jwk in jwks.get('keys', []):
+            if jwk.get('use', 'sig') != 'sig' or 'kid' not in jwk:
+                continue
+
+            try:
+                keys[jwk['kid']] = jwt.PyJWK(jwk)
+            except Exception:
+                continue
+
+            # A private key is the one used to sign.
+            if signingKid is None and 'd' in jwk:
+                signingKid = jwk['kid']
+
+        self._issuer     = configuration['issuer']
+        self._keys       = keys
+        self._signingKid = signingKid
+        self._loadedAt   = time.monotonic()
+
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+
+
+class BackchannelLogoutNotifier(object):
+    def __init__(self, api, workers=8, timeout=5.0, retries=3, queueSize=1000):
+        self._api      = api
+        self._workers  = workers
+        self._timeout  = timeout
+        self._retries  = retries
+        self._jobs     = queue.Queue(maxsize=queueSize)
+        self._delayed  = []
+        self._cond     = threading.Condition()
+        self._threads  = None
+        self._lock     = threading.Lock()
+
+
+    def notify(self, subject, api=None):
+        """Queue back-channel logout of all the clients of the subject in
+        the Authlete service (by default, the one of this notifier).
+
+        Returns:
+            bool : False if the job was dropped because the queue is full.
+        """
+
+        if jwt is None:
+            logger.warning("backchannel_logout: PyJWT is not installed. RPs are not notified.")
+            return False
+
+        return self.__put((self.__resolve, api or self._api, str(subject)))
+
+
+    def __put(self, job):
+        self.__start()
+
+        try:
+            self._jobs.put_nowait(job)
+            return True
+        except queue.Full:
+            logger.warning("backchannel_logout: The queue is full. A job was dropped.")
+            return False
+
+
+    def __start(self):
+        if self._threads is not None:
+            return
+
+        with self._lock:
+            if self._threads is not None:
+                return
+
+            threads = [ threading.Thread(target=self.__work, name='backchannel-logout-{}'.format(i), daemon=True)
+                        for i in range(self._workers) ]
+            threads.append(threading.Thread(target=self.__schedule, name='backchannel-logout-retry', daemon=True))
+
+            for thread in threads:
+                thread.start()
+
+            self._threads = threads
+
+
+    def __work(self):
+        while True:
+            function, *args = self._jobs.get()
+
+            try:
+                function(*args)
+            except Exception:
+                logger.exception("backchannel_logout: A job failed.")
+
+
+    def __schedule(self):
+        # Moves jobs to retry into the queue when they are due.
+        while True:
+            with self._cond:
+                while not self._delayed or self._delayed[0][0] > time.monotonic():
+                    self._cond.wait(self._delayed[0][0] - time.monotonic() if self._delayed else None)
+
+                _, _, job = heapq.heappop(self._delayed)
+
+            self.__put(job)
+
+
+    def __resolve(self, api, subject, attempt=1):
+        try:
+            clients = list(self.__logoutUris(api, subject))
+        except Exception:
+            logger.warning("backchannel_logout: Failed to list the clients of a subject.", exc_info=True)
+            self.__retry((self.__resolve, api, subject), attempt, subject=subject)
+            return
+
+        for clientId, uri in clients:
+            self.__sign(api, subject, clientId, uri)
+
+
+    def __sign(self, api, subject, clientId, uri, attempt=1):
+        try:
+            token = get_logout_token_issuer(api).issue(subject, clientId)
+        except Exception:
+            logger.warning("backchannel_logout: Failed to sign a logout token for %s.", clientId, exc_info=True)
+            self.__retry((self.__sign, api, subject, clientId, uri), attempt, subject=subject, client_id=clientId)
+            return
+
+        self.__put((self.__deliver, subject, clientId, uri, token, 1))
+
+
+    def __logoutUris(self, api, subject):
+        overrides = getattr(settings, 'BACKCHANNEL_LOGOUT_URIS', {})
+        start     = 0
+
+        while True:
+            res = api.postServiceApi('client/authorization/get/list', json.dumps(
+                { 'subject': subject, 'start': start, 'end': start + 100 }).encode('utf-8'))
+
+            clients = res.get('clients') or []
+
+            for client in clients:
+                clientId = client.get('clientId')
+                uri      = overrides.get(str(clientId)) or _custom_metadata(client).get('backchannel_logout_uri')
+
+                if uri:
+                    yield clientId, uri
+
+            start += len(clients)
+
+            if not clients or start >= (res.get('totalCount') or 0):
+                return
+
+
+    def __deliver(self, subject, clientId, uri, token, attempt):
+        try:
+            response = requests.post(uri, data={ 'logout_token': token },
+                timeout=self._timeout, allow_redirects=False)
+            ok = response.status_code in (200, 204)
+
+            # 4xx means the RP rejected the token. Sending it again won't help.
+            retriable = not ok and response.status_code >= 500
+        except requests.RequestException:
+            ok, retriable = False, True
+
+        if ok or not retriable:
+            audit('backchannel_logout', None, 'success' if ok else 'failure',
+                subject=subject, client_id=clientId, attempts=attempt)
+            return
+
+        logger.info("backchannel_logout: Delivery to %s failed.", uri)
+        self.__retry((self.__deliver, subject, clientId, uri, token), attempt, subject=subject, client_id=clientId)
+
+
+    def __retry(self, job, attempt, **details):
+        # Runs the job again with the next attempt number after a backoff,
+        # unless it has been retried enough.
+        if attempt > self._retries:
+            audit('backchannel_logout', None, 'failure', attempts=attempt, **details)
+            return
+
+        delay = 2 ** attempt
+        logger.info("backchannel_logout: Retrying in %d seconds.", delay)
+
+        with self._cond:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, uuid.uuid4().hex, job + (attempt + 1,)))
+            self._cond.notify()
+
+
+    def _reset_after_fork(self):
+        # Jobs of the parent process are done by the parent. The queue is
+        # created again because its lock may have been held at the fork.
+        self._threads = None
+        self._lock    = threading.Lock()
+        self._cond    = threading.Condition()
+        self._jobs    = queue.Queue(maxsize=self._jobs.maxsize)
+        self._delayed = []
+
+
+def _custom_metadata(client):
+    try:
+        return json.loads(client.get('customMetadata') or '{}')
+    except ValueError:
+        return {}
+
+
+# LogoutTokenIssuer instances per AuthleteApi instance.
+_issuers     = weakref.WeakKeyDictionary()
+_issuersLock = threading.Lock()
+
+
+def get_logout_token_issuer(api):
+    """Get the LogoutTokenIssuer of the Authlete service."""
+
+    with _issuersLock:
+        issuer = _issuers.get(api)
+        if issuer is None:
+            issuer = _issuers[api] = LogoutTokenIssuer(api,
+                lifetime = getattr(settings, 'LOGOUT_TOKEN_LIFETIME', 120))
+
+        return issuer
+
+
+def discard_logout_token_issuer(api):
+    """Forget the LogoutTokenIssuer of the Authlete service."""
+
+    with _issuersLock:
+        _issuers.pop(api, None)
+
+
+_notifier     = None
+_notifierLock = threading.Lock()
+
+
+def get_backchannel_logout_notifier():
+    """Get the BackchannelLogoutNotifier of the process, or None if
+    back-channel logout is disabled (BACKCHANNEL_LOGOUT_WORKERS = 0) or the
+    Authlete API does not support it."""
+
+    global _notifier
+
+    workers = getattr(settings, 'BACKCHANNEL_LOGOUT_WORKERS', 0)
+    if not workers or not hasattr(settings.AUTHLETE_API, 'postServiceApi'):
+        return None
+
+    with _notifierLock:
+        if _notifier is None:
+            _notifier = BackchannelLogoutNotifier(settings.AUTHLETE_API,
+                workers   = workers,
+                timeout   = getattr(settings, 'BACKCHANNEL_LOGOUT_TIMEOUT', 5.0),
+                retries   = getattr(settings, 'BACKCHANNEL_LOGOUT_RETRIES', 3),
+                queueSize = getattr(settings, 'BACKCHANNEL_LOGOUT_QUEUE_SIZE', 1000))
+
+        return _notifier
+
+
+def _reset_after_fork():
+    # Threads and locks held by threads of the parent process do not exist
+    # in the child.
+    for issuer in list(_issuers.values()):
+        issuer._reset_after_fork()
+
+    if _notifier is not None:
+        _notifier._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,191 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Bulk revocation of the tokens of a subject (user), a client, or a pair of
+# them, e.g. when a user's account is compromised or a client is
+# decommissioned.
+#
+# The tokens are listed with Authlete's /auth/token/get/list API page by page
+# and revoked with /auth/token/revoke by a bounded pool of threads. A single
+# /auth/token/revoke call with 'clientIdentifier' and 'subject' revokes all
+# the tokens of the pair, so tokens are grouped into units of work:
+#
+#   ('pair',  clientId, subject) : all tokens of the client for the subject.
+#   ('token', accessTokenHash)   : a token without a subject (e.g. issued by
+#                                  the client credentials flow).
+#
+# Revoked tokens disappear from the list, so the same page is listed again
+# after its units are processed, and the offset advances only past tokens
+# which belong to units already processed or failed.
+#
+# When a state file is given, every processed unit is appended to it. A run
+# interrupted for any reason can be resumed by running again with the same
+# state file. Tokens revoked before the interruption are no longer listed,
+# so the run picks up where it stopped. A unit in the state file whose tokens
+# are listed again (e.g. tokens issued to the pair after it was revoked) is
+# revoked again; the others are counted as resumed.
+
+
+import json
+import logging
+import os
+from concurrent.futures                import ThreadPoolExecutor
+from authlete.dto.token_revoke_request import TokenRevokeRequest
+
+
+logger = logging.getLogger(__name__)
+
+
+class BulkRevoker(object):
+    def __init__(self, api, concurrency=8, pageSize=100, statePath=None, progress=None):
+        """Constructor
+
+        Args:
+            api (authlete.api.AuthleteApi)
+            concurrency (int) : The maximum number of concurrent revocations.
+            pageSize (int) : The number of tokens listed at once.
+            statePath (str) : The path of the state file for resumption.
+            progress (callable) : Called with the statistics after each page.
+        """
+
+        self._api         = api
+        self._concurrency = max(1, concurrency)
+        self._pageSize    = pageSize
+        self._statePath   = statePath
+        self._progress    = progress
+
+
+    def revoke(self, subject=None, clientIdentifier=None, dryRun=False):
+        """Revoke the tokens of the subject and/or the client.
+
+        Returns:
+            dict : Statistics. 'units' is the number of units processed,
+                   'revoked' the number of tokens revoked, 'failed' the
+                   number of units which failed and 'resumed' the number of
+                   units in the state file which had no tokens left.
+        """
+
+        if not subject and not clientIdentifier:
+            raise ValueError('A subject or a client identifier is required.')
+
+        # Units processed by a previous run. They are not skipped, since
+        # tokens listed now were issued or left after they were processed.
+        previous = self.__loadState()
+        done     = set()
+        failed   = set()
+        stats    = { 'units': 0, 'revoked': 0, 'failed': 0, 'resumed': 0, 'total': None }
+        offset   = 0
+
+        with ThreadPoolExecutor(max_workers=self._concurrency,
+                                thread_name_prefix='bulk-revoker') as executor:
+            while True:
+                res = self._api.getTokenList(clientIdentifier=clientIdentifier,
+                    subject=subject, start=offset, end=offset + self._pageSize)
+
+                tokens = res.accessTokens or []
+                if not tokens:
+                    break
+
+                if stats['total'] is None:
+                    stats['total'] = res.totalCount
+
+                units = []
+                for token in tokens:
+                    unit = _unit_of(token)
+                    if unit not in done and unit not in failed and unit not in units:
+                        units.append(unit)
+
+                if not units:
+                    # Every token here belongs to a unit processed in this run.
+                    offset += len(tokens)
+                    continue
+
+                if dryRun:
+                    for unit in units:
+                        done.add(unit)
+                        stats['units'] += 1
+                    offset += len(tokens)
+                else:
+                    for unit, count, error in executor.map(self.__revokeUnit, units):
+                        if error is None:
+                            done.add(unit)
+                            self.__saveState(unit, count)
+                            stats['units']   += 1
+                            stats['revoked'] += count
+                        else:
+                            failed.add(unit)
+                            stats['failed'] += 1
+
+                if self._progress is not None:
+                    self._progress(dict(stats))
+
+        stats['resumed'] = len(previous - done - failed)
+
+        return stats
+
+
+    def __revokeUnit(self, unit):
+        req = TokenRevokeRequest()
+
+        if unit[0] == 'pair':
+            req.clientIdentifier = unit[1]
+            req.subject          = unit[2]
+        else:
+            req.accessTokenIdentifier = unit[1]
+
+        try:
+            res = self._api.tokenRevoke(req)
+        except Exception as cause:
+            logger.warning("bulk_revoker: Failed to revoke %s.", unit, exc_info=True)
+            return unit, 0, cause
+
+        return unit, res.count or 0, None
+
+
+    def __loadState(self):
+        done = set()
+
+        if self._statePath is None or not os.path.exists(self._statePath):
+            return done
+
+        with open(self._statePath, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    done.add(tuple(json.loads(line)['unit']))
+
+        return done
+
+
+    def __saveState(self, unit, count):
+        if self._statePath is None:
+            return
+
+        line = json.dumps({ 'unit': unit, 'revoked': count }, separators=(',', ':')) + '\n'
+
+        # Written as soon as the unit is processed, so that an interruption
+        # loses nothing.
+        with open(self._statePath, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def _unit_of(token):
+    if token.subject:
+        return ('pair', str(token.clientId), token.subject)
+
+    # The hash of an access token is accepted as its identifier.
+    return ('token', token.accessTokenHash)
@@ -0,0 +1,368 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# An in-memory index of the clients registered in the Authlete service.
+#
+# The authorization endpoint asks the registry about the 'client_id' and the
+# 'redirect_uri' of an authorization request before calling Authlete's
+# /auth/authorization API, so that obviously invalid requests (no client_id,
+# an unknown client, a redirect URI which is not registered) are rejected
+# locally without an upstream call.
+#
+# The index is built from Authlete's /client/get/list API, page by page, and
+# is rebuilt in a background thread every CLIENT_REGISTRY_REFRESH seconds.
+# Entries of clients whose 'modifiedAt' has not changed are reused. A client
+# which is not in the index (e.g. registered after the last refresh) is
+# looked up with /client/get/{id} once; if it does not exist, that is
+# remembered for CLIENT_REGISTRY_NEGATIVE_TTL seconds, so repeated junk
+# requests with the same client ID don't reach Authlete.
+#
+# The registry never rejects a request when it does not know for sure: before
+# the first refresh succeeds, when Authlete fails, or for client IDs which
+# are entity IDs of OpenID Federation (clients registered automatically when
+# they make their first request). The index may be as old as the refresh
+# interval, so before a request is rejected because the client is locked or
+# the redirect URI is not registered, the client is fetched again with
+# /client/get/{id}. A fetched entry is trusted for CLIENT_REGISTRY_NEGATIVE_TTL
+# seconds.
+#
+# A client ID is put into the path of /client/get/{id} as is, so a client ID
+# which is not a number or a client ID alias (e.g. '../service/get') is
+# rejected before anything else. It never reaches Authlete nor the cache of
+# missing clients.
+
+
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+from collections                         import OrderedDict
+from django.conf                         import settings
+from authlete.api.authlete_api_exception import AuthleteApiException
+
+
+logger = logging.getLogger(__name__)
+
+
+# A client ID (digits) or a client ID alias (unreserved characters of RFC 3986
+# except that it cannot be only dots).
+CLIENT_ID_PATTERN = re.compile(r'(?!\.+\Z)[A-Za-z0-9._~-]{1,200}\Z')
+
+
+class RegisteredClient(object):
+    """Metadata of a client used by the authorization endpoint."""
+
+    __slots__ = ('clientId', 'clientIdAlias', 'modifiedAt', 'locked',
+                 'redirectUris', 'clientName', 'description', 'logoUri',
+                 'clientUri', 'policyUri', 'tosUri', 'fetchedAt')
+
+
+    def __init__(self, client):
+        self.clientId      = str(client.clientId)
+        self.clientIdAlias = client.clientIdAlias if client.clientIdAliasEnabled else None
+        self.modifiedAt    = client.modifiedAt
+        self.locked        = bool(client.locked)
+        self.redirectUris  = frozenset(client.redirectUris or ())
+        self.clientName    = client.clientName
+        self.description   = client.description
+        self.logoUri       = client.logoUri
+        self.clientUri     = client.clientUri
+        self.policyUri     = client.policyUri
+        self.tosUri        = client.tosUri
+        self.fetchedAt     = None
+
+
+class ClientRegistry(object):
+    # The value returned by lookup() for a client which does not exist.
+    # (None means that the registry does not know.)
+    NOT_FOUND = False
+
+
+    def __init__(self, api, refreshInterval=300, negativeTtl=60, pageSize=100, maxNegativeEntries=10000):
+        self._api                = api
+        self._refreshInterval    = refreshInterval
+        self._negativeTtl        = negativeTtl
+        self._pageSize           = pageSize
+        self._maxNegativeEntries = maxNegativeEntries
+        self._clients            = None
+        self._refreshedAt        = None
+        self._negative           = OrderedDict()
+        self._lock               = threading.Lock()
+        self._refreshing         = False
+
+
+    @property
+    def loaded(self):
+        return self._clients is not None
+
+
+    def refresh(self):
+        """Rebuild the index from Authlete's client list (synchronously)."""
+
+        current = self._clients or {}
+        clients = {}
+        start   = 0
+
+        while True:
+            res = self._api.getClientList(start=start, end=start + self._pageSize)
+
+            for client in res.clients or ():
+                entry = current.get(str(client.clientId))
+
+                # Reuse the entry if the client has not been modified.
+                if entry is None or entry.modifiedAt != client.modifiedAt:
+                    entry = RegisteredClient(client)
+
+                clients[entry.clientId] = entry
+                if entry.clientIdAlias:
+                    clients[entry.clientIdAlias] = entry
+
+            start += self._pageSize
+            if not res.clients or (res.totalCount or 0) <= start:
+                break
+
+        # Replace the index at once. Readers never see a half-built one.
+        self._clients     = clients
+        self._refreshedAt = time.monotonic()
+
+        with self._lock:
+            self._negative.clear()
+
+        logger.info("client_registry: Loaded %d client identifiers.", len(clients))
+
+
+    def lookup(self, clientId):
+        """Find the client.
+
+        Returns:
+            RegisteredClient : The client, NOT_FOUND if the client does not
+                               exist, or None if it cannot be determined.
+        """
+
+        if not is_valid_client_id(clientId):
+            return self.NOT_FOUND
+
+        self.__refreshIfStale()
+
+        clients = self._clients
+        if clients is None:
+            return None
+
+        entry = clients.get(clientId)
+        if entry is not None:
+            return entry
+
+        if self.__isKnownMissing(clientId):
+            return self.NOT_FOUND
+
+        return self.__fetch(clientId)
+
+
+    def check(self, clientId, redirectUri=None):
+        """Check the client ID and the redirect URI of an authorization request.
+
+        Returns:
+            str : The reason why the request is invalid, or None if the
+                  request may be valid.
+        """
+
+        if not clientId:
+            return "The authorization request does not contain 'client_id'."
+
+        # Entity IDs of OpenID Federation.
+        if clientId.startswith('https://'):
+            return None
+
+        if not is_valid_client_id(clientId):
+            return "The value of 'client_id' is malformed."
+
+        entry  = self.lookup(clientId)
+        reason = self.__reject(entry, clientId, redirectUri)
+
+        # The entry may have been unlocked or have got the redirect URI after
+        # the index was built.
+        if reason is not None and entry and not self.__isFresh(entry):
+            entry  = self.__fetch(clientId)
+            reason = self.__reject(entry, clientId, redirectUri)
+
+        return reason
+
+
+    def __reject(self, entry, clientId, redirectUri):
+        if entry is None:
+            return None
+
+        if entry is self.NOT_FOUND:
+            return "The client ID '{}' is not registered.".format(clientId)
+
+        if entry.locked:
+            return "The client '{}' is locked.".format(clientId)
+
+        if redirectUri and entry.redirectUris and \
+           redirectUri not in entry.redirectUris and not _is_loopback(redirectUri):
+            return "The redirect URI is not registered for the client '{}'.".format(clientId)
+
+        return None
+
+
+    def __isFresh(self, entry):
+        fetchedAt = entry.fetchedAt
+        return fetchedAt is not None and time.monotonic() < fetchedAt + self._negativeTtl
+
+
+    def __refreshIfStale(self):
+        if self._refreshInterval <= 0:
+            return
+
+        refreshedAt = self._refreshedAt
+        if refreshedAt is not None and time.monotonic() < refreshedAt + self._refreshInterval:
+            return
+
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        # Requests don't wait for the refresh.
+        threading.Thread(target=self.__backgroundRefresh,
+                         name='client-registry', daemon=True).start()
+
+
+    def __backgroundRefresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.warning("client_registry: Failed to load the client list.", exc_info=True)
+
+            # Retry after the interval instead of at the next request.
+            self._refreshedAt = time.monotonic()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+
+    def __isKnownMissing(self, clientId):
+        with self._lock:
+            expiresAt = self._negative.get(clientId)
+            if expiresAt is None:
+                return False
+
+            if expiresAt <= time.monotonic():
+                del self._negative[clientId]
+                return False
+
+            return True
+
+
+    def __fetch(self, clientId):
+        try:
+            client = self._api.getClient(clientId)
+        except AuthleteApiException as cause:
+            response = cause.response
+            if response is not None and response.status_code in (400, 404):
+                self.__rememberMissing(clientId)
+                return self.NOT_FOUND
+
+            logger.warning("client_registry: Failed to get the client '%s'.", clientId)
+            return None
+        except Exception:
+            logger.warning("client_registry: Failed to get the client '%s'.", clientId, exc_info=True)
+            return None
+
+        entry = RegisteredClient(client)
+        entry.fetchedAt = time.monotonic()
+
+        # Copy-on-write so that readers without the lock are not affected.
+        clients = dict(self._clients or {})
+        clients[entry.clientId] = entry
+        if entry.clientIdAlias:
+            clients[entry.clientIdAlias] = entry
+        clients[clientId] = entry
+        self._clients = clients
+
+        return entry
+
+
+    def __rememberMissing(self, clientId):
+        with self._lock:
+            self._negative[clientId] = time.monotonic() + self._negativeTtl
+            self._negative.move_to_end(clientId)
+
+            while len(self._negative) > self._maxNegativeEntries:
+                self._negative.popitem(last=False)
+
+
+    def _reset_after_fork(self):
+        # The refresh thread of the parent process does not exist in the
+        # child. The index itself is shared copy-on-write.
+        self._lock       = threading.Lock()
+        self._refreshing = False
+
+
+def is_valid_client_id(clientId):
+    """Check if the value can be a client ID or a client ID alias."""
+    return isinstance(clientId, str) and CLIENT_ID_PATTERN.match(clientId) is not None
+
+
+def _is_loopback(uri):
+    # RFC 8252, 7.3: Native apps may use any port of a loopback address.
+    return uri.startswith(('http://127.0.0.1', 'http://[::1]', 'http://localhost'))
+
+
+# ClientRegistry instances per AuthleteApi instance.
+_registries = weakref.WeakKeyDictionary()
+_registriesLock = threading.Lock()
+
+
+def get_client_registry(api):
+    """Get the ClientRegistry of the Authlete service, or None if disabled."""
+
+    interval = getattr(settings, 'CLIENT_REGISTRY_REFRESH', 0)
+    if not interval:
+        return None
+
+    registry = _registries.get(api)
+    if registry is not None:
+        return registry
+
+    with _registriesLock:
+        registry = _registries.get(api)
+        if registry is None:
+            registry = _registries[api] = ClientRegistry(api,
+                refreshInterval = interval,
+                negativeTtl     = getattr(settings, 'CLIENT_REGISTRY_NEGATIVE_TTL', 60))
+
+        return registry
+
+
+def discard_client_registry(api):
+    """Forget the ClientRegistry of the Authlete service (e.g. when the
+    tenant of the service is evicted)."""
+
+    with _registriesLock:
+        _registries.pop(api, None)
+
+
+def _reset_after_fork():
+    for registry in list(_registries.values()):
+        registry._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,268 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Adaptive concurrency limiting and load shedding.
+#
+# Each endpoint has its own limit on the number of requests processed at
+# the same time. The limit adapts to observed latency in AIMD style: it
+# grows by 1/limit when a request completes within the endpoint's latency
+# target and shrinks multiplicatively when a request is slow or fails.
+# In addition, all endpoints share the capacity of the process (typically
+# the number of worker threads).
+#
+# A request which cannot start immediately waits in a bounded queue. When
+# a slot becomes free, waiting requests are admitted in order of their
+# endpoint's priority, so that, for example, token requests are served
+# before authorization pages are rendered. A request which cannot start
+# before its queue deadline, or which finds the queue full, is shed with
+# "503 Service Unavailable" and a Retry-After header.
+
+
+import functools
+import itertools
+import logging
+import math
+import threading
+import time
+from django.conf import settings
+from django.http import HttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointLimit(object):
+    def __init__(self, name, priority=0, initial=8, min=1, max=64,
+                 queue=32, queue_timeout=1.0, latency_target=1.0, backoff=0.9):
+        self.name          = name
+        self.priority      = priority
+        self.limit         = float(initial)
+        self.minLimit      = float(min)
+        self.maxLimit      = float(max)
+        self.queueSize     = queue
+        self.queueTimeout  = queue_timeout
+        self.latencyTarget = latency_target
+        self.backoff       = backoff
+        self.inflight      = 0
+        self.queued        = 0
+        self.latency       = 0.0
+
+
+    def update(self, latency, failed):
+        # Exponentially weighted moving average of latency, used for Retry-After.
+        self.latency = latency if self.latency == 0.0 else (0.9 * self.latency + 0.1 * latency)
+
+        if failed or self.latencyTarget < latency:
+            # Multiplicative decrease.
+            self.limit = max(self.minLimit, self.limit * self.backoff)
+        else:
+            # Additive increase (about +1 per 'limit' successful requests).
+            self.limit = min(self.maxLimit, self.limit + 1.0 / self.limit)
+
+
+class ConcurrencyLimiter(object):
+    def __init__(self, endpoints, capacity=None):
+        """Constructor
+
+        Args:
+            endpoints (dict) : Endpoint name to keyword arguments of EndpointLimit.
+            capacity (int) : The number of requests the process can process at
+                the same time regardless of endpoints. None means unlimited.
+        """
+
+        self._endpoints = { name: EndpointLimit(name, **conf) for name, conf in endpoints.items() }
+        self._capacity  = capacity
+        self._inflight  = 0
+        self._waiters   = []
+        self._sequence  = itertools.count()
+        self._cond      = threading.Condition()
+
+
+    def acquire(self, name):
+        """Acquire a slot for a request to the endpoint.
+
+        Returns:
+            float : 0 if a slot has been acquired. Otherwise, the number of
+                    seconds the client should wait before retrying.
+        """
+
+        endpoint = self._endpoints.get(name)
+        if endpoint is None:
+            return 0
+
+        with self._cond:
+            if not self._waiters and self.__hasRoom(endpoint):
+                self.__admit(endpoint)
+                return 0
+
+            # The queue of the endpoint is full.
+            if endpoint.queued >= endpoint.queueSize:
+                return self.__retryAfter(endpoint)
+
+            # [sort key, endpoint, admitted]
+            waiter = [(-endpoint.priority, next(self._sequence)), endpoint, False]
+            self._waiters.append(waiter)
+            endpoint.queued += 1
+
+            # Other requests may be waiting. Let the priority order decide.
+            self.__dispatch()
+
+            deadline = time.monotonic() + endpoint.queueTimeout
+
+            try:
+                while not waiter[2]:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        # The request could not start before the deadline.
+                        self._waiters.remove(waiter)
+                        return self.__retryAfter(endpoint)
+
+                    self._cond.wait(remaining)
+            finally:
+                endpoint.queued -= 1
+
+            return 0
+
+
+    def release(self, name, latency, failed=False):
+        endpoint = self._endpoints.get(name)
+        if endpoint is None:
+            return
+
+        with self._cond:
+            endpoint.inflight -= 1
+            self._inflight    -= 1
+            endpoint.update(latency, failed)
+
+            # Hand the free slots over to waiting requests.
+            self.__dispatch()
+
+
+    def __hasRoom(self, endpoint):
+        if self._capacity is not None and self._capacity <= self._inflight:
+            return False
+
+        return endpoint.inflight < int(endpoint.limit)
+
+
+    def __admit(self, endpoint):
+        endpoint.inflight += 1
+        self._inflight    += 1
+
+
+    def __dispatch(self):
+        admitted = False
+
+        # Higher priority first, then first come, first served.
+        for waiter in sorted(self._waiters, key=lambda w: w[0]):
+            endpoint = waiter[1]
+
+            if self._capacity is not None and self._capacity <= self._inflight:
+                break
+
+            if not self.__hasRoom(endpoint):
+                continue
+
+            self.__admit(endpoint)
+            self._waiters.remove(waiter)
+            waiter[2] = True
+            admitted  = True
+
+        if admitted:
+            self._cond.notify_all()
+
+
+    def __retryAfter(self, endpoint):
+        return max(1.0, endpoint.latency * (endpoint.queued + 1) / max(1.0, endpoint.limit))
+
+
+# The limiter built from settings.CONCURRENCY_LIMITS.
+_limiter = None
+_limiterLock = threading.Lock()
+
+
+def get_concurrency_limiter():
+    """Get the process-wide concurrency limiter, or None if not configured."""
+
+    global _limiter
+
+    endpoints = getattr(settings, 'CONCURRENCY_LIMITS', None)
+    if not endpoints:
+        return None
+
+    capacity  = getattr(settings, 'CONCURRENCY_CAPACITY', None)
+    signature = (endpoints, capacity)
+
+    entry = _limiter
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+
+    # Build (or rebuild after a configuration change) the limiter.
+    with _limiterLock:
+        if _limiter is None or _limiter[0] != signature:
+            _limiter = (signature, ConcurrencyLimiter(endpoints, capacity))
+
+        return _limiter[1]
+
+
+def service_unavailable(retryAfter):
+    """503 Service Unavailable with a Retry-After header."""
+
+    content = '{"error":"temporarily_unavailable","error_description":"The server is too busy to process the request."}'
+
+    response = HttpResponse(
+        status=503, content=content,
+        content_type='application/json', charset='UTF-8')
+    response['Cache-Control'] = 'no-store'
+    response['Pragma']        = 'no-cache'
+    response['Retry-After']   = str(max(1, math.ceil(retryAfter)))
+
+    return response
+
+
+def concurrency_limited(name):
+    """Decorator to apply the concurrency limit of the endpoint to a view.
+
+    Args:
+        name (str) : The key of settings.CONCURRENCY_LIMITS.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            limiter = get_concurrency_limiter()
+            if limiter is None:
+                return view(request, *args, **kwargs)
+
+            wait = limiter.acquire(name)
+            if wait > 0:
+                logger.info("concurrency_limiter: A request to '%s' was shed.", name)
+                return service_unavailable(wait)
+
+            started = time.monotonic()
+            failed  = True
+
+            try:
+                response = view(request, *args, **kwargs)
+                failed   = (500 <= response.status_code)
+                return response
+            finally:
+                limiter.release(name, time.monotonic() - started, failed)
+
+        return wrapper
+
+    return decorator
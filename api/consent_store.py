@@ -0,0 +1,124 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Consents remembered per (user, client, scope set).
+#
+# When a user authorizes a client on the authorization page and checks
+# "Remember this decision", the scopes and claims of the request are stored
+# for settings.CONSENT_TTL seconds. A later request of the same client for
+# the same user is authorized without showing the page when a valid consent
+# covers all the requested scopes and claims and 'prompt' does not include
+# 'consent' or 'select_account'.
+#
+# Consents are revoked by staff users on the admin site, or with revoke().
+
+
+import hashlib
+from datetime     import timedelta
+from django.conf  import settings
+from django.utils import timezone
+from .models      import Consent
+
+
+class ConsentStore(object):
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+
+
+    def isEnabled(self):
+        return self.__ttl() > 0
+
+
+    def covers(self, user, clientId, scopes, claims):
+        """Check if a valid consent of the user to the client covers the
+        scopes and the claims.
+
+        Args:
+            user (django.contrib.auth.models.User)
+            clientId (int)
+            scopes (list) : list of str. The names of the requested scopes.
+            claims (list) : list of str. The names of the requested claims.
+
+        Returns:
+            bool
+        """
+
+        if not self.isEnabled() or clientId is None:
+            return False
+
+        scopes = set(scopes or ())
+        claims = set(claims or ())
+
+        consents = Consent.objects.filter(
+            user=user, client_id=clientId, revoked_at__isnull=True,
+            expires_at__gt=timezone.now()).values_list('scopes', 'claims')
+
+        for consentedScopes, consentedClaims in consents:
+            if scopes <= set(consentedScopes.split()) and claims <= set(consentedClaims.split()):
+                return True
+
+        return False
+
+
+    def remember(self, user, clientId, scopes, claims):
+        """Remember the consent of the user to the client for the scopes and
+        the claims. An existing consent for the same scopes is renewed."""
+
+        if not self.isEnabled() or clientId is None:
+            return
+
+        scopes = _join(scopes)
+        now    = timezone.now()
+
+        Consent.objects.update_or_create(
+            user=user, client_id=clientId, scope_hash=hashlib.sha256(scopes.encode('utf-8')).hexdigest(),
+            defaults={
+                'scopes':     scopes,
+                'claims':     _join(claims),
+                'granted_at': now,
+                'expires_at': now + timedelta(seconds=self.__ttl()),
+                'revoked_at': None,
+            })
+
+
+    def revoke(self, user=None, clientId=None):
+        """Revoke the valid consents of the user and/or to the client.
+
+        Returns:
+            int : The number of revoked consents.
+        """
+
+        consents = Consent.objects.filter(revoked_at__isnull=True)
+
+        if user is not None:
+            consents = consents.filter(user=user)
+
+        if clientId is not None:
+            consents = consents.filter(client_id=clientId)
+
+        return consents.update(revoked_at=timezone.now())
+
+
+    def __ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+
+        return getattr(settings, 'CONSENT_TTL', 0)
+
+
+def _join(names):
+    return ' '.join(sorted(set(names or ())))
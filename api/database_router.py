@@ -0,0 +1,181 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Routing of reads of users and claims to read replicas.
+#
+# ReplicaRouter sends reads of the models in settings.DATABASE_REPLICA_MODELS
+# (users and consents by default) to one of the databases in
+# settings.DATABASE_REPLICAS, and everything else, including all writes, to
+# 'default'. With no replicas, the router does nothing.
+#
+# A replica lags behind the primary. To let a user read what they have just
+# written, reads go to the primary for the rest of a request once a routed
+# model has been written (e.g. 'last_login' on login), and for
+# settings.DATABASE_REPLICA_STICKINESS seconds after that in the same session
+# (ReplicaStickinessMiddleware). Requests without a session (e.g. to the
+# token endpoint) are not sticky beyond the request.
+#
+# Claims cached by user_claim_cache.py may be read from a replica shortly
+# after a change. They are refreshed after USERINFO_CLAIMS_TTL at the latest.
+#
+# DatabaseMetrics counts the queries and the time spent per database alias.
+# It is installed on every connection (see apps.py) and shown to staff users
+# at /admin/database/.
+
+
+import contextvars
+import random
+import threading
+import time
+from django.conf            import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+
+_SESSION_KEY = '_replica_sticky_until'
+
+
+# The state of the request being processed: whether reads go to the primary.
+_primary = contextvars.ContextVar('database_router_primary', default=None)
+
+
+def _replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def _is_routed(model):
+    return model._meta.label_lower in getattr(settings, 'DATABASE_REPLICA_MODELS', ())
+
+
+class ReplicaRouter(object):
+    def db_for_read(self, model, **hints):
+        replicas = _replicas()
+        if not replicas or not _is_routed(model):
+            return None
+
+        state = _primary.get()
+        if state is not None and state['primary']:
+            return 'default'
+
+        return random.choice(replicas)
+
+
+    def db_for_write(self, model, **hints):
+        if not _replicas():
+            return None
+
+        # Read what has been written from the primary from now on.
+        state = _primary.get()
+        if state is not None and _is_routed(model):
+            state['primary'] = True
+            state['written'] = True
+
+        return 'default'
+
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # All the databases hold the same data.
+        return True if _replicas() else None
+
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the changes of the primary.
+        return False if db in _replicas() else None
+
+
+class ReplicaStickinessMiddleware(object):
+    sync_capable  = True
+    async_capable = False
+
+
+    def __init__(self, get_response):
+        if not _replicas():
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+
+    def __call__(self, request):
+        session = getattr(request, 'session', None)
+        now     = time.time()
+        sticky  = session is not None and session.get(_SESSION_KEY, 0) > now
+        state   = { 'primary': sticky, 'written': False }
+        token   = _primary.set(state)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            _primary.reset(token)
+
+        if state['written'] and session is not None:
+            session[_SESSION_KEY] = now + getattr(settings, 'DATABASE_REPLICA_STICKINESS', 5)
+
+        return response
+
+
+class DatabaseMetrics(object):
+    def __init__(self):
+        self._aliases = {}
+        self._lock    = threading.Lock()
+
+
+    def __call__(self, execute, sql, params, many, context):
+        # A wrapper of query execution (see connection.execute_wrapper()).
+        started = time.perf_counter()
+        ok      = False
+
+        try:
+            result = execute(sql, params, many, context)
+            ok     = True
+            return result
+        finally:
+            self.observe(context['connection'].alias, time.perf_counter() - started, ok)
+
+
+    def observe(self, alias, seconds, ok):
+        with self._lock:
+            entry = self._aliases.get(alias)
+            if entry is None:
+                entry = self._aliases[alias] = [ 0, 0, 0.0 ]
+
+            entry[0] += 1
+            entry[1] += 0 if ok else 1
+            entry[2] += seconds
+
+
+    def stats(self):
+        with self._lock:
+            return { alias: {
+                'queries': queries,
+                'errors':  errors,
+                'seconds': round(seconds, 6),
+                'mean_ms': round(seconds * 1000 / queries, 3) if queries else 0,
+            } for alias, (queries, errors, seconds) in self._aliases.items() }
+
+
+_metrics = DatabaseMetrics()
+
+
+def get_database_metrics():
+    """Get the DatabaseMetrics of the process."""
+    return _metrics
+
+
+def install_database_metrics(sender, connection, **kwargs):
+    """Receiver of the connection_created signal."""
+
+    if _metrics not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_metrics)
@@ -0,0 +1,173 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# The end-session endpoint of OpenID Connect RP-Initiated Logout.
+#
+# The user is logged out of this server, and the client applications which
+# the user has authorized are notified in the background (see
+# backchannel_logout.py). The response does not wait for them.
+#
+# Logging out without asking the user is allowed only when 'id_token_hint' is
+# a valid ID token of the user who is logged in. Otherwise, the user is asked
+# to confirm, and is logged out only when the confirmation form (protected
+# against CSRF) is posted. A link or an image pointing to this endpoint does
+# not log anybody out.
+#
+# The user agent is redirected to 'post_logout_redirect_uri' only when it is
+# registered for the client, i.e. listed in 'post_logout_redirect_uris' in the
+# custom metadata of the client in Authlete. The client is identified by
+# 'client_id' or by the audience of 'id_token_hint'. Otherwise, a page saying
+# that the user has logged out is shown.
+#
+# References:
+#
+#   OpenID Connect RP-Initiated Logout 1.0
+#     https://openid.net/specs/openid-connect-rpinitiated-1_0.html
+
+
+import json
+import logging
+from urllib.parse                        import urlencode
+from django.contrib.auth                 import logout
+from django.http                         import HttpResponseRedirect
+from django.middleware.csrf              import CsrfViewMiddleware
+from django.shortcuts                    import render
+from authlete.api.authlete_api_exception import AuthleteApiException
+from .audit_pipeline                     import audit
+from .backchannel_logout                 import get_backchannel_logout_notifier, get_logout_token_issuer
+from .base_endpoint                      import BaseEndpoint
+from .client_registry                    import is_valid_client_id
+
+
+logger = logging.getLogger(__name__)
+
+
+class EndSessionEndpoint(BaseEndpoint):
+    def __init__(self, api):
+        super().__init__(api)
+
+
+    def handle(self, request):
+        params = request.POST if request.method == 'POST' else request.GET
+
+        # The subject of the user who is logging out, if any.
+        user    = request.user
+        subject = str(user.id) if user.is_authenticated else None
+
+        # The claims of 'id_token_hint', if it is valid.
+        claims = self.__verifyIdTokenHint(params)
+
+        if subject is not None and not (claims and claims.get('sub') == subject):
+            # The logout has to be confirmed by the user.
+            if 'confirmed' not in request.POST:
+                return render(request, 'api/logout_confirmation.html', { 'params': self.__passedOn(params) })
+
+            # The confirmation form is exempted from CSRF protection with the
+            # view (RPs may post logout requests), so it is checked here.
+            rejection = CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {})
+            if rejection is not None:
+                return rejection
+
+        # Log the user out of this server.
+        logout(request)
+
+        if subject is not None:
+            audit('logout', request, 'success', user=subject)
+            self.__notifyClients(subject)
+
+        redirectUri = self.__postLogoutRedirectUri(params, claims)
+        if redirectUri is None:
+            return render(request, 'api/logged_out.html')
+
+        state = params.get('state')
+        if state:
+            redirectUri += ('&' if '?' in redirectUri else '?') + urlencode({ 'state': state })
+
+        return HttpResponseRedirect(redirectUri)
+
+
+    def __passedOn(self, params):
+        # The request parameters which the confirmation form posts again.
+        names = ('id_token_hint', 'client_id', 'post_logout_redirect_uri', 'state')
+
+        return [ (name, params[name]) for name in names if params.get(name) ]
+
+
+    def __notifyClients(self, subject):
+        notifier = get_backchannel_logout_notifier()
+        if notifier is None:
+            return
+
+        notifier.notify(subject, self.api)
+
+
+    def __verifyIdTokenHint(self, params):
+        idTokenHint = params.get('id_token_hint')
+        if not idTokenHint:
+            return None
+
+        claims = get_logout_token_issuer(self.api).verifyIdToken(idTokenHint)
+        if claims is None:
+            logger.debug("end_session_endpoint: 'id_token_hint' is invalid.")
+
+        return claims
+
+
+    def __postLogoutRedirectUri(self, params, claims):
+        redirectUri = params.get('post_logout_redirect_uri')
+        if not redirectUri:
+            return None
+
+        clientId = params.get('client_id')
+
+        if params.get('id_token_hint'):
+            if claims is None:
+                return None
+
+            audience = claims.get('aud')
+            if isinstance(audience, list):
+                audience = audience[0] if len(audience) == 1 else None
+
+            # 'client_id' must match the audience of the ID token.
+            if audience is None or (clientId and clientId != str(audience)):
+                return None
+
+            clientId = str(audience)
+
+        if not is_valid_client_id(clientId):
+            return None
+
+        if redirectUri not in self.__registeredUris(clientId):
+            logger.debug("end_session_endpoint: 'post_logout_redirect_uri' is not registered for the client '%s'.", clientId)
+            return None
+
+        return redirectUri
+
+
+    def __registeredUris(self, clientId):
+        try:
+            client = self.api.getClient(clientId)
+        except AuthleteApiException:
+            logger.debug("end_session_endpoint: Failed to get the client '%s'.", clientId, exc_info=True)
+            return ()
+
+        try:
+            metadata = json.loads(client.customMetadata or '{}')
+        except ValueError:
+            return ()
+
+        return metadata.get('post_logout_redirect_uris') or ()
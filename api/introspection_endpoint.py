@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2019 Authlete, Inc.
+# Copyright (C) 2019-2026 Authlete, Inc.
 #
 # Licensed under the Apache License, Version 2.0 (the "License");
 # you may not use this file except in compliance with the License.
@@ -15,10 +15,10 @@
 # License.
 
 
-from authlete.django.handler.introspection_request_handler import IntrospectionRequestHandler
-from authlete.django.web.basic_credentials                 import BasicCredentials
-from authlete.django.web.response_utility                  import ResponseUtility
-from .base_endpoint                                        import BaseEndpoint
+from authlete.django.web.basic_credentials import BasicCredentials
+from authlete.django.web.response_utility  import ResponseUtility
+from .base_endpoint                        import BaseEndpoint
+from .passthrough_request_handler          import PassthroughRequestHandler
 
 
 class IntrospectionEndpoint(BaseEndpoint):
@@ -47,7 +47,7 @@ class IntrospectionEndpoint(BaseEndpoint):
             return ResponseUtility.unauthorized('Basic realm="/api/introspection"')
 
         # Call Authlete's /api/auth/introspection/standard API.
-        return IntrospectionRequestHandler(self.api).handle(request)
+        return PassthroughRequestHandler(self.api).handleIntrospection(request)
 
 
     def __authenticate_api_caller(self, request):
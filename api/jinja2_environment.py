@@ -0,0 +1,37 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# The Jinja2 environment of the templates in api/jinja2/, used when
+# AUTHORIZATION_PAGE_TEMPLATE_ENGINE is 'jinja2' in settings.py. Jinja2
+# compiles a template to Python code once, and renders it faster than the
+# Django template language. 'static()' and 'url()' stand in for the tags of
+# the same names.
+
+
+from django.templatetags.static import static
+from django.urls                import reverse
+from jinja2                     import Environment
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url':    reverse,
+    })
+
+    return env
@@ -0,0 +1,93 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# A fast path for endpoints called by machines (the token endpoint, the
+# introspection endpoint and the revocation endpoint).
+#
+# Their callers are client applications and resource servers, which have no
+# cookies. The middleware for browsers (sessions, CSRF, authentication of
+# users, messages, clickjacking protection) does nothing useful for them but
+# still runs for every request and may touch the session or the database by
+# accident.
+#
+# MachineFastPathMiddleware, placed first in settings.MIDDLEWARE, sends
+# requests to the paths in settings.M2M_FAST_PATHS through a separate, short
+# chain of middleware (settings.M2M_MIDDLEWARE) which ends with the view.
+# Requests to other paths go through the rest of settings.MIDDLEWARE as
+# usual. request.session and request.user are not available to the views on
+# the fast path.
+
+
+from django.conf                     import settings
+from django.core.exceptions          import MiddlewareNotUsed
+from django.core.handlers.exception  import convert_exception_to_response
+from django.urls                     import resolve
+from django.utils.module_loading     import import_string
+
+
+class MachineFastPathMiddleware(object):
+    sync_capable  = True
+    async_capable = False
+
+
+    def __init__(self, get_response):
+        self.get_response       = get_response
+        self._paths             = frozenset(getattr(settings, 'M2M_FAST_PATHS', ()))
+        self._exceptionHandlers = []
+        self._fastResponse      = self.__buildChain()
+
+
+    def __call__(self, request):
+        if request.path_info in self._paths:
+            return self._fastResponse(request)
+
+        return self.get_response(request)
+
+
+    def __buildChain(self):
+        # Built in the same way as BaseHandler.load_middleware() does.
+        handler = convert_exception_to_response(self.__callView)
+
+        for path in reversed(getattr(settings, 'M2M_MIDDLEWARE', ())):
+            try:
+                middleware = import_string(path)(handler)
+            except MiddlewareNotUsed:
+                continue
+
+            if hasattr(middleware, 'process_exception'):
+                self._exceptionHandlers.append(middleware.process_exception)
+
+            handler = convert_exception_to_response(middleware)
+
+        return handler
+
+
+    def __callView(self, request):
+        match = resolve(request.path_info)
+        request.resolver_match = match
+
+        try:
+            return match.func(request, *match.args, **match.kwargs)
+        except Exception as exception:
+            # Let the middleware handle the exception (as Django does for
+            # process_exception()). The innermost one is asked first.
+            for process_exception in self._exceptionHandlers:
+                response = process_exception(request, exception)
+                if response is not None:
+                    return response
+
+            raise
@@ -0,0 +1,211 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# 'python manage.py replay_traffic RECORDING' reruns recorded traffic through
+# the endpoints of this authorization server offline and reports latency and
+# throughput per endpoint.
+#
+# RECORDING is a file written by AuthleteTrafficRecorder (see
+# AUTHLETE_RECORD_FILE in settings.py). For each recorded call of an Authlete
+# API which an endpoint calls first (e.g. /auth/token for the token
+# endpoint), a request is sent to the endpoint through the whole middleware
+# stack with django.test.Client. Authlete is replaced with
+# AuthleteTrafficReplayer serving the same recording, so follow-up calls
+# (e.g. /auth/token/issue) get recorded responses, too.
+#
+# Run it with the same recording on two builds and compare the reports
+# (--json produces a machine-readable one). Rate limits are disabled while
+# replaying because all requests come from the same process.
+
+
+import json
+import statistics
+import threading
+import time
+from concurrent.futures            import ThreadPoolExecutor
+from django.conf                   import settings
+from django.core.management.base   import BaseCommand, CommandError
+from django.test                   import Client
+from api.authlete_traffic_replayer import AuthleteTrafficReplayer
+
+
+# Authlete APIs which an endpoint calls first, and the endpoints.
+ENDPOINTS = {
+    ('POST', 'auth/authorization'):          ('authorization', 'GET',  '/api/authorization'),
+    ('POST', 'auth/token'):                  ('token',         'POST', '/api/token'),
+    ('POST', 'auth/introspection/standard'): ('introspection', 'POST', '/api/introspection'),
+    ('POST', 'auth/revocation'):             ('revocation',    'POST', '/api/revocation'),
+    ('POST', 'pushed_auth_req'):             ('par',           'POST', '/api/par'),
+    ('GET',  'service/configuration'):       ('configuration', 'GET',  '/.well-known/openid-configuration'),
+    ('GET',  'service/jwks/get'):            ('jwks',          'GET',  '/api/jwks'),
+}
+
+# Redacted credentials are replayed as is. The introspection endpoint of this
+# server accepts any Basic credentials except for 'nobody'.
+BASIC_CREDENTIALS = 'Basic cmVwbGF5OnJlcGxheQ=='
+
+
+class Command(BaseCommand):
+    help = 'Reruns recorded Authlete traffic through the endpoints and reports latency.'
+
+
+    def add_arguments(self, parser):
+        parser.add_argument('recording', help='A file written by AuthleteTrafficRecorder.')
+        parser.add_argument('--requests',    type=int,   help='Number of requests. (default: one per recorded call)')
+        parser.add_argument('--concurrency', type=int,   default=1,   help='Number of concurrent clients. (default: 1)')
+        parser.add_argument('--speed',       type=float, default=1.0, help='Multiplier of recorded Authlete latencies. 0 for no delay. (default: 1.0)')
+        parser.add_argument('--json', action='store_true', help='Print the report in JSON.')
+
+
+    def handle(self, *args, **options):
+        api = settings.AUTHLETE_API
+        if not hasattr(api, 'setReplayer'):
+            raise CommandError('AUTHLETE_API does not support replay.')
+
+        try:
+            replayer = AuthleteTrafficReplayer(options['recording'], options['speed'])
+        except (OSError, ValueError, KeyError) as cause:
+            raise CommandError('Failed to load the recording: {}'.format(cause))
+
+        requests = self.__build_requests(replayer)
+        if not requests:
+            raise CommandError('The recording contains no call which can be replayed.')
+
+        count = options['requests'] or len(requests)
+        requests = [ requests[i % len(requests)] for i in range(count) ]
+
+        settings.RATE_LIMITS = {}
+        api.setReplayer(replayer)
+
+        try:
+            results, elapsed = self.__run(requests, max(1, options['concurrency']))
+        finally:
+            api.setReplayer(None)
+
+        report = self.__report(results, elapsed)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.__print(report)
+
+
+    def __build_requests(self, replayer):
+        requests = []
+
+        # Requests are built in the recorded order, so the mix of endpoints
+        # follows the recording.
+        entries = sorted(
+            (e for key in replayer.apis if key in ENDPOINTS for e in replayer.entries(key)),
+            key=lambda e: e['t'])
+
+        for entry in entries:
+            name, method, path = ENDPOINTS[(entry['m'], entry['api'])]
+            params = (entry.get('req') or {}).get('parameters') or ''
+            requests.append((name, method, path, params))
+
+        return requests
+
+
+    def __run(self, requests, concurrency):
+        results = []
+        lock    = threading.Lock()
+        local   = threading.local()
+        host    = self.__host()
+
+        def send(request):
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST=host)
+
+            name, method, path, params = request
+            started = time.perf_counter()
+
+            if method == 'GET':
+                response = local.client.get(path + ('?' + params if params else ''))
+            else:
+                response = local.client.post(path, params,
+                    content_type='application/x-www-form-urlencoded',
+                    HTTP_AUTHORIZATION=BASIC_CREDENTIALS)
+
+            latency = time.perf_counter() - started
+
+            with lock:
+                results.append((name, response.status_code, latency))
+
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(send, requests))
+
+        return results, time.perf_counter() - started
+
+
+    def __host(self):
+        # A host which ALLOWED_HOSTS accepts.
+        for host in settings.ALLOWED_HOSTS:
+            if host != '*' and not host.startswith('.'):
+                return host
+
+        return 'localhost'
+
+
+    def __report(self, results, elapsed):
+        endpoints = {}
+
+        for name, status, latency in results:
+            endpoints.setdefault(name, []).append((status, latency))
+
+        report = {
+            'requests':   len(results),
+            'seconds':    round(elapsed, 3),
+            'throughput': round(len(results) / elapsed, 1) if elapsed > 0 else None,
+            'endpoints':  {},
+        }
+
+        for name, values in sorted(endpoints.items()):
+            latencies = sorted(v[1] * 1000 for v in values)
+
+            report['endpoints'][name] = {
+                'requests': len(values),
+                'errors':   sum(1 for v in values if v[0] >= 500),
+                'mean_ms':  round(statistics.fmean(latencies), 2),
+                'p50_ms':   round(_percentile(latencies, 50), 2),
+                'p90_ms':   round(_percentile(latencies, 90), 2),
+                'p99_ms':   round(_percentile(latencies, 99), 2),
+            }
+
+        return report
+
+
+    def __print(self, report):
+        self.stdout.write('{} requests in {} seconds ({} requests/second)'.format(
+            report['requests'], report['seconds'], report['throughput']))
+        self.stdout.write('')
+        self.stdout.write('{:<15} {:>8} {:>7} {:>9} {:>9} {:>9} {:>9}'.format(
+            'endpoint', 'requests', 'errors', 'mean ms', 'p50 ms', 'p90 ms', 'p99 ms'))
+
+        for name, e in report['endpoints'].items():
+            self.stdout.write('{:<15} {:>8} {:>7} {:>9} {:>9} {:>9} {:>9}'.format(
+                name, e['requests'], e['errors'],
+                e['mean_ms'], e['p50_ms'], e['p90_ms'], e['p99_ms']))
+
+
+def _percentile(values, percent):
+    # Nearest-rank percentile of sorted values.
+    index = max(0, min(len(values) - 1, int(round(percent / 100 * len(values) + 0.5)) - 1))
+
+    return values[index]
@@ -0,0 +1,130 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# 'python manage.py revoke_tokens --subject SUBJECT' revokes all the tokens
+# issued for the subject (user), and 'python manage.py revoke_tokens --client
+# CLIENT' all the tokens issued to the client. Both options can be combined.
+#
+# Tokens are revoked concurrently (see api/bulk_revoker.py). With --state, the
+# progress is saved into the file, and running the same command again with
+# the same file resumes an interrupted run.
+#
+# Tokens are revoked in the default Authlete service, in the service of the
+# tenant given by --tenant, or with --all-tenants in the default service and
+# the services of all the tenants (see api/tenant_registry.py). The progress
+# of a tenant is saved into the state file with '.NAME' appended.
+
+
+import time
+from django.conf                 import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.audit_pipeline          import audit
+from api.bulk_revoker            import BulkRevoker
+from api.tenant_registry         import get_tenant_registry, service_apis
+
+
+class Command(BaseCommand):
+    help = 'Revokes all the tokens of a subject and/or a client.'
+
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject',     help='The subject (user ID) whose tokens are revoked.')
+        parser.add_argument('--client',      help='The client ID (or alias) whose tokens are revoked.')
+        parser.add_argument('--concurrency', type=int, default=8,   help='Number of concurrent revocations. (default: 8)')
+        parser.add_argument('--page-size',   type=int, default=100, help='Number of tokens listed at once. (default: 100)')
+        parser.add_argument('--state',       help='A file to save the progress into and resume from.')
+        parser.add_argument('--tenant',      help='The tenant whose Authlete service issued the tokens.')
+        parser.add_argument('--all-tenants', action='store_true', help='Revoke the tokens in the default service and of all the tenants.')
+        parser.add_argument('--dry-run',     action='store_true', help='List the tokens without revoking them.')
+
+
+    def handle(self, *args, **options):
+        if not options['subject'] and not options['client']:
+            raise CommandError('--subject or --client is required.')
+
+        if options['tenant'] and options['all_tenants']:
+            raise CommandError('--tenant and --all-tenants cannot be combined.')
+
+        if options['tenant'] and options['tenant'] not in (getattr(settings, 'AUTHLETE_TENANTS', None) or {}):
+            raise CommandError("The tenant '{}' is not in AUTHLETE_TENANTS.".format(options['tenant']))
+
+        failed = 0
+
+        for tenant, api in self.__services(options):
+            try:
+                failed += self.__revoke(tenant, api, options)
+            except CommandError:
+                raise
+            except Exception as cause:
+                # The other services are still done.
+                self.stderr.write('{}Failed: {}'.format('[{}] '.format(tenant) if tenant else '', cause))
+                failed += 1
+
+        if failed:
+            raise CommandError('Some revocations failed. Run again to retry them.')
+
+
+    def __services(self, options):
+        if options['all_tenants']:
+            yield from service_apis()
+        elif options['tenant']:
+            registry = get_tenant_registry()
+            tenant   = registry.acquire(options['tenant'])
+            try:
+                yield tenant.name, tenant.api
+            finally:
+                registry.release(tenant)
+        else:
+            yield None, settings.AUTHLETE_API
+
+
+    def __revoke(self, tenant, api, options):
+        statePath = options['state']
+        if statePath and tenant:
+            statePath = '{}.{}'.format(statePath, tenant)
+
+        revoker = BulkRevoker(api,
+            concurrency = options['concurrency'],
+            pageSize    = options['page_size'],
+            statePath   = statePath,
+            progress    = self.__progress)
+
+        started = time.monotonic()
+
+        try:
+            stats = revoker.revoke(options['subject'], options['client'], options['dry_run'])
+        except KeyboardInterrupt:
+            raise CommandError('Interrupted.{}'.format(
+                ' Run again with the same --state to resume.' if options['state'] else ''))
+
+        if not options['dry_run']:
+            audit('bulk_revocation', None, 'failure' if stats['failed'] else 'success',
+                subject=options['subject'], client_id=options['client'], tenant=tenant,
+                revoked=stats['revoked'], failed=stats['failed'])
+
+        self.stdout.write('{}{} {} units ({} tokens) in {:.1f} seconds. {} failed, {} resumed from the state file.'.format(
+            '[{}] '.format(tenant) if tenant else '',
+            'Found' if options['dry_run'] else 'Revoked',
+            stats['units'], stats['revoked'], time.monotonic() - started,
+            stats['failed'], stats['resumed']))
+
+        return stats['failed']
+
+
+    def __progress(self, stats):
+        self.stdout.write('  {} units, {} tokens revoked, {} failed ({} tokens at the start)'.format(
+            stats['units'], stats['revoked'], stats['failed'], stats['total']))
@@ -0,0 +1,105 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# 'python manage.py serve' starts this authorization server for production
+# under Gunicorn (https://gunicorn.org/), a prefork WSGI server.
+#
+#   - The application is loaded and warmed up (see api/warmup.py) in the
+#     master process before workers are forked, so workers share the loaded
+#     modules and compiled templates copy-on-write.
+#   - Each worker warms up its own connections and caches before it starts
+#     accepting requests.
+#   - The number of workers and threads defaults to values derived from the
+#     number of CPUs available to the process.
+
+
+import os
+from django.conf                 import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def cpu_count():
+    # CPUs available to this process (which may be restricted by affinity,
+    # e.g. in a container), or all CPUs.
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+
+    return os.cpu_count() or 1
+
+
+class Command(BaseCommand):
+    help = 'Starts the authorization server for production (requires gunicorn).'
+
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind',    help='Address to listen on. (default: SERVER_BIND)')
+        parser.add_argument('--workers', type=int, help='Number of worker processes. (default: the number of CPUs)')
+        parser.add_argument('--threads', type=int, help='Number of threads per worker. (default: SERVER_THREADS)')
+        parser.add_argument('--timeout', type=int, help='Seconds before a silent worker is restarted. (default: 30)')
+        parser.add_argument('--no-warm-up', action='store_true', help='Skip the warm-up.')
+
+
+    def handle(self, *args, **options):
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            raise CommandError("gunicorn is required. Install it by 'pip install gunicorn'.")
+
+        if options['no_warm_up']:
+            settings.WARM_UP_ENABLED = False
+
+        cpus = cpu_count()
+
+        config = {
+            'bind':         options['bind']    or getattr(settings, 'SERVER_BIND', '0.0.0.0:8000'),
+            'workers':      options['workers'] or getattr(settings, 'SERVER_WORKERS', None) or cpus,
+            'threads':      options['threads'] or getattr(settings, 'SERVER_THREADS', None) or 4,
+            'timeout':      options['timeout'] or 30,
+            'worker_class': 'gthread',
+            'preload_app':  True,
+        }
+
+        self.stdout.write('Starting {} workers x {} threads on {} ({} CPUs).'.format(
+            config['workers'], config['threads'], config['bind'], cpus))
+
+        self.__application(BaseApplication, config).run()
+
+
+    def __application(self, BaseApplication, config):
+        class Application(BaseApplication):
+            def load_config(self):
+                for name, value in config.items():
+                    self.cfg.set(name, value)
+
+                # Each worker warms up before it accepts requests.
+                self.cfg.set('post_worker_init', _post_worker_init)
+
+
+            def load(self):
+                # With 'preload_app', this runs in the master process. The
+                # module warms up what the workers share when it is loaded.
+                from django_oauth_server.wsgi import application
+
+                return application
+
+        return Application()
+
+
+def _post_worker_init(worker):
+    from api.warmup import warm_up_worker
+
+    warm_up_worker()
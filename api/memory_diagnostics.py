@@ -0,0 +1,306 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Memory diagnostics of the process with tracemalloc.
+#
+# MemoryDiagnostics starts and stops tracemalloc, keeps named snapshots and
+# compares two of them grouped by file or by line, so that the code which
+# keeps allocating memory between two points in time can be found. It can
+# also count live objects by type, e.g. to see whether the number of handler
+# instances or boto3 clients grows.
+#
+# While tracemalloc is tracing, MemoryDiagnosticsMiddleware attributes
+# allocations to views: for each view, the number of requests, the memory
+# still allocated when the response is returned (net) and the peak above the
+# memory at the start of the request. Tracemalloc measures the whole process,
+# so a request is attributed only when no other request overlaps it; the
+# others are counted as overlapped.
+#
+# Tracing slows down every allocation and is off unless started. Everything
+# here is per process: in a server with several workers, the worker which
+# handles the request to the diagnostics page is the one examined. See
+# MEMORY_DIAGNOSTICS_ENABLED in settings.py and memory_diagnostics_view() in
+# admin.py.
+
+
+import gc
+import os
+import threading
+import tracemalloc
+from collections            import Counter, OrderedDict
+from django.conf            import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+
+# How allocations are grouped.
+GROUP_BY = ('filename', 'lineno', 'traceback')
+
+
+# Frames of tracemalloc itself and of the import system are not interesting.
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+
+class ViewStats(object):
+    __slots__ = ('requests', 'overlapped', 'net', 'peak', 'maxPeak')
+
+
+    def __init__(self):
+        self.requests   = 0
+        self.overlapped = 0
+        self.net        = 0
+        self.peak       = 0
+        self.maxPeak    = 0
+
+
+class MemoryDiagnostics(object):
+    def __init__(self, maxSnapshots=5):
+        self._maxSnapshots = maxSnapshots
+        self._snapshots    = OrderedDict()
+        self._views        = {}
+        self._inFlight     = 0
+        self._entered      = 0
+        self._lock         = threading.Lock()
+
+
+    def isTracing(self):
+        return tracemalloc.is_tracing()
+
+
+    def start(self, frames=1):
+        """Start tracing with tracebacks of `frames` frames."""
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+
+    def stop(self):
+        """Stop tracing. Snapshots taken so far are kept."""
+
+        tracemalloc.stop()
+
+
+    def reset(self):
+        """Forget the snapshots and the statistics of views."""
+
+        with self._lock:
+            self._snapshots.clear()
+            self._views.clear()
+
+
+    def takeSnapshot(self, name):
+        if not tracemalloc.is_tracing():
+            raise ValueError('tracemalloc is not tracing.')
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+        with self._lock:
+            self._snapshots.pop(name, None)
+            self._snapshots[name] = snapshot
+
+            while len(self._snapshots) > self._maxSnapshots:
+                self._snapshots.popitem(last=False)
+
+
+    def snapshotNames(self):
+        with self._lock:
+            return list(self._snapshots)
+
+
+    def top(self, name, groupBy='lineno', limit=25):
+        """The biggest allocations in the snapshot."""
+
+        snapshot = self.__snapshot(name)
+
+        return [ {
+            'location': _location(stat.traceback, groupBy),
+            'size':     stat.size,
+            'count':    stat.count,
+        } for stat in snapshot.statistics(groupBy)[:limit] ]
+
+
+    def diff(self, first, second, groupBy='lineno', limit=25):
+        """The biggest differences from the first snapshot to the second.
+
+        Args:
+            groupBy (str) : 'filename', 'lineno' or 'traceback'.
+        """
+
+        older = self.__snapshot(first)
+        newer = self.__snapshot(second)
+
+        return [ {
+            'location':   _location(stat.traceback, groupBy),
+            'size_diff':  stat.size_diff,
+            'size':       stat.size,
+            'count_diff': stat.count_diff,
+            'count':      stat.count,
+        } for stat in newer.compare_to(older, groupBy)[:limit] ]
+
+
+    def objectCounts(self, limit=25):
+        """The types with the most live objects tracked by the collector."""
+
+        counts = Counter(
+            '{}.{}'.format(type(obj).__module__, type(obj).__qualname__) for obj in gc.get_objects())
+
+        return counts.most_common(limit)
+
+
+    def status(self):
+        current, peak = tracemalloc.get_traced_memory()
+
+        return {
+            'pid':       os.getpid(),
+            'tracing':   tracemalloc.is_tracing(),
+            'frames':    tracemalloc.get_traceback_limit(),
+            'current':   current,
+            'peak':      peak,
+            'overhead':  tracemalloc.get_tracemalloc_memory(),
+            'snapshots': self.snapshotNames(),
+        }
+
+
+    def viewStats(self):
+        with self._lock:
+            return sorted(( {
+                'view':       view,
+                'requests':   stats.requests,
+                'overlapped': stats.overlapped,
+                'net':        stats.net,
+                'mean_peak':  stats.peak // max(stats.requests - stats.overlapped, 1),
+                'max_peak':   stats.maxPeak,
+            } for view, stats in self._views.items() ), key=lambda s: -s['net'])
+
+
+    def enter(self):
+        """Called at the start of a request.
+
+        Returns:
+            tuple : The memory in use and a token to pass to leave().
+        """
+
+        with self._lock:
+            self._inFlight += 1
+            self._entered  += 1
+            alone = self._inFlight == 1
+            token = self._entered if alone else None
+
+        # The peak is shared by the process. It is reset only when this
+        # request is the only one.
+        if alone:
+            tracemalloc.reset_peak()
+
+        return tracemalloc.get_traced_memory()[0], token
+
+
+    def leave(self, view, started, token):
+        """Called at the end of a request."""
+
+        current, peak = tracemalloc.get_traced_memory()
+
+        with self._lock:
+            self._inFlight -= 1
+
+            # Another request started after this one if the count of
+            # requests changed.
+            overlapped = token != self._entered or self._inFlight > 0
+
+            # Tracing was stopped during the request.
+            if not tracemalloc.is_tracing():
+                return
+
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = ViewStats()
+
+            stats.requests += 1
+
+            if overlapped:
+                stats.overlapped += 1
+                return
+
+            stats.net    += current - started
+            stats.peak   += peak - started
+            stats.maxPeak = max(stats.maxPeak, peak - started)
+
+
+    def __snapshot(self, name):
+        with self._lock:
+            if name not in self._snapshots:
+                raise KeyError('No snapshot named {}.'.format(name))
+
+            return self._snapshots[name]
+
+
+def _location(traceback, groupBy):
+    frame = traceback[0]
+
+    if groupBy == 'filename':
+        return frame.filename
+
+    if groupBy == 'traceback':
+        return ' <- '.join('{}:{}'.format(f.filename, f.lineno) for f in traceback)
+
+    return '{}:{}'.format(frame.filename, frame.lineno)
+
+
+_diagnostics = MemoryDiagnostics()
+
+
+def get_memory_diagnostics():
+    """Get the MemoryDiagnostics of the process."""
+    return _diagnostics
+
+
+class MemoryDiagnosticsMiddleware(object):
+    sync_capable  = True
+    async_capable = False
+
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'MEMORY_DIAGNOSTICS_ENABLED', False):
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self._diagnostics = get_memory_diagnostics()
+
+
+    def __call__(self, request):
+        if not tracemalloc.is_tracing():
+            return self.get_response(request)
+
+        started, token = self._diagnostics.enter()
+
+        try:
+            return self.get_response(request)
+        finally:
+            self._diagnostics.leave(_view_name(request), started, token)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '(unresolved)'
+
+    func = match.func
+
+    return '{}.{}'.format(func.__module__, getattr(func, '__qualname__', func.__class__.__name__))
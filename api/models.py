@@ -1,3 +1,31 @@
-from django.db import models
+from django.conf import settings
+from django.db   import models
 
-# Create your models here.
+
+# The consent of a user to a client for a set of scopes and claims. While it
+# is valid, the authorization page is skipped for requests of the client
+# which need no more than the scopes and claims. See consent_store.py.
+class Consent(models.Model):
+    user       = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='consents')
+    client_id  = models.BigIntegerField()
+
+    # SHA-256 of 'scopes', which may be too long to be a part of an index.
+    scope_hash = models.CharField(max_length=64)
+
+    # Space-separated, sorted names.
+    scopes     = models.TextField(blank=True)
+    claims     = models.TextField(blank=True)
+
+    granted_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id', 'scope_hash'], name='unique_consent'),
+        ]
+
+
+    def __str__(self):
+        return '{} -> {} ({})'.format(self.user_id, self.client_id, self.scopes)
@@ -0,0 +1,101 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Rendered fragments of the authorization page which are the same for all
+# users, i.e. the part about the client (the name, the logo, the description
+# and the links).
+#
+# A fragment is keyed by the template engine, the template, the client ID and
+# the version of the client metadata. The version is the metadata shown in
+# the fragment itself (AuthorizationPageModel.clientMetadata), so a client
+# updated in Authlete, or a name localized for 'ui_locales', gets a new entry
+# at once. Stale entries are dropped as the least recently used ones when
+# there are more than AUTHORIZATION_PAGE_FRAGMENT_CACHE_SIZE.
+
+
+import threading
+from collections             import OrderedDict
+from django.conf             import settings
+from django.template.loader  import get_template
+from django.utils.safestring import mark_safe
+
+
+class PageFragmentCache(object):
+    def __init__(self, maxEntries=None):
+        self._maxEntries = maxEntries
+        self._entries    = OrderedDict()
+        self._lock       = threading.Lock()
+
+
+    @property
+    def maxEntries(self):
+        if self._maxEntries is not None:
+            return self._maxEntries
+
+        return getattr(settings, 'AUTHORIZATION_PAGE_FRAGMENT_CACHE_SIZE', 0)
+
+
+    def render(self, templateName, model, using=None):
+        """Render the client fragment of the page, or get the cached one.
+
+        Args:
+            templateName (str) : The template of the fragment.
+            model (AuthorizationPageModel) : The model of the page.
+            using (str) : The alias of the template engine.
+
+        Returns:
+            django.utils.safestring.SafeString
+        """
+
+        maxEntries = self.maxEntries
+        if maxEntries <= 0:
+            return self.__render(templateName, model, using)
+
+        key = (using, templateName, model.clientId, model.clientMetadata)
+
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is not None:
+                self._entries.move_to_end(key)
+                return fragment
+
+        fragment = self.__render(templateName, model, using)
+
+        with self._lock:
+            self._entries[key] = fragment
+
+            while len(self._entries) > maxEntries:
+                self._entries.popitem(last=False)
+
+        return fragment
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+    def __render(self, templateName, model, using):
+        return mark_safe(get_template(templateName, using=using).render({ 'model': model }))
+
+
+_cache = PageFragmentCache()
+
+
+def get_page_fragment_cache():
+    """Get the PageFragmentCache shared in the process."""
+    return _cache
@@ -0,0 +1,326 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# A fast path for the token endpoint, the introspection endpoint, the
+# revocation endpoint and the pushed authorization request endpoint, which
+# are the hottest endpoints.
+#
+# The handlers of authlete-python-django build a request DTO (e.g.
+# TokenRequest), serialize it into JSON, send it to Authlete, and convert
+# the JSON response into a response DTO (e.g. TokenResponse, which has
+# dozens of attributes) only to read 'action' and 'responseContent'.
+#
+# This handler instead puts the request body into a JSON request for
+# Authlete as is, and puts 'responseContent' of the parsed response into
+# the HTTP response as is. No DTOs are built except for rare flows which
+# need them (e.g. the token exchange flow given to the SPI).
+#
+# The fast path requires an AuthleteApi which has postServiceApi() (see
+# pooled_authlete_api.py) and is enabled by settings.AUTHLETE_PASSTHROUGH.
+# Otherwise, the handlers of authlete-python-django are used.
+
+
+import json
+from urllib.parse                                          import parse_qsl
+from django.conf                                           import settings
+from authlete.django.handler.introspection_request_handler import IntrospectionRequestHandler
+from authlete.django.handler.revocation_request_handler    import RevocationRequestHandler
+from authlete.django.handler.token_request_base_handler    import TokenRequestBaseHandler
+from authlete.django.handler.token_request_handler         import TokenRequestHandler
+from authlete.django.web.request_utility                   import RequestUtility
+from authlete.django.web.response_utility                  import ResponseUtility
+from authlete.dto.pushed_auth_req_action                   import PushedAuthReqAction
+from authlete.dto.pushed_auth_req_request                  import PushedAuthReqRequest
+from authlete.dto.revocation_action                        import RevocationAction
+from authlete.dto.standard_introspection_action            import StandardIntrospectionAction
+from authlete.dto.token_action                             import TokenAction
+from authlete.dto.token_fail_reason                        import TokenFailReason
+from authlete.dto.token_response                           import TokenResponse
+from .audit_pipeline                                       import audit
+from .token_reuse_cache                                    import get_token_reuse_cache
+
+
+class PassthroughRequestHandler(TokenRequestBaseHandler):
+    def __init__(self, api, spi=None):
+        super().__init__(api)
+        self._spi = spi
+
+
+    @classmethod
+    def isSupported(cls, api):
+        return getattr(settings, 'AUTHLETE_PASSTHROUGH', True) and \
+               hasattr(api, 'postServiceApi')
+
+
+    def handleToken(self, request):
+        # A client credentials request identical to a recent one gets the
+        # same token again. See token_reuse_cache.py.
+        cache    = get_token_reuse_cache()
+        reusable = cache.reusable(request)
+
+        if reusable is not None:
+            content = cache.get(reusable)
+            if content is not None:
+                audit('token', request, 'reused', client_id=reusable.clientId,
+                    grant_type='CLIENT_CREDENTIALS')
+                return ResponseUtility.okJson(content)
+
+        response = self.__handleToken(request)
+
+        if reusable is not None and response.status_code == 200:
+            cache.put(reusable, response.content)
+
+        return response
+
+
+    def __handleToken(self, request):
+        if not self.isSupported(self.api):
+            response = TokenRequestHandler(self.api, self._spi).handle(request)
+            audit('token', request, self.__outcome(response))
+            return response
+
+        credentials = RequestUtility.extractBasicCredentials(request)
+
+        # Call Authlete's /auth/token API.
+        res = self.__call('auth/token', {
+            'parameters':        self.__body(request),
+            'clientId':          credentials.userId,
+            'clientSecret':      credentials.password,
+            'clientCertificate': RequestUtility.extractClientCert(request),
+            'dpop':              request.headers.get('DPoP'),
+            'properties':        self.__properties(),
+        })
+
+        action  = self.__action(TokenAction, res)
+        content = res.get('responseContent')
+        headers = { 'DPoP-Nonce': res['dpopNonce'] } if res.get('dpopNonce') else None
+
+        audit('token', request, action.name.lower() if action else 'unknown',
+            client_id=res.get('clientId'), subject=res.get('subject'),
+            grant_type=res.get('grantType'))
+
+        if action == TokenAction.INVALID_CLIENT:
+            # 401 Unauthorized.
+            return ResponseUtility.unauthorized('Basic realm="token"', content, headers)
+        elif action == TokenAction.INTERNAL_SERVER_ERROR:
+            # 500 Internal Server Error
+            return ResponseUtility.internalServerError(content, headers)
+        elif action == TokenAction.BAD_REQUEST:
+            # 400 Bad Request
+            return ResponseUtility.badRequest(content, headers)
+        elif action == TokenAction.PASSWORD:
+            # Resource Owner Password Credentials flow.
+            return self.__handlePassword(res, headers)
+        elif action == TokenAction.OK:
+            # 200 OK
+            return ResponseUtility.okJson(content, headers)
+        elif action == TokenAction.TOKEN_EXCHANGE:
+            # Token exchange (RFC 8693). The SPI takes a TokenResponse.
+            return self.__useOrUnsupported(self._spi.tokenExchange(TokenResponse(res)))
+        elif action == TokenAction.JWT_BEARER:
+            # JWT authorization grant (RFC 7523). The SPI takes a TokenResponse.
+            return self.__useOrUnsupported(self._spi.jwtBearer(TokenResponse(res)))
+        elif action == TokenAction.ID_TOKEN_REISSUABLE:
+            # No ID token is reissued. Same as authlete-python-django.
+            return ResponseUtility.okJson(content, headers)
+        else:
+            return self.unknownAction('/auth/token')
+
+
+    def handleIntrospection(self, request):
+        if not self.isSupported(self.api):
+            return IntrospectionRequestHandler(self.api).handle(request)
+
+        # Call Authlete's /auth/introspection/standard API.
+        res = self.__call('auth/introspection/standard', {
+            'parameters': self.__body(request),
+        })
+
+        action  = self.__action(StandardIntrospectionAction, res)
+        content = res.get('responseContent')
+
+        if action == StandardIntrospectionAction.INTERNAL_SERVER_ERROR:
+            # 500 Internal Server Error
+            return ResponseUtility.internalServerError(content)
+        elif action == StandardIntrospectionAction.BAD_REQUEST:
+            # 400 Bad Request
+            return ResponseUtility.badRequest(content)
+        elif action == StandardIntrospectionAction.OK:
+            # 200 OK
+            return ResponseUtility.okJson(content)
+        else:
+            return self.unknownAction('/auth/introspection/standard')
+
+
+    def handleRevocation(self, request):
+        response = self.__handleRevocation(request)
+
+        # Tokens of the client kept for reuse may include the revoked one.
+        # Only a request by the client authenticated by Authlete succeeds.
+        if response.status_code == 200:
+            get_token_reuse_cache().invalidate(self.__clientId(request))
+
+        return response
+
+
+    def __handleRevocation(self, request):
+        if not self.isSupported(self.api):
+            response = RevocationRequestHandler(self.api).handle(request)
+            audit('revocation', request, self.__outcome(response))
+            return response
+
+        credentials = RequestUtility.extractBasicCredentials(request)
+
+        # Call Authlete's /auth/revocation API.
+        res = self.__call('auth/revocation', {
+            'parameters':   self.__body(request),
+            'clientId':     credentials.userId,
+            'clientSecret': credentials.password,
+        })
+
+        action  = self.__action(RevocationAction, res)
+        content = res.get('responseContent')
+
+        audit('revocation', request, action.name.lower() if action else 'unknown',
+            client_id=credentials.userId)
+
+        if action == RevocationAction.INVALID_CLIENT:
+            # 401 Unauthorized.
+            return ResponseUtility.unauthorized('Basic realm="revocation"', content)
+        elif action == RevocationAction.INTERNAL_SERVER_ERROR:
+            # 500 Internal Server Error
+            return ResponseUtility.internalServerError(content)
+        elif action == RevocationAction.BAD_REQUEST:
+            # 400 Bad Request
+            return ResponseUtility.badRequest(content)
+        elif action == RevocationAction.OK:
+            # 200 OK
+            return ResponseUtility.okJavaScript(content)
+        else:
+            return self.unknownAction('/auth/revocation')
+
+
+    def handlePushedAuthorization(self, request):
+        credentials = RequestUtility.extractBasicCredentials(request)
+        parameters  = {
+            'parameters':        self.__body(request),
+            'clientId':          credentials.userId,
+            'clientSecret':      credentials.password,
+            'clientCertificate': RequestUtility.extractClientCert(request),
+            'dpop':              request.headers.get('DPoP'),
+        }
+
+        if self.isSupported(self.api):
+            # Call Authlete's /pushed_auth_req API.
+            res     = self.__call('pushed_auth_req', parameters)
+            action  = self.__action(PushedAuthReqAction, res)
+            content = res.get('responseContent')
+            nonce   = res.get('dpopNonce')
+        else:
+            res     = self.api.pushAuthorizationRequest(PushedAuthReqRequest(
+                          { k: v for k, v in parameters.items() if v is not None }))
+            action  = res.action
+            content = res.responseContent
+            nonce   = res.dpopNonce
+
+        headers = { 'DPoP-Nonce': nonce } if nonce else None
+
+        if action == PushedAuthReqAction.CREATED:
+            # 201 Created
+            return ResponseUtility.created(content, headers)
+        elif action == PushedAuthReqAction.BAD_REQUEST:
+            # 400 Bad Request
+            return ResponseUtility.badRequest(content, headers)
+        elif action == PushedAuthReqAction.UNAUTHORIZED:
+            # 401 Unauthorized
+            return ResponseUtility.unauthorized('Basic realm="par"', content, headers)
+        elif action == PushedAuthReqAction.FORBIDDEN:
+            # 403 Forbidden
+            return ResponseUtility.forbidden(content, headers)
+        elif action == PushedAuthReqAction.PAYLOAD_TOO_LARGE:
+            # 413 Payload Too Large
+            return ResponseUtility.tooLarge(content, headers)
+        elif action == PushedAuthReqAction.INTERNAL_SERVER_ERROR:
+            # 500 Internal Server Error
+            return ResponseUtility.internalServerError(content, headers)
+        else:
+            return self.unknownAction('/pushed_auth_req')
+
+
+    def __body(self, request):
+        # Authlete regards None as a caller's error and an empty string as a
+        # client application's error.
+        return RequestUtility.extractRequestBody(request) or ''
+
+
+    def __clientId(self, request):
+        credentials = RequestUtility.extractBasicCredentials(request)
+        if credentials.userId is not None:
+            return credentials.userId
+
+        return dict(parse_qsl(self.__body(request))).get('client_id')
+
+
+    def __properties(self):
+        properties = self._spi.getProperties() if self._spi is not None else None
+        if properties is None:
+            return None
+
+        return [ vars(p) for p in properties ]
+
+
+    def __call(self, api, request):
+        # Attributes whose value is None are omitted. The result is ASCII
+        # because json.dumps() escapes non-ASCII characters.
+        data = json.dumps(
+            { k: v for k, v in request.items() if v is not None },
+            separators=(',', ':')).encode('ascii')
+
+        return self.api.postServiceApi(api, data)
+
+
+    def __action(self, enum, res):
+        try:
+            return enum[res.get('action')]
+        except KeyError:
+            return None
+
+
+    def __outcome(self, response):
+        return 'success' if response.status_code < 400 else 'failure'
+
+
+    def __handlePassword(self, res, headers):
+        ticket = res.get('ticket')
+
+        # Validate the credentials of the resource owner.
+        subject = self._spi.authenticateUser(res.get('username'), res.get('password'))
+
+        if subject is None:
+            # The credentials are invalid. Nothing is issued.
+            return self.tokenFail(
+                ticket, TokenFailReason.INVALID_RESOURCE_OWNER_CREDENTIALS, headers)
+
+        # Issue tokens.
+        return self.tokenIssue(ticket, subject, self._spi.getProperties(), headers)
+
+
+    def __useOrUnsupported(self, response):
+        if response is not None:
+            return response
+
+        return ResponseUtility.badRequest('{"error":"unsupported_grant_type"}')
@@ -0,0 +1,311 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# AuthleteApiImpl sends every request with `requests.request()`, which
+# creates a new session, and therefore a new TCP/TLS connection, for each
+# Authlete API call. This subclass sends requests through a session owned by
+# the process so that connections to Authlete are kept alive and reused.
+#
+# The session is dropped in child processes after fork() so that worker
+# processes of a prefork server never share sockets with the master.
+#
+# In addition, postServiceApi() calls an Authlete service API with a JSON
+# request body prepared by the caller and returns the response body as a
+# dictionary, skipping the conversion from and to DTOs. It is used by the
+# fast path of the hottest endpoints (see passthrough_request_handler.py).
+#
+# The timeout of each call is the smaller of the configured timeouts and the
+# time left before the deadline of the request, optionally tightened from the
+# observed latency of the API (see upstream_latency.py).
+#
+# When several base URLs of Authlete are set (setEndpointSelector()), each
+# call goes to the best healthy one and fails over to the next one if the
+# call fails before reaching Authlete, as long as the deadline of the request
+# allows (see authlete_endpoint_selector.py). A call which may have been
+# processed (e.g. a POST answered with 502 or 504) is not sent again.
+#
+# Optionally, the traffic to Authlete can be recorded (setRecorder()) or
+# served from a recording instead of Authlete (setReplayer()). See
+# authlete_traffic_recorder.py and authlete_traffic_replayer.py.
+
+
+import json
+import os
+import threading
+import time
+import weakref
+import requests
+from requests.adapters                   import HTTPAdapter
+from urllib3.exceptions                  import NewConnectionError
+from authlete.api.authlete_api_exception import AuthleteApiException
+from authlete.api.authlete_api_impl      import AuthleteApiImpl
+from .upstream_latency                   import observe_upstream, upstream_timeout
+
+
+class PooledAuthleteApi(AuthleteApiImpl):
+    def __init__(self, cnf, poolSize=32):
+        super().__init__(cnf)
+        self._poolSize = poolSize
+        self._session  = None
+        self._lock     = threading.Lock()
+        self._recorder = None
+        self._replayer = None
+        self._selector = None
+
+        # Don't inherit connections of the parent process. Instances are
+        # tracked in one set rather than with a fork hook each, as instances
+        # of tenants come and go (see tenant_registry.py).
+        _instances.add(self)
+
+
+    def setRecorder(self, recorder):
+        """Record requests and responses with the AuthleteTrafficRecorder."""
+        self._recorder = recorder
+
+
+    def getRecorder(self):
+        return self._recorder
+
+
+    def setReplayer(self, replayer):
+        """Serve responses from the AuthleteTrafficReplayer instead of Authlete."""
+        self._replayer = replayer
+
+
+    def getReplayer(self):
+        return self._replayer
+
+
+    def setEndpointSelector(self, selector):
+        """Spread calls over the base URLs of the AuthleteEndpointSelector."""
+        self._selector = selector
+
+
+    def getEndpointSelector(self):
+        return self._selector
+
+
+    def getApiName(self, url):
+        """Get the path of the Authlete API after the prefix, e.g. 'auth/token'."""
+
+        path = url[len(self._baseUrl):]
+
+        for prefix in (self._apiPrefix + '/', '/api/'):
+            if path.startswith(prefix):
+                return path[len(prefix):]
+
+        return path.lstrip('/')
+
+
+    def resetSession(self):
+        # Forget the session without closing it. This is used in a child
+        # process where the sockets belong to the parent process.
+        self._session = None
+        self._lock    = threading.Lock()
+
+
+    def close(self):
+        """Close the connections kept for this instance."""
+
+        with self._lock:
+            session, self._session = self._session, None
+
+        if session is not None:
+            session.close()
+
+
+    def __getSession(self):
+        session = self._session
+        if session is not None:
+            return session
+
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._poolSize)
+                session.mount('https://', adapter)
+                session.mount('http://',  adapter)
+                self._session = session
+
+            return self._session
+
+
+    def getTimeout(self, api=None):
+        """Get the timeout (connect, read) used for a call of an Authlete API.
+
+        Args:
+            api (str) : The path of the API after the prefix, e.g. 'auth/token'.
+
+        Raises:
+            api.request_deadline.DeadlineExceeded
+        """
+
+        read = upstream_timeout('authlete:' + (api or ''), self._settings.readTimeout)
+
+        return (min(self._settings.connectionTimeout, read), read)
+
+
+    def postServiceApi(self, api, data):
+        """Call an Authlete service API with a prepared request body.
+
+        Args:
+            api (str) : The path of the API after the prefix, e.g. 'auth/token'.
+            data (bytes) : The request body in JSON.
+
+        Returns:
+            dict : The response body.
+
+        Raises:
+            authlete.api.AuthleteApiException
+        """
+
+        path = '{}/{}'.format(self._apiPrefix, api)
+        url  = self._baseUrl + path
+
+        # Basic authentication is not used when an access token is available.
+        credentials = None if self._accessToken is not None else self._serviceCredentials
+
+        try:
+            response = self._AuthleteApiImpl__sendRequest(
+                'POST', url, None, data, credentials, self._accessToken)
+        except Exception as cause:
+            raise AuthleteApiException(
+                url, None, data, "API call to " + path + " failed.", cause)
+
+        # The body is parsed from bytes. It is not decoded into a string first.
+        body = response.content
+
+        if response.status_code < 200 or 300 <= response.status_code:
+            raise AuthleteApiException(url, None, data,
+                self.__extractResultMessage(body) or
+                "{} API returned {}".format(path, response.status_code), None, response)
+
+        return json.loads(body)
+
+
+    def __extractResultMessage(self, body):
+        try:
+            return json.loads(body)['resultMessage']
+        except Exception:
+            return None
+
+
+    # Overrides the private method AuthleteApiImpl.__sendRequest() (whose
+    # mangled name is _AuthleteApiImpl__sendRequest) which is the only place
+    # where AuthleteApiImpl performs HTTP communication.
+    def _AuthleteApiImpl__sendRequest(self, method, url, params, data, credentials, accessToken):
+        # headers
+        headers = {
+            "Accept":       "application/json",
+            "Content-Type": "application/json"
+        }
+
+        # If an access token is provided.
+        if accessToken is not None:
+            headers["Authorization"] = "Bearer {}".format(accessToken)
+
+        # If responses are served from a recording.
+        if self._replayer is not None:
+            return self._replayer.respond(method, self.getApiName(url))
+
+        api = self.getApiName(url)
+
+        if self._selector is None:
+            return self.__send(method, url, api, params, data, headers, credentials)
+
+        # The URL is built with the base URL in authlete.ini. Send the request
+        # to the best endpoint instead, and fail over to the next ones.
+        path       = url[len(self._baseUrl):]
+        candidates = self._selector.candidates()
+
+        for index, baseUrl in enumerate(candidates):
+            last    = index == len(candidates) - 1
+            started = time.monotonic()
+
+            try:
+                response = self.__send(method, baseUrl + path, api, params, data, headers, credentials)
+            except requests.RequestException as exception:
+                self._selector.report(baseUrl, None, False)
+
+                if last or not _isRetriable(method, exception):
+                    raise
+
+                continue
+
+            if response.status_code in (502, 503, 504):
+                self._selector.report(baseUrl, None, False)
+
+                if not last and _isRetriableStatus(method, response.status_code):
+                    continue
+            else:
+                self._selector.report(baseUrl, time.monotonic() - started, True)
+
+            return response
+
+
+    def __send(self, method, url, api, params, data, headers, credentials):
+        # The timeout is computed for each attempt from the time left.
+        timeout = self.getTimeout(api)
+        started = time.monotonic()
+
+        try:
+            response = self.__getSession().request(method, url, params=params,
+                data=data, headers=headers, auth=credentials, timeout=timeout)
+        finally:
+            # A call which timed out counts with its timeout.
+            elapsed = time.monotonic() - started
+            observe_upstream('authlete:' + api, elapsed)
+
+        if self._recorder is not None:
+            self._recorder.record(method, api, data, response, elapsed)
+
+        return response
+
+
+def _isRetriable(method, exception):
+    # A request which may have reached Authlete is sent again only if it is
+    # safe to repeat. Other requests (e.g. one which issues an authorization
+    # code) are retried only if the connection could not be established.
+    if isinstance(exception, requests.ConnectTimeout):
+        return True
+
+    if method == 'GET':
+        return isinstance(exception, (requests.ConnectionError, requests.Timeout))
+
+    if isinstance(exception, requests.ConnectionError) and exception.args:
+        return isinstance(getattr(exception.args[0], 'reason', None), NewConnectionError)
+
+    return False
+
+
+def _isRetriableStatus(method, status):
+    # 502 and 504 may be returned after Authlete has processed the request
+    # (e.g. issued a token), so only a GET request is sent again. 503 means
+    # that the request was refused before it was processed.
+    return method == 'GET' or status == 503
+
+
+_instances = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for api in list(_instances):
+        api.resetSession()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,273 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Token-bucket rate limiting for endpoints called by client applications.
+#
+# Each key (e.g. a client ID) has a bucket which holds up to 'burst' tokens
+# and is refilled at 'rate' tokens per second. A request consumes one token.
+# When the bucket is empty, the request is rejected with "429 Too Many
+# Requests" (RFC 6585) and a Retry-After header before the view does any
+# work, i.e. before any Authlete API call or password hashing happens.
+#
+# The client ID in a request is only a claim until Authlete authenticates
+# the client. So a request consumes a token from the bucket of the pair of
+# the claimed client ID and the remote address, and the bucket of the client
+# itself is only checked. A token is taken from the latter after the view
+# has succeeded, i.e. after the client has been authenticated. Nobody can
+# use up the budget of another client, and buckets of authenticated clients
+# are held apart so that made-up client IDs do not push them out.
+#
+# A bucket is just a (tokens, timestamp) tuple. Buckets are held in an LRU
+# dictionary in process memory, or in Django's cache framework when a cache
+# alias is configured so that worker processes share them. Note that the
+# cache-based buckets are updated with get/set, not atomically, so under
+# heavy contention a few extra requests may pass.
+
+
+import functools
+import logging
+import math
+import threading
+import time
+from collections                           import OrderedDict
+from urllib.parse                          import parse_qsl
+from django.conf                           import settings
+from django.core.cache                     import caches
+from django.http                           import HttpResponse
+from authlete.django.web.basic_credentials import BasicCredentials
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketRateLimiter(object):
+    def __init__(self, name, rate, burst, maxKeys=10000, cacheAlias=None):
+        self._name       = name
+        self._rate       = float(rate)
+        self._burst      = float(burst)
+        self._maxKeys    = maxKeys
+        self._cacheAlias = cacheAlias
+        self._buckets    = OrderedDict()
+        self._lock       = threading.Lock()
+
+
+    @property
+    def name(self):
+        return self._name
+
+
+    def acquire(self, key):
+        """Consume one token from the bucket of the key.
+
+        Returns:
+            float : 0 if the request is allowed. Otherwise, the number of
+                    seconds after which a token will be available.
+        """
+
+        now = time.monotonic() if self._cacheAlias is None else time.time()
+
+        if self._cacheAlias is None:
+            with self._lock:
+                bucket = self._buckets.pop(key, None)
+                bucket, wait = self.__consume(bucket, now)
+                self._buckets[key] = bucket
+
+                # Forget the least recently used buckets.
+                while len(self._buckets) > self._maxKeys:
+                    self._buckets.popitem(last=False)
+        else:
+            cache    = caches[self._cacheAlias]
+            cacheKey = self.__cacheKey(key)
+            bucket, wait = self.__consume(cache.get(cacheKey), now)
+
+            # A bucket which has not been touched long enough is full anyway.
+            cache.set(cacheKey, bucket, math.ceil(self._burst / self._rate) + 1)
+
+        return wait
+
+
+    def peek(self, key):
+        """Check the bucket of the key without consuming a token.
+
+        Returns:
+            float : 0 if a token is available. Otherwise, the number of
+                    seconds after which a token will be available.
+        """
+
+        if self._cacheAlias is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+
+            _, wait = self.__consume(bucket, time.monotonic())
+        else:
+            bucket = caches[self._cacheAlias].get(self.__cacheKey(key))
+            _, wait = self.__consume(bucket, time.time())
+
+        return wait
+
+
+    def __cacheKey(self, key):
+        return 'ratelimit:{}:{}'.format(self._name, key)
+
+
+    def __consume(self, bucket, now):
+        if bucket is None:
+            tokens = self._burst
+        else:
+            # Refill the bucket according to the elapsed time.
+            tokens = min(self._burst, bucket[0] + (now - bucket[1]) * self._rate)
+
+        if tokens < 1.0:
+            # Not enough tokens. Tell when the next token will be available.
+            return (tokens, now), (1.0 - tokens) / self._rate
+
+        return (tokens - 1.0, now), 0
+
+
+def client_identity(request):
+    """Find the client ID which a request to the token endpoint claims.
+
+    Returns:
+        str : The client ID, or None if the request does not contain one.
+    """
+
+    # client_secret_basic
+    credentials = BasicCredentials.parse(request.headers.get('Authorization'))
+    if credentials.userId:
+        return credentials.userId
+
+    # client_secret_post, private_key_jwt, public clients, etc. The raw body
+    # is scanned instead of request.POST so that no QueryDict is built.
+    for name, value in parse_qsl(request.body.decode('ascii', 'replace')):
+        if name == 'client_id':
+            return value
+
+    return None
+
+
+def caller_identity(request):
+    """Find the caller ID which a request to the introspection endpoint
+    claims, or None."""
+
+    credentials = BasicCredentials.parse(request.headers.get('Authorization'))
+
+    return credentials.userId or None
+
+
+# Rate limiters built from settings.RATE_LIMITS, keyed by name.
+_limiters = {}
+_limitersLock = threading.Lock()
+
+
+def get_rate_limiter(name, authenticated=False):
+    """Get the rate limiter configured in settings.RATE_LIMITS under the name.
+
+    None is returned if no rate limit is configured for the name.
+
+    Args:
+        name (str) : The key of settings.RATE_LIMITS.
+        authenticated (bool) : True to get the limiter which holds the
+            buckets of authenticated clients.
+    """
+
+    conf = getattr(settings, 'RATE_LIMITS', {}).get(name)
+    if not conf:
+        return None
+
+    if authenticated:
+        name += ':authenticated'
+
+    cacheAlias = getattr(settings, 'RATE_LIMIT_CACHE', None)
+    signature  = (conf.get('rate'), conf.get('burst'), conf.get('max_keys'), cacheAlias)
+
+    entry = _limiters.get(name)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+
+    # Build (or rebuild after a configuration change) the limiter, unless
+    # another thread has just built it.
+    with _limitersLock:
+        entry = _limiters.get(name)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        limiter = TokenBucketRateLimiter(
+            name, conf['rate'], conf.get('burst', conf['rate']),
+            conf.get('max_keys', 10000), cacheAlias)
+        _limiters[name] = (signature, limiter)
+
+    return limiter
+
+
+def too_many_requests(retryAfter):
+    """429 Too Many Requests (RFC 6585) with a Retry-After header."""
+
+    content = '{"error":"too_many_requests","error_description":"The request rate limit has been exceeded."}'
+
+    response = HttpResponse(
+        status=429, content=content,
+        content_type='application/json', charset='UTF-8')
+    response['Cache-Control'] = 'no-store'
+    response['Pragma']        = 'no-cache'
+    response['Retry-After']   = str(max(1, math.ceil(retryAfter)))
+
+    return response
+
+
+def rate_limited(name, identify):
+    """Decorator to apply the rate limit configured under the name to a view.
+
+    Args:
+        name (str) : The key of settings.RATE_LIMITS.
+        identify (callable) : A function which extracts the client ID which
+            a request claims (or None) from the request.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            limiter = get_rate_limiter(name)
+
+            if limiter is None:
+                return view(request, *args, **kwargs)
+
+            clientId = identify(request)
+            key      = 'addr:{}:{}'.format(request.META.get('REMOTE_ADDR'), clientId or '')
+            wait     = limiter.acquire(key)
+
+            # The bucket of the client is charged only when the client has
+            # been authenticated (below), but an empty one rejects requests.
+            authenticated = get_rate_limiter(name, authenticated=True)
+            if wait == 0 and clientId:
+                wait = authenticated.peek(clientId)
+
+            if wait > 0:
+                logger.info("rate_limiter: The rate limit '%s' rejected a request from '%s'.", name, key)
+                return too_many_requests(wait)
+
+            response = view(request, *args, **kwargs)
+
+            # A successful response means that Authlete has authenticated
+            # the client.
+            if clientId and response.status_code < 400:
+                authenticated.acquire(clientId)
+
+            return response
+
+        return wrapper
+
+    return decorator
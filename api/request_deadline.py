@@ -0,0 +1,170 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# The deadline of the request being processed.
+#
+# RequestDeadlineMiddleware gives each request a time budget
+# (settings.REQUEST_DEADLINE seconds). Code which calls an external service
+# (e.g. Cognito) asks `remaining()` how much of the budget is left and uses
+# it as the timeout of the call, so that a slow service cannot hold a request
+# longer than its budget.
+#
+# A view can have a tighter budget of its own (settings.ENDPOINT_DEADLINES)
+# with the `endpoint_deadline(name)` decorator. A deadline is never extended,
+# so the effective deadline is the earliest one.
+#
+# When the deadline has already passed, upstream calls are not made at all
+# and DeadlineExceeded is raised instead. The middleware turns it into
+# '503 Service Unavailable'.
+#
+# The deadline is kept in a context variable. It is therefore visible both
+# to the thread processing the request under WSGI and to the coroutines (and
+# the threads started by sync_to_async) processing the request under ASGI.
+
+
+import contextvars
+import functools
+import logging
+import time
+from contextlib           import contextmanager
+from asgiref.sync         import iscoroutinefunction, markcoroutinefunction
+from django.conf          import settings
+from .concurrency_limiter import service_unavailable
+
+
+logger = logging.getLogger(__name__)
+
+
+_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of calling an external service after the deadline."""
+    pass
+
+
+def remaining(limit=None):
+    """Get the number of seconds left before the deadline.
+
+    Args:
+        limit (float) : The upper limit of the returned value.
+
+    Returns:
+        float : The remaining seconds (which may be zero or negative when the
+                deadline has passed), or `limit` if no deadline is set.
+    """
+
+    deadline = _deadline.get()
+    if deadline is None:
+        return limit
+
+    left = deadline - time.monotonic()
+    if limit is None:
+        return left
+
+    return min(left, limit)
+
+
+@contextmanager
+def deadline_scope(seconds):
+    """Set a deadline `seconds` from now while the block is executed.
+
+    A deadline which is already set is never extended.
+    """
+
+    deadline = time.monotonic() + seconds
+    current  = _deadline.get()
+
+    if current is not None:
+        deadline = min(deadline, current)
+
+    token = _deadline.set(deadline)
+
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def endpoint_deadline(name):
+    """Decorator to apply the deadline of the endpoint to a view.
+
+    Args:
+        name (str) : The key of settings.ENDPOINT_DEADLINES.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            budget = getattr(settings, 'ENDPOINT_DEADLINES', {}).get(name)
+            if not budget:
+                return view(request, *args, **kwargs)
+
+            with deadline_scope(budget):
+                return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _is_deadline_exceeded(exception):
+    # Authlete API calls wrap exceptions with AuthleteApiException.
+    return isinstance(exception, DeadlineExceeded) or \
+           isinstance(getattr(exception, 'cause', None), DeadlineExceeded)
+
+
+class RequestDeadlineMiddleware(object):
+    sync_capable  = True
+    async_capable = True
+
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall(request)
+
+        budget = getattr(settings, 'REQUEST_DEADLINE', None)
+        if not budget:
+            return self.get_response(request)
+
+        with deadline_scope(budget):
+            return self.get_response(request)
+
+
+    async def __acall(self, request):
+        budget = getattr(settings, 'REQUEST_DEADLINE', None)
+        if not budget:
+            return await self.get_response(request)
+
+        with deadline_scope(budget):
+            return await self.get_response(request)
+
+
+    def process_exception(self, request, exception):
+        if not _is_deadline_exceeded(exception):
+            return None
+
+        logger.warning("request_deadline: The deadline of '%s' passed before an upstream call.", request.path)
+
+        return service_unavailable(1)
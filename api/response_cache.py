@@ -0,0 +1,91 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# A small in-process cache for responses of endpoints whose content rarely
+# changes, such as the discovery document and the JWK Set document. Their
+# content comes from Authlete APIs, so caching them for a short time saves
+# an Authlete API call per request. Only '200 OK' responses are cached.
+#
+# HttpResponse objects are not shared among requests because middleware may
+# modify them. Instead, the status, content and headers are stored and a new
+# HttpResponse is built for each request.
+
+
+import threading
+import time
+from django.conf import settings
+from django.http import HttpResponse
+
+
+class ResponseCache(object):
+    def __init__(self, ttl=None):
+        self._ttl     = ttl
+        self._entries = {}
+        self._lock    = threading.Lock()
+
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+
+        return getattr(settings, 'AUTHLETE_METADATA_CACHE_TTL', 0)
+
+
+    def get(self, key, producer):
+        """Get the cached response for the key, or produce one.
+
+        Args:
+            key (str) : The key of the cache entry.
+            producer (callable) : A function which returns an HttpResponse.
+
+        Returns:
+            django.http.HttpResponse
+        """
+
+        ttl = self.ttl
+        if ttl <= 0:
+            return producer()
+
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry[0]:
+            return self.__build(entry)
+
+        response = producer()
+
+        if response.status_code == 200 and not response.streaming:
+            entry = (time.monotonic() + ttl, response.status_code,
+                     response.content, list(response.items()))
+
+            with self._lock:
+                self._entries[key] = entry
+
+        return response
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+    def __build(self, entry):
+        response = HttpResponse(status=entry[1], content=entry[2])
+
+        for name, value in entry[3]:
+            response[name] = value
+
+        return response
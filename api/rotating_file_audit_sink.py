@@ -0,0 +1,94 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# A sink of audit events (see audit_pipeline.py) which appends events to a
+# local file in the JSON Lines format. A batch of events is written with one
+# write. When the file exceeds `max_bytes`, it is rotated like
+# logging.handlers.RotatingFileHandler does: 'audit.jsonl' is renamed to
+# 'audit.jsonl.1', 'audit.jsonl.1' to 'audit.jsonl.2', and so on, up to
+# `backup_count` files.
+#
+# '{pid}' in the path is replaced with the process ID. Use it when worker
+# processes of a prefork server would otherwise rotate the same file.
+#
+# Any object which has `write(events)` can be used as a sink instead.
+
+
+import json
+import os
+
+
+class RotatingFileAuditSink(object):
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5):
+        self._template     = path
+        self._max_bytes    = max_bytes
+        self._backup_count = backup_count
+        self._file         = None
+        self._pid          = None
+
+
+    def write(self, events):
+        data = ''.join(
+            json.dumps(e, separators=(',', ':'), default=str) + '\n' for e in events)
+
+        f = self.__open()
+        f.write(data)
+        f.flush()
+
+        if self._max_bytes and f.tell() >= self._max_bytes:
+            self.__rotate()
+
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+    def __path(self):
+        return self._template.replace('{pid}', str(os.getpid()))
+
+
+    def __open(self):
+        # A child process after fork() opens its own file.
+        if self._file is None or self._pid != os.getpid():
+            path = self.__path()
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._file = open(path, 'a', encoding='utf-8')
+            self._pid  = os.getpid()
+
+        return self._file
+
+
+    def __rotate(self):
+        self.close()
+
+        path = self.__path()
+
+        if self._backup_count <= 0:
+            os.remove(path)
+            return
+
+        for i in range(self._backup_count - 1, 0, -1):
+            source = '{}.{}'.format(path, i)
+            if os.path.exists(source):
+                os.replace(source, '{}.{}'.format(path, i + 1))
+
+        os.replace(path, path + '.1')
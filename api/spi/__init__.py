@@ -19,3 +19,4 @@ from .authorization_request_decision_handler_spi_impl import AuthorizationReques
 from .authorization_request_handler_spi_impl          import AuthorizationRequestHandlerSpiImpl
 from .no_interaction_handler_spi_impl                 import NoInteractionHandlerSpiImpl
 from .token_request_handler_spi_impl                  import TokenRequestHandlerSpiImpl
+from .userinfo_request_handler_spi_impl               import UserInfoRequestHandlerSpiImpl
@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2019 Authlete, Inc.
+# Copyright (C) 2019-2026 Authlete, Inc.
 #
 # Licensed under the Apache License, Version 2.0 (the "License");
 # you may not use this file except in compliance with the License.
@@ -15,52 +15,23 @@
 # License.
 
 
-from django.contrib.auth.models                                            import User
 from authlete.django.handler.spi.authorization_request_handler_spi_adapter import AuthorizationRequestHandlerSpiAdapter
-from authlete.types.standard_claims                                        import StandardClaims
+from ..user_claim_cache                                                    import get_user_claim_cache
 
 
 class AuthorizationRequestHandlerSpiImpl(AuthorizationRequestHandlerSpiAdapter):
     def __init__(self, request):
-        self._user    = None
-        self._tried   = False
         self._request = request
 
 
     def getUserClaimValue(self, subject, claimName, languageTag):
-        # The user identified by the subject.
-        user = self.__getUser(subject)
-        if user is None:
+        # The claims of the user identified by the subject. See user_claims()
+        # in user_claim_cache.py for the supported claims.
+        claims = get_user_claim_cache().get(subject)
+        if claims is None:
             return None
 
-        if claimName == StandardClaims.NAME:
-            if user.first_name and user.last_name:
-                return '{} {}'.format(user.first_name, user.last_name)
-        elif claimName == StandardClaims.GIVEN_NAME:
-            if user.first_name:
-                return user.first_name
-        elif claimName == StandardClaims.FAMILY_NAME:
-            if user.last_name:
-               return user.last_name
-        elif claimName == StandardClaims.EMAIL:
-            if user.email:
-                return user.email
-        else:
-            return None
-
-        return None
-
-
-    def __getUser(self, subject):
-        if self._tried == False:
-            try:
-                self._user = User.objects.get(id=subject)
-            except:
-                self._user = None
-
-            self._tried = True
-
-        return self._user
+        return claims.get(claimName)
 
 
     def getUserAuthenticatedAt(self):
@@ -0,0 +1,31 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+from authlete.django.handler.spi.userinfo_request_handler_spi_adapter import UserInfoRequestHandlerSpiAdapter
+from ..user_claim_cache                                               import get_user_claim_cache
+
+
+class UserInfoRequestHandlerSpiImpl(UserInfoRequestHandlerSpiAdapter):
+    def getUserClaimValue(self, subject, claimName, languageTag):
+        # The claims of the user identified by the subject. They are resolved
+        # in the same way as AuthorizationRequestHandlerSpiImpl does, and
+        # cached per subject.
+        claims = get_user_claim_cache().get(subject)
+        if claims is None:
+            return None
+
+        return claims.get(claimName)
@@ -0,0 +1,168 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# This class serves files collected by `collectstatic` into STATIC_ROOT.
+# It is intended for deployments where no CDN or front web server sits in
+# front of this application.
+#
+# Files whose names contain a content hash (= names listed as values in
+# the manifest written by CompressedManifestStaticFilesStorage) never
+# change, so they are served with "Cache-Control: immutable" and a
+# far-future max-age. Precompressed variants (.br, .gz) are chosen
+# according to the Accept-Encoding request header.
+
+
+import mimetypes
+import os
+import stat
+import threading
+from django.conf                        import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions             import SuspiciousFileOperation
+from django.http                        import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os                   import safe_join
+from django.utils.http                  import http_date
+from django.views.static                import was_modified_since
+
+
+class StaticAssetServer(object):
+    # Cache-Control for files whose names contain a content hash.
+    IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+    # Precompressed variants in order of preference.
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+    def __init__(self, root=None, maxAge=None):
+        self._root        = root or settings.STATIC_ROOT
+        self._maxAge      = maxAge if maxAge is not None else getattr(settings, 'STATIC_ASSETS_MAX_AGE', 60)
+        self._hashedNames = None
+        self._files       = {}
+        self._lock        = threading.Lock()
+
+
+    def handle(self, request, path):
+        # Find the file (or its precompressed variant) to serve.
+        acceptable = self.__acceptableEncodings(request)
+        entry      = self.__resolve(path, acceptable)
+
+        if entry is None:
+            raise Http404('"{}" does not exist'.format(path))
+
+        fullpath, encoding, mtime = entry
+
+        # Conditional GET.
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime):
+            response = HttpResponseNotModified()
+        else:
+            contentType, _ = mimetypes.guess_type(path)
+            response = FileResponse(
+                open(fullpath, 'rb'), filename=os.path.basename(path),
+                content_type=contentType or 'application/octet-stream')
+
+            if encoding is not None:
+                response['Content-Encoding'] = encoding
+
+        response['Last-Modified'] = http_date(mtime)
+        response['Vary']          = 'Accept-Encoding'
+        response['Cache-Control'] = self.__cacheControl(path)
+
+        return response
+
+
+    def __acceptableEncodings(self, request):
+        header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        encodings = set()
+
+        for element in header.split(','):
+            coding, _, params = element.partition(';')
+
+            # Ignore codings explicitly refused by "q=0".
+            if self.__quality(params) <= 0:
+                continue
+
+            encodings.add(coding.strip().lower())
+
+        return encodings
+
+
+    def __quality(self, params):
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+
+            if name.strip().lower() == 'q':
+                try:
+                    return float(value)
+                except ValueError:
+                    return 0
+
+        return 1
+
+
+    def __resolve(self, path, acceptable):
+        # Candidates in order of preference. The uncompressed file comes last.
+        candidates = [(encoding, suffix) for encoding, suffix in self.ENCODINGS if encoding in acceptable]
+        candidates.append((None, ''))
+
+        for encoding, suffix in candidates:
+            entry = self.__stat(path + suffix)
+
+            if entry is not None:
+                return (entry[0], encoding, entry[1])
+
+        return None
+
+
+    def __stat(self, path):
+        # Collected files do not change while the process is running, so
+        # the result of the file system lookup is remembered. Misses are not
+        # remembered so that arbitrary request paths cannot grow the dict.
+        entry = self._files.get(path)
+        if entry is not None:
+            return entry
+
+        try:
+            fullpath = safe_join(self._root, path)
+            st       = os.stat(fullpath)
+        except (SuspiciousFileOperation, OSError, ValueError):
+            return None
+
+        if not stat.S_ISREG(st.st_mode):
+            return None
+
+        entry = (fullpath, st.st_mtime)
+
+        with self._lock:
+            self._files[path] = entry
+
+        return entry
+
+
+    def __cacheControl(self, path):
+        if path in self.__getHashedNames():
+            return self.IMMUTABLE_CACHE_CONTROL
+
+        return 'public, max-age={}'.format(self._maxAge)
+
+
+    def __getHashedNames(self):
+        if self._hashedNames is None:
+            # The values of the manifest are the hashed names.
+            hashedFiles = getattr(staticfiles_storage, 'hashed_files', None) or {}
+            self._hashedNames = frozenset(hashedFiles.values())
+
+        return self._hashedNames
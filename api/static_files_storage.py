@@ -0,0 +1,115 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# This class is a storage for static files which is used by Django's
+# `collectstatic` management command.
+#
+# In addition to what ManifestStaticFilesStorage does (copying files with
+# names that contain a hash of their content and writing a manifest that
+# maps original names to hashed names), this class writes precompressed
+# variants of text-based files next to the originals:
+#
+#   api/css/authorization.3e1f5a2b9c0d.css
+#   api/css/authorization.3e1f5a2b9c0d.css.gz
+#   api/css/authorization.3e1f5a2b9c0d.css.br   (if 'brotli' is installed)
+#
+# The variants can be served by a front web server (e.g. nginx's
+# 'gzip_static' and 'brotli_static') or by StaticAssetServer in this
+# application.
+
+
+import gzip
+import io
+import logging
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base             import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Extensions of files which are worth compressing.
+    COMPRESSIBLE_EXTENSIONS = (
+        '.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml')
+
+    # Files smaller than this are not compressed.
+    MINIMUM_SIZE = 256
+
+
+    def post_process(self, paths, dry_run=False, **options):
+        # Let ManifestStaticFilesStorage copy files with hashed names and
+        # write the manifest.
+        yield from super().post_process(paths, dry_run, **options)
+
+        if dry_run:
+            return
+
+        # Both the original files and the hashed copies are compressed
+        # so that either name can be served with a precompressed variant.
+        names = set(self.hashed_files.keys()) | set(self.hashed_files.values())
+
+        for name in sorted(names):
+            if not self.__isCompressible(name):
+                continue
+
+            for compressedName in self.__compress(name):
+                yield name, compressedName, True
+
+
+    def __isCompressible(self, name):
+        return name.lower().endswith(self.COMPRESSIBLE_EXTENSIONS)
+
+
+    def __compress(self, name):
+        with self.open(name) as f:
+            content = f.read()
+
+        # Compressing tiny files gains nothing.
+        if len(content) < self.MINIMUM_SIZE:
+            return
+
+        for suffix, compressed in self.__variants(content):
+            # Keep the variant only when it is actually smaller.
+            if len(content) <= len(compressed):
+                continue
+
+            compressedName = name + suffix
+
+            if self.exists(compressedName):
+                self.delete(compressedName)
+
+            self._save(compressedName, ContentFile(compressed))
+
+            yield compressedName
+
+
+    def __variants(self, content):
+        # gzip. 'mtime' is fixed so that the output is reproducible.
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9, mtime=0) as f:
+            f.write(content)
+        yield '.gz', buffer.getvalue()
+
+        # Brotli is optional.
+        if brotli is not None:
+            yield '.br', brotli.compress(content)
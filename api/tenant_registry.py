@@ -0,0 +1,325 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Hosting of several Authlete services (tenants) in one deployment.
+#
+# settings.AUTHLETE_TENANTS maps the name of each tenant to the configuration
+# of its Authlete service. TenantMiddleware, placed first in
+# settings.MIDDLEWARE, finds the tenant of a request by the host
+# (AUTHLETE_TENANT_RESOLUTION = 'host', the 'hosts' of the tenant) or by the
+# first segment of the path (AUTHLETE_TENANT_RESOLUTION = 'path', e.g.
+# /acme/api/token). In the latter case, the segment is removed from the path
+# before URL resolution and becomes a part of the script prefix, so URLs
+# built by reverse() keep it. Requests of no tenant are served with
+# settings.AUTHLETE_API as before.
+#
+# The views call tenant_api(request) instead of using settings.AUTHLETE_API.
+# Each tenant has its own PooledAuthleteApi (with its own connection pool of
+# AUTHLETE_TENANT_POOL_SIZE connections) and its own cache of the discovery
+# and JWK Set documents. The client registry (client_registry.py) and the
+# logout token issuer (backchannel_logout.py) are per AuthleteApi instance,
+# so they are per tenant too.
+#
+# The AuthleteApi of a tenant has the same timeouts as settings.AUTHLETE_API,
+# and its traffic is recorded into (or replayed from) the same file (see
+# authlete_traffic_recorder.py). The base URLs of settings.AUTHLETE_API are
+# those of the default service, so a tenant fails over only among its own
+# 'base_urls', if any (see authlete_endpoint_selector.py).
+#
+# A tenant is created when its first request arrives, and is evicted when it
+# has not been used for AUTHLETE_TENANT_IDLE_TIMEOUT seconds, or when more
+# than AUTHLETE_TENANT_MAX_ACTIVE tenants are active (the least recently used
+# first). A tenant serving a request is never evicted. Eviction closes the
+# connections of the tenant and drops its caches.
+#
+# Users, sessions and remembered consents are stored in the database of this
+# server, which is shared by all tenants.
+
+
+import threading
+import time
+from collections                 import OrderedDict
+from authlete.conf               import AuthleteConfiguration, AuthleteIniConfiguration
+from django.conf                 import settings
+from django.core.exceptions      import MiddlewareNotUsed
+from django.core.handlers.wsgi   import get_script_name
+from django.http.request         import split_domain_port
+from django.urls                 import get_script_prefix, set_script_prefix
+from .authlete_endpoint_selector import AuthleteEndpointSelector
+from .backchannel_logout         import discard_logout_token_issuer
+from .client_registry            import discard_client_registry
+from .pooled_authlete_api        import PooledAuthleteApi
+from .response_cache             import ResponseCache
+
+
+class Tenant(object):
+    __slots__ = ('name', 'api', 'metadataCache', 'active', 'usedAt')
+
+
+    def __init__(self, name, api):
+        self.name          = name
+        self.api           = api
+        self.metadataCache = ResponseCache()
+        self.active        = 0
+        self.usedAt        = time.monotonic()
+
+
+class TenantRegistry(object):
+    def __init__(self, sweepInterval=10.0):
+        self._sweepInterval = sweepInterval
+        self._tenants       = OrderedDict()
+        self._sweptAt       = time.monotonic()
+        self._lock          = threading.Lock()
+
+
+    def resolve(self, request):
+        """Find the name of the tenant of the request.
+
+        In the 'path' mode, the first segment of the path is removed from
+        request.path_info when it is the name of a tenant.
+
+        Returns:
+            str : The name of the tenant, or None.
+        """
+
+        tenants = _tenants()
+
+        if getattr(settings, 'AUTHLETE_TENANT_RESOLUTION', 'host') == 'path':
+            name, _, rest = request.path_info.lstrip('/').partition('/')
+            if name not in tenants:
+                return None
+
+            request.path_info = '/' + rest
+            return name
+
+        host, _ = split_domain_port(request.get_host())
+
+        return _hosts().get(host)
+
+
+    def acquire(self, name):
+        """Get the tenant for a request, creating it if necessary. The
+        tenant is not evicted until release() is called."""
+
+        now = time.monotonic()
+
+        with self._lock:
+            tenant = self._tenants.get(name)
+            if tenant is None:
+                tenant = self._tenants[name] = Tenant(name, _create_api(name, _tenants()[name]))
+
+            self._tenants.move_to_end(name)
+            tenant.active += 1
+            tenant.usedAt  = now
+
+            evicted = self.__sweep(now)
+
+        for other in evicted:
+            _close(other)
+
+        return tenant
+
+
+    def release(self, tenant):
+        with self._lock:
+            tenant.active -= 1
+            tenant.usedAt  = time.monotonic()
+
+
+    def evict(self, name):
+        """Evict the tenant (if it is not serving a request)."""
+
+        with self._lock:
+            tenant = self._tenants.get(name)
+            if tenant is None or tenant.active > 0:
+                return False
+
+            del self._tenants[name]
+
+        _close(tenant)
+        return True
+
+
+    def stats(self):
+        with self._lock:
+            return { name: { 'active': tenant.active, 'idle': round(time.monotonic() - tenant.usedAt, 3) }
+                     for name, tenant in self._tenants.items() }
+
+
+    def __sweep(self, now):
+        # Called with the lock held. Returns the evicted tenants, which are
+        # closed after the lock is released.
+        maxActive = getattr(settings, 'AUTHLETE_TENANT_MAX_ACTIVE', 0)
+
+        if now - self._sweptAt < self._sweepInterval and (not maxActive or len(self._tenants) <= maxActive):
+            return []
+
+        self._sweptAt = now
+        idleTimeout   = getattr(settings, 'AUTHLETE_TENANT_IDLE_TIMEOUT', 0)
+        evicted       = []
+
+        # From the least recently used one.
+        for name, tenant in list(self._tenants.items()):
+            if tenant.active > 0:
+                continue
+
+            if (idleTimeout and now - tenant.usedAt >= idleTimeout) or \
+               (maxActive and len(self._tenants) > maxActive):
+                del self._tenants[name]
+                evicted.append(tenant)
+
+        return evicted
+
+
+class TenantMiddleware(object):
+    sync_capable  = True
+    async_capable = False
+
+
+    def __init__(self, get_response):
+        if not _tenants():
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+
+    def __call__(self, request):
+        registry = get_tenant_registry()
+        name     = registry.resolve(request)
+
+        if name is None:
+            return self.get_response(request)
+
+        prefix = get_script_prefix()
+
+        if getattr(settings, 'AUTHLETE_TENANT_RESOLUTION', 'host') == 'path':
+            # URLs built by reverse() include the name of the tenant.
+            set_script_prefix(get_script_name(request.META).rstrip('/') + '/' + name + '/')
+
+        tenant = registry.acquire(name)
+        request.tenant = tenant
+
+        try:
+            return self.get_response(request)
+        finally:
+            registry.release(tenant)
+            set_script_prefix(prefix)
+
+
+def tenant_api(request):
+    """Get the AuthleteApi of the tenant of the request, or
+    settings.AUTHLETE_API for requests of no tenant."""
+
+    tenant = getattr(request, 'tenant', None)
+
+    return settings.AUTHLETE_API if tenant is None else tenant.api
+
+
+def service_apis():
+    """Iterate over the AuthleteApi of the default service and of every
+    tenant, e.g. to act on a user, who is shared by all tenants. A tenant
+    is not evicted while its AuthleteApi is in use.
+
+    Yields:
+        (str, AuthleteApi) : The name of the tenant (None for the default
+                             service) and its AuthleteApi.
+    """
+
+    yield None, settings.AUTHLETE_API
+
+    registry = get_tenant_registry()
+
+    for name in list(_tenants()):
+        tenant = registry.acquire(name)
+        try:
+            yield name, tenant.api
+        finally:
+            registry.release(tenant)
+
+
+def _tenants():
+    return getattr(settings, 'AUTHLETE_TENANTS', None) or {}
+
+
+# The host-to-tenant index, rebuilt when AUTHLETE_TENANTS is replaced.
+_hostIndex = (None, {})
+
+
+def _hosts():
+    global _hostIndex
+
+    tenants = _tenants()
+    if _hostIndex[0] is not tenants:
+        _hostIndex = (tenants, { host: name for name, tenant in tenants.items()
+                                 for host in tenant.get('hosts', ()) })
+
+    return _hostIndex[1]
+
+
+def _create_api(name, tenant):
+    # 'configuration' is a dictionary of the properties of
+    # AuthleteConfiguration (e.g. 'baseUrl' and 'serviceApiKey'). 'ini' is
+    # the path of an authlete.ini file.
+    if 'ini' in tenant:
+        cnf = AuthleteIniConfiguration(tenant['ini'])
+    else:
+        cnf = AuthleteConfiguration(tenant['configuration'])
+
+    api = PooledAuthleteApi(cnf, poolSize=getattr(settings, 'AUTHLETE_TENANT_POOL_SIZE', 4))
+
+    # The same timeouts, recorder and replayer as the default service.
+    defaults = settings.AUTHLETE_API
+    api.getSettings().connectionTimeout = defaults.getSettings().connectionTimeout
+    api.getSettings().readTimeout       = defaults.getSettings().readTimeout
+    api.setRecorder(defaults.getRecorder())
+    api.setReplayer(defaults.getReplayer())
+
+    if tenant.get('base_urls'):
+        api.setEndpointSelector(_selector(name, tenant['base_urls']))
+
+    return api
+
+
+# Endpoint selectors of tenants, kept across evictions so that the health of
+# the endpoints is not measured again from scratch.
+_selectors     = {}
+_selectorsLock = threading.Lock()
+
+
+def _selector(name, baseUrls):
+    with _selectorsLock:
+        entry = _selectors.get(name)
+        if entry is None or entry[0] != baseUrls:
+            entry = _selectors[name] = (baseUrls, AuthleteEndpointSelector(baseUrls,
+                probeInterval=getattr(settings, 'AUTHLETE_PROBE_INTERVAL', 10.0)))
+
+        return entry[1]
+
+
+def _close(tenant):
+    discard_client_registry(tenant.api)
+    discard_logout_token_issuer(tenant.api)
+    tenant.metadataCache.clear()
+    tenant.api.close()
+
+
+_registry = TenantRegistry()
+
+
+def get_tenant_registry():
+    """Get the TenantRegistry of the process."""
+    return _registry
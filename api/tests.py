@@ -1,3 +1,1206 @@
-from django.test import TestCase
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
 
-# Create your tests here.
+
+# Budgets of the flows of this authorization server.
+#
+# Each test runs a flow against a local stand-in for Authlete and asserts the
+# exact number of Authlete API calls, database queries and session writes of
+# each request. A change which adds a call or a query to a flow makes the
+# test fail. When the addition is intended, update the budget in the test.
+#
+# EndpointFailoverTest checks that calls to Authlete fail over to another
+# base URL (see authlete_endpoint_selector.py), BackchannelLogoutTest that
+# logout tokens reach client applications (see backchannel_logout.py), and
+# TenantTest that requests of tenants go to their own Authlete services (see
+# tenant_registry.py).
+#
+# Run with 'python manage.py test'.
+
+
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import tracemalloc
+import requests
+from contextlib                             import contextmanager
+from io                                     import StringIO
+from http.server                            import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest                               import mock, skipIf
+from authlete.api.authlete_api_exception    import AuthleteApiException
+from authlete.conf                          import AuthleteIniConfiguration
+from authlete.types.standard_claims         import StandardClaims
+from django.conf                            import settings
+from django.contrib.auth.models             import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.sessions.backends.db    import SessionStore
+from django.contrib.sessions.models         import Session
+from django.core.management                 import CommandError, call_command
+from django.db                              import connection, router
+from django.http                            import HttpResponse
+from django.test                            import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils                      import CaptureQueriesContext
+from django.utils                           import timezone
+from backends.cognito_backend               import CognitoBackend
+from backends.cognito_id_token_verifier     import CognitoIdTokenVerifier
+from .admin                                 import memory_diagnostics_view
+from .                                      import authlete_endpoint_selector
+from .authlete_endpoint_selector            import AuthleteEndpointSelector
+from .authlete_traffic_recorder             import AuthleteTrafficRecorder
+from .bulk_revoker                          import BulkRevoker
+from .backchannel_logout                    import BACKCHANNEL_LOGOUT_EVENT, BackchannelLogoutNotifier, discard_logout_token_issuer
+from .client_registry                       import ClientRegistry
+from .database_router                       import ReplicaStickinessMiddleware
+from .machine_fast_path                     import MachineFastPathMiddleware
+from .memory_diagnostics                    import MemoryDiagnostics
+from .page_fragment_cache                   import get_page_fragment_cache
+from .pooled_authlete_api                   import PooledAuthleteApi
+from .rate_limiter                          import get_rate_limiter
+from .tenant_registry                       import get_tenant_registry, service_apis
+from .token_reuse_cache                     import get_token_reuse_cache
+from .user_claim_cache                      import get_user_claim_cache
+
+try:
+    import jwt
+    from cryptography.hazmat.primitives.asymmetric import rsa
+except ImportError:
+    jwt = None
+
+
+class AuthleteStub(object):
+    """A stand-in for Authlete which returns a fixed response per API, or
+    the responses in a list one per call (None for an error).
+
+    It is installed through PooledAuthleteApi.setReplayer().
+    """
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls     = []
+
+
+    def respond(self, method, api):
+        self.calls.append(api)
+
+        response = requests.Response()
+        response.encoding = 'utf-8'
+
+        body = self.responses.get(api)
+        if isinstance(body, list):
+            body = body.pop(0) if body else None
+
+        if body is not None:
+            response.status_code = 200
+        else:
+            response.status_code = 404
+            body = { 'resultMessage': 'No stub for {}.'.format(api) }
+
+        response._content = json.dumps(body).encode('utf-8')
+
+        return response
+
+
+CLIENT = {
+    'clientId':     1001,
+    'clientName':   'Budget Client',
+    'redirectUris': [ 'https://client.example.com/cb' ],
+}
+
+SERVICE = {
+    'serviceName': 'Budget Service',
+}
+
+RESPONSES = {
+    'auth/authorization': {
+        'action':  'INTERACTION',
+        'ticket':  'TICKET',
+        'client':  CLIENT,
+        'service': SERVICE,
+    },
+    'auth/authorization/issue': {
+        'action':          'LOCATION',
+        'responseContent': 'https://client.example.com/cb?code=CODE',
+    },
+    'auth/authorization/fail': {
+        'action':          'LOCATION',
+        'responseContent': 'https://client.example.com/cb?error=login_required',
+    },
+    'auth/token': {
+        'action':          'OK',
+        'responseContent': '{"access_token":"AT","token_type":"Bearer"}',
+    },
+    'auth/introspection/standard': {
+        'action':          'OK',
+        'responseContent': '{"active":true}',
+    },
+    'auth/revocation': {
+        'action':          'OK',
+        'responseContent': '',
+    },
+    'pushed_auth_req': {
+        'action':          'CREATED',
+        'responseContent': '{"request_uri":"urn:ietf:params:oauth:request_uri:REQ","expires_in":60}',
+    },
+    'auth/userinfo': {
+        'action':  'OK',
+        'subject': None,
+        'claims':  [ 'name', 'email' ],
+    },
+    'auth/userinfo/issue': {
+        'action':          'JSON',
+        'responseContent': '{"sub":"1"}',
+    },
+}
+
+AUTHORIZATION_QUERY = 'response_type=code&client_id=1001&redirect_uri=https://client.example.com/cb'
+BASIC_CREDENTIALS   = 'Basic MTAwMTpzZWNyZXQ='
+
+
+# The manifest of static files exists only after collectstatic.
+STORAGES = dict(settings.STORAGES,
+    staticfiles={ 'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' })
+
+
+# A read replica for the tests of database_router.py, declared as a mirror of
+# the test database of 'default' in django_oauth_server/test_settings.py.
+REPLICA = 'replica'
+
+
+# Settings for tests of flows through the views. Features which would make
+# calls of their own (the client registry, back-channel logout) or reject
+# requests (rate and concurrency limits) are off.
+FLOW_SETTINGS = dict(
+    STORAGES                   = STORAGES,
+    PASSWORD_HASHERS           = [ 'django.contrib.auth.hashers.MD5PasswordHasher' ],
+    AUDIT_SINK                 = None,
+    CLIENT_REGISTRY_REFRESH    = 0,
+    RATE_LIMITS                = {},
+    CONCURRENCY_LIMITS         = {},
+    BACKCHANNEL_LOGOUT_WORKERS = 0)
+
+
+@override_settings(**FLOW_SETTINGS)
+class FlowBudgetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'john', 'john@example.com', 'john', first_name='John', last_name='Smith')
+
+        self.stub   = AuthleteStub(dict(RESPONSES))
+        self.client = Client()
+
+        settings.AUTHLETE_API.setReplayer(self.stub)
+        get_user_claim_cache().clear()
+        get_token_reuse_cache().clear()
+        get_page_fragment_cache().clear()
+
+
+    def tearDown(self):
+        settings.AUTHLETE_API.setReplayer(None)
+
+
+    @contextmanager
+    def assertBudget(self, upstream, queries, sessionWrites):
+        """Assert the Authlete API calls (a list of APIs in the called order),
+        the number of queries and the number of session writes.
+
+        Queries include SAVEPOINT and RELEASE SAVEPOINT issued around a
+        session write.
+        """
+
+        self.stub.calls.clear()
+
+        with CaptureQueriesContext(connection) as captured:
+            yield
+
+        # Sessions are stored in the database (SESSION_ENGINE).
+        writes = [ q for q in captured
+                   if q['sql'].startswith(('INSERT INTO "django_session"', 'UPDATE "django_session"')) ]
+
+        self.assertEqual(upstream, self.stub.calls, 'Authlete API calls')
+        self.assertEqual(queries, len(captured),
+            'Database queries:\n' + '\n'.join(q['sql'] for q in captured))
+        self.assertEqual(sessionWrites, len(writes), 'Session writes')
+
+
+    def login(self):
+        self.client.force_login(self.user)
+
+
+    def test_authorization_with_interaction(self):
+        with self.assertBudget(['auth/authorization'], queries=4, sessionWrites=1):
+            response = self.client.get('/api/authorization?' + AUTHORIZATION_QUERY)
+
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, 'Budget Client')
+
+
+    def test_authorization_with_interaction_logged_in(self):
+        self.login()
+
+        # Including the lookup of a remembered consent.
+        with self.assertBudget(['auth/authorization'], queries=6, sessionWrites=1):
+            response = self.client.get('/api/authorization?' + AUTHORIZATION_QUERY)
+
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, 'Hello John')
+
+
+    def test_authorization_page_client_fragment(self):
+        # The part about the client is rendered once and reused, until the
+        # metadata of the client changes.
+        for name in ('Budget Client', 'Budget Client', 'Renamed Client'):
+            self.stub.responses['auth/authorization'] = dict(RESPONSES['auth/authorization'],
+                client=dict(CLIENT, clientName=name, description='<b>escaped</b>'))
+
+            response = self.client.get('/api/authorization?' + AUTHORIZATION_QUERY)
+
+            self.assertContains(response, '<h3 id="client-name">{}</h3>'.format(name), html=False)
+            self.assertContains(response, '&lt;b&gt;escaped&lt;/b&gt;')
+            self.assertNotContains(response, 'page_fragment_cache.py')
+
+
+    def test_authorization_without_interaction(self):
+        self.login()
+        self.stub.responses['auth/authorization'] = dict(RESPONSES['auth/authorization'],
+            action='NO_INTERACTION')
+
+        with self.assertBudget(['auth/authorization', 'auth/authorization/issue'],
+                               queries=2, sessionWrites=0):
+            response = self.client.get('/api/authorization?prompt=none&' + AUTHORIZATION_QUERY)
+
+        self.assertEqual(302, response.status_code)
+        self.assertEqual('https://client.example.com/cb?code=CODE', response['Location'])
+
+
+    def test_authorization_without_interaction_not_logged_in(self):
+        self.stub.responses['auth/authorization'] = dict(RESPONSES['auth/authorization'],
+            action='NO_INTERACTION')
+
+        with self.assertBudget(['auth/authorization', 'auth/authorization/fail'],
+                               queries=0, sessionWrites=0):
+            response = self.client.get('/api/authorization?prompt=none&' + AUTHORIZATION_QUERY)
+
+        self.assertEqual(302, response.status_code)
+
+
+    def test_authorization_rejected_locally(self):
+        with self.assertBudget([], queries=0, sessionWrites=0):
+            with self.settings(CLIENT_REGISTRY_REFRESH=300):
+                response = self.client.get('/api/authorization?response_type=code')
+
+        self.assertEqual(400, response.status_code)
+
+
+    def test_authorization_rejected_malformed_client_id(self):
+        # A client ID which would change the path of /client/get/{id}.
+        with self.assertBudget([], queries=0, sessionWrites=0):
+            with self.settings(CLIENT_REGISTRY_REFRESH=300):
+                response = self.client.get('/api/authorization?response_type=code&client_id=..%2Fservice%2Fget')
+
+        self.assertEqual(400, response.status_code)
+
+
+    def test_client_registry_refetch(self):
+        # The index was built while the client was locked.
+        self.stub.responses['client/get/list'] = { 'clients': [ dict(CLIENT, locked=True) ], 'totalCount': 1 }
+        self.stub.responses['client/get/1001'] = CLIENT
+
+        registry = ClientRegistry(settings.AUTHLETE_API, refreshInterval=0)
+        registry.refresh()
+
+        self.assertIsNone(registry.check('1001', 'https://client.example.com/cb'))
+        self.assertEqual([ 'client/get/list', 'client/get/1001' ], self.stub.calls)
+
+        # A rejection by the client fetched just now is not checked again.
+        self.assertIsNotNone(registry.check('1001', 'https://client.example.com/other'))
+        self.assertIsNotNone(registry.check('1001', 'https://client.example.com/other'))
+        self.assertEqual([ 'client/get/list', 'client/get/1001' ], self.stub.calls)
+
+
+    def test_authorization_decision(self):
+        # The login rotates the session key, which writes the session twice.
+        self.client.get('/api/authorization?' + AUTHORIZATION_QUERY)
+
+        with self.assertBudget(['auth/authorization/issue'], queries=12, sessionWrites=2):
+            response = self.client.post('/api/authorization/decision',
+                { 'loginId': 'john', 'password': 'john', 'authorized': 'Authorize' })
+
+        self.assertEqual(302, response.status_code)
+        self.assertEqual('https://client.example.com/cb?code=CODE', response['Location'])
+
+
+    def test_authorization_decision_remembered(self):
+        response = self.client.get('/api/authorization?' + AUTHORIZATION_QUERY)
+
+        # The consent is remembered only when the user chooses to.
+        self.assertContains(response, '<input type="checkbox" name="remember">')
+
+        # The consent is stored with update_or_create().
+        with self.assertBudget(['auth/authorization/issue'], queries=18, sessionWrites=2):
+            response = self.client.post('/api/authorization/decision',
+                { 'loginId': 'john', 'password': 'john', 'authorized': 'Authorize', 'remember': 'on' })
+
+        self.assertEqual(302, response.status_code)
+
+        # The authorization page is skipped for the same client and scopes.
+        with self.assertBudget(['auth/authorization', 'auth/authorization/issue'],
+                               queries=3, sessionWrites=0):
+            response = self.client.get('/api/authorization?' + AUTHORIZATION_QUERY)
+
+        self.assertEqual(302, response.status_code)
+        self.assertEqual('https://client.example.com/cb?code=CODE', response['Location'])
+
+        # But not when the client asks for more scopes.
+        self.stub.responses['auth/authorization'] = dict(RESPONSES['auth/authorization'],
+            scopes=[ { 'name': 'email' } ])
+
+        with self.assertBudget(['auth/authorization'], queries=6, sessionWrites=1):
+            response = self.client.get('/api/authorization?' + AUTHORIZATION_QUERY)
+
+        self.assertEqual(200, response.status_code)
+
+        # Nor when it asks for resources or authorization details, which
+        # are not a part of the remembered consent.
+        for extra in ({ 'resources': [ 'https://rs.example.com' ] },
+                      { 'authorizationDetails': { 'elements': [ { 'type': 'payment_initiation' } ] } }):
+            self.stub.responses['auth/authorization'] = dict(RESPONSES['auth/authorization'], **extra)
+
+            response = self.client.get('/api/authorization?' + AUTHORIZATION_QUERY)
+
+            self.assertEqual(200, response.status_code)
+
+
+    def test_authorization_decision_denied(self):
+        self.client.get('/api/authorization?' + AUTHORIZATION_QUERY)
+
+        with self.assertBudget(['auth/authorization/fail'], queries=12, sessionWrites=2):
+            response = self.client.post('/api/authorization/decision',
+                { 'loginId': 'john', 'password': 'john', 'denied': 'Deny' })
+
+        self.assertEqual(302, response.status_code)
+
+
+    def test_end_session(self):
+        self.login()
+        self.stub.responses['client/get/1001'] = dict(CLIENT,
+            customMetadata=json.dumps({ 'post_logout_redirect_uris': [ 'https://client.example.com/bye' ] }))
+
+        params = { 'client_id': '1001', 'post_logout_redirect_uri': 'https://client.example.com/bye', 'state': 'S' }
+
+        # Without a valid 'id_token_hint' of the user, the user is asked to
+        # confirm. Nothing is looked up in Authlete yet.
+        response = self.client.post('/api/logout', params)
+
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, 'name="confirmed"')
+        self.assertContains(response, 'value="https://client.example.com/bye"')
+        self.assertIn('_auth_user_id', self.client.session)
+
+        # Flushing the session reads it again before deleting it. The
+        # registered redirect URIs are looked up in Authlete.
+        with self.assertBudget(['client/get/1001'], queries=4, sessionWrites=0):
+            response = self.client.post('/api/logout', dict(params, confirmed='Log Out'))
+
+        self.assertEqual(302, response.status_code)
+        self.assertEqual('https://client.example.com/bye?state=S', response['Location'])
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+        # A redirect URI which is not registered is not used.
+        self.login()
+        response = self.client.post('/api/logout?client_id=1001&post_logout_redirect_uri=https://evil.example.com/',
+            { 'confirmed': 'Log Out' })
+
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, 'You have been logged out.')
+
+
+    def test_end_session_requires_confirmation(self):
+        self.login()
+
+        # A link or an image pointing to the endpoint does not log the user out.
+        with self.assertBudget([], queries=2, sessionWrites=0):
+            response = self.client.get('/api/logout')
+
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, 'Do you want to log out?')
+        self.assertIn('_auth_user_id', self.client.session)
+
+        # Neither does a cross-site post of the confirmation form.
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+
+        response = client.post('/api/logout', { 'confirmed': 'Log Out' })
+
+        self.assertEqual(403, response.status_code)
+        self.assertIn('_auth_user_id', client.session)
+
+
+    @skipIf(jwt is None, 'PyJWT is not installed.')
+    def test_end_session_with_id_token_hint(self):
+        self.login()
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(key))
+        jwk.update(kid='K1', alg='RS256', use='sig')
+
+        self.stub.responses['service/configuration'] = { 'issuer': 'https://as.example.com' }
+        self.stub.responses['service/jwks/get']      = { 'keys': [ jwk ] }
+        discard_logout_token_issuer(settings.AUTHLETE_API)
+        self.addCleanup(discard_logout_token_issuer, settings.AUTHLETE_API)
+
+        def hint(subject):
+            return jwt.encode({ 'iss': 'https://as.example.com', 'sub': subject, 'aud': '1001' },
+                key, algorithm='RS256', headers={ 'kid': 'K1' })
+
+        # The ID token of another user needs a confirmation.
+        response = self.client.get('/api/logout', { 'id_token_hint': hint('another') })
+
+        self.assertContains(response, 'Do you want to log out?')
+        self.assertIn('_auth_user_id', self.client.session)
+
+        # The ID token of the user does not.
+        response = self.client.get('/api/logout', { 'id_token_hint': hint(str(self.user.id)) })
+
+        self.assertContains(response, 'You have been logged out.')
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+    def test_token(self):
+        with self.assertBudget(['auth/token'], queries=0, sessionWrites=0):
+            response = self.client.post('/api/token', 'grant_type=authorization_code&code=CODE',
+                content_type='application/x-www-form-urlencoded', HTTP_AUTHORIZATION=BASIC_CREDENTIALS)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('AT', json.loads(response.content)['access_token'])
+
+
+    def test_token_rate_limit(self):
+        def post(address):
+            return self.client.post('/api/token', 'grant_type=authorization_code&code=CODE',
+                content_type='application/x-www-form-urlencoded', HTTP_AUTHORIZATION=BASIC_CREDENTIALS,
+                REMOTE_ADDR=address)
+
+        with self.settings(RATE_LIMITS={ 'token': { 'rate': 0.001, 'burst': 1 } }):
+            # Requests which claim the client ID but fail to authenticate
+            # use up the budget of their address only.
+            self.stub.responses['auth/token'] = { 'action': 'INVALID_CLIENT', 'responseContent': '{}' }
+
+            self.assertEqual(401, post('192.0.2.66').status_code)
+            self.assertEqual(429, post('192.0.2.66').status_code)
+
+            # The client itself is not affected.
+            self.stub.responses['auth/token'] = RESPONSES['auth/token']
+
+            self.assertEqual(200, post('192.0.2.1').status_code)
+
+            # Its own requests count, wherever they come from.
+            self.assertEqual(429, post('192.0.2.2').status_code)
+
+
+    def test_rate_limiter_rebuilt_on_change(self):
+        with self.settings(RATE_LIMITS={ 'token': { 'rate': 1, 'max_keys': 10 } }):
+            limiter = get_rate_limiter('token')
+            self.assertIs(limiter, get_rate_limiter('token'))
+
+        with self.settings(RATE_LIMITS={ 'token': { 'rate': 1, 'max_keys': 20 } }):
+            self.assertIsNot(limiter, get_rate_limiter('token'))
+
+
+    def test_token_skips_browser_middleware(self):
+        # The token endpoint is on the fast path for machines. The session
+        # cookie is ignored and no headers for browsers are added.
+        self.login()
+
+        with self.assertBudget(['auth/token'], queries=0, sessionWrites=0):
+            response = self.client.post('/api/token', 'grant_type=client_credentials',
+                content_type='application/x-www-form-urlencoded', HTTP_AUTHORIZATION=BASIC_CREDENTIALS)
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn('X-Frame-Options', response)
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+
+
+    def test_token_fast_path_skips_unused_middleware(self):
+        # Middleware on the fast path which is not used (MiddlewareNotUsed)
+        # is left out of the chain, as Django does.
+        with self.settings(MEMORY_DIAGNOSTICS_ENABLED=False, M2M_MIDDLEWARE=[
+                'api.memory_diagnostics.MemoryDiagnosticsMiddleware',
+                'api.request_deadline.RequestDeadlineMiddleware' ]):
+            middleware = MachineFastPathMiddleware(lambda request: HttpResponse(status=418))
+
+        request = RequestFactory().post('/api/token', 'grant_type=authorization_code&code=CODE',
+            content_type='application/x-www-form-urlencoded', HTTP_AUTHORIZATION=BASIC_CREDENTIALS)
+
+        with self.assertBudget(['auth/token'], queries=0, sessionWrites=0):
+            response = middleware(request)
+
+        self.assertEqual(200, response.status_code)
+
+
+    @override_settings(CLIENT_CREDENTIALS_REUSE={ '1001': 60 })
+    def test_token_client_credentials_reused(self):
+        self.stub.responses['auth/token'] = dict(RESPONSES['auth/token'],
+            responseContent='{"access_token":"AT","token_type":"Bearer","expires_in":3600}')
+
+        def request(body):
+            return self.client.post('/api/token', body,
+                content_type='application/x-www-form-urlencoded', HTTP_AUTHORIZATION=BASIC_CREDENTIALS)
+
+        with self.assertBudget(['auth/token'], queries=0, sessionWrites=0):
+            request('grant_type=client_credentials&scope=read+write')
+
+        # An identical request (the order of scopes does not matter).
+        with self.assertBudget([], queries=0, sessionWrites=0):
+            response = request('grant_type=client_credentials&scope=write+read')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('AT', json.loads(response.content)['access_token'])
+
+        # Different scopes.
+        with self.assertBudget(['auth/token'], queries=0, sessionWrites=0):
+            request('grant_type=client_credentials&scope=read')
+
+        # A revocation request which fails to authenticate the client does
+        # not drop the tokens kept for reuse.
+        def revoke():
+            return self.client.post('/api/revocation', 'token=AT',
+                content_type='application/x-www-form-urlencoded', HTTP_AUTHORIZATION=BASIC_CREDENTIALS)
+
+        self.stub.responses['auth/revocation'] = { 'action': 'INVALID_CLIENT', 'responseContent': '{}' }
+        self.assertEqual(401, revoke().status_code)
+
+        with self.assertBudget([], queries=0, sessionWrites=0):
+            request('grant_type=client_credentials&scope=read')
+
+        # A successful one does.
+        self.stub.responses['auth/revocation'] = RESPONSES['auth/revocation']
+        self.assertEqual(200, revoke().status_code)
+
+        with self.assertBudget(['auth/token'], queries=0, sessionWrites=0):
+            request('grant_type=client_credentials&scope=read')
+
+
+    def test_introspection(self):
+        with self.assertBudget(['auth/introspection/standard'], queries=0, sessionWrites=0):
+            response = self.client.post('/api/introspection', 'token=AT',
+                content_type='application/x-www-form-urlencoded', HTTP_AUTHORIZATION=BASIC_CREDENTIALS)
+
+        self.assertEqual(200, response.status_code)
+
+
+    def test_pushed_authorization(self):
+        with self.assertBudget(['pushed_auth_req'], queries=0, sessionWrites=0):
+            response = self.client.post('/api/par', AUTHORIZATION_QUERY,
+                content_type='application/x-www-form-urlencoded', HTTP_AUTHORIZATION=BASIC_CREDENTIALS)
+
+        self.assertEqual(201, response.status_code)
+        self.assertIn('request_uri', json.loads(response.content))
+
+
+    def test_revocation(self):
+        with self.assertBudget(['auth/revocation'], queries=0, sessionWrites=0):
+            response = self.client.post('/api/revocation', 'token=AT',
+                content_type='application/x-www-form-urlencoded', HTTP_AUTHORIZATION=BASIC_CREDENTIALS)
+
+        self.assertEqual(200, response.status_code)
+
+
+    def test_userinfo(self):
+        self.stub.responses['auth/userinfo'] = dict(RESPONSES['auth/userinfo'],
+            subject=str(self.user.pk))
+
+        # The claims of the user are loaded once and then cached.
+        for queries in (1, 0):
+            with self.assertBudget(['auth/userinfo', 'auth/userinfo/issue'],
+                                   queries=queries, sessionWrites=0):
+                response = self.client.get('/api/userinfo', HTTP_AUTHORIZATION='Bearer AT')
+
+            self.assertEqual(200, response.status_code)
+
+
+class AuthleteRegion(BaseHTTPRequestHandler):
+    """An HTTP server which answers every Authlete API call with 'OK', or
+    with the server's 'status' if it is set."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests = getattr(self.server, 'requests', 0) + 1
+
+        body = json.dumps({ 'action': 'OK', 'responseContent': '{}' }).encode('utf-8')
+
+        self.send_response(getattr(self.server, 'status', 200))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def log_message(self, *args):
+        pass
+
+
+class EndpointFailoverTest(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), AuthleteRegion)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        # A port on which nothing listens.
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.down = 'http://127.0.0.1:{}'.format(sock.getsockname()[1])
+
+        self.up = 'http://127.0.0.1:{}'.format(self.server.server_port)
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def test_failover(self):
+        api = PooledAuthleteApi(AuthleteIniConfiguration())
+        api.getSettings().connectionTimeout = 1.0
+        api.getSettings().readTimeout       = 1.0
+
+        selector = AuthleteEndpointSelector([ self.down, self.up ], probeInterval=0)
+        api.setEndpointSelector(selector)
+
+        # The first call fails over from the endpoint which is down, and the
+        # following calls go to the endpoint which is up first.
+        for _ in range(2):
+            self.assertEqual('OK', api.postServiceApi('auth/token', b'{}')['action'])
+
+        self.assertEqual([ self.up, self.down ], selector.candidates())
+        api.close()
+
+
+    def test_no_fork_hook_per_selector(self):
+        # Fork hooks cannot be unregistered, so selectors don't add their own.
+        with mock.patch('os.register_at_fork') as register:
+            selector = AuthleteEndpointSelector([ self.down, self.up ], probeInterval=0)
+
+        register.assert_not_called()
+        self.assertIn(selector, authlete_endpoint_selector._instances)
+
+
+    def test_no_failover_after_processing(self):
+        failing = ThreadingHTTPServer(('127.0.0.1', 0), AuthleteRegion)
+        threading.Thread(target=failing.serve_forever, daemon=True).start()
+        self.addCleanup(failing.server_close)
+        self.addCleanup(failing.shutdown)
+
+        api = PooledAuthleteApi(AuthleteIniConfiguration())
+        api.getSettings().connectionTimeout = 1.0
+        api.getSettings().readTimeout       = 1.0
+        api.setEndpointSelector(AuthleteEndpointSelector(
+            [ 'http://127.0.0.1:{}'.format(failing.server_port), self.up ], probeInterval=0))
+
+        # A POST which may have been processed (502) is not sent again.
+        failing.status = 502
+
+        with self.assertRaises(AuthleteApiException):
+            api.postServiceApi('auth/token', b'{}')
+
+        self.assertEqual(1, failing.requests)
+        self.assertEqual(0, getattr(self.server, 'requests', 0))
+
+        # A POST which was refused (503) is.
+        failing.status = 503
+
+        self.assertEqual('OK', api.postServiceApi('auth/token', b'{}')['action'])
+        self.assertEqual(1, self.server.requests)
+        api.close()
+
+
+def access_token(clientId, subject, hash):
+    return { 'clientId': clientId, 'subject': subject, 'accessTokenHash': hash }
+
+
+class BulkRevokerTest(SimpleTestCase):
+    def setUp(self):
+        self.stub = AuthleteStub({})
+        self.api  = PooledAuthleteApi(AuthleteIniConfiguration())
+        self.api.setReplayer(self.stub)
+
+
+    def tearDown(self):
+        self.api.close()
+
+
+    def test_revoke_and_resume(self):
+        a1, a2, a3 = (access_token(1001, '1', hash) for hash in ('A1', 'A2', 'A3'))
+        b1 = access_token(1002, '1', 'B1')
+        c1 = access_token(1003, None, 'C1')
+
+        # Revoked tokens disappear from the list, so the first page is listed
+        # again until only tokens of failed units are left on it.
+        self.stub.responses = {
+            'auth/token/get/list': [
+                { 'accessTokens': [ a1, a2 ], 'totalCount': 4 },
+                { 'accessTokens': [ b1, c1 ], 'totalCount': 2 },
+                { 'accessTokens': [ b1 ],     'totalCount': 1 },
+                { 'accessTokens': [],         'totalCount': 1 },
+            ],
+            'auth/token/revoke': [ { 'count': 2 }, None, { 'count': 1 } ],
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            state   = os.path.join(directory, 'state.jsonl')
+            revoker = BulkRevoker(self.api, concurrency=1, pageSize=2, statePath=state)
+
+            with self.assertLogs('api.bulk_revoker', 'WARNING'):
+                stats = revoker.revoke(subject='1')
+
+            self.assertEqual({ 'units': 2, 'revoked': 3, 'failed': 1, 'resumed': 0, 'total': 4 }, stats)
+
+            # A token issued to the pair (1001, '1') after it was revoked is
+            # revoked again, and the failed unit is retried.
+            self.stub.responses = {
+                'auth/token/get/list': [
+                    { 'accessTokens': [ a3, b1 ], 'totalCount': 2 },
+                    { 'accessTokens': [],         'totalCount': 0 },
+                ],
+                'auth/token/revoke': [ { 'count': 1 }, { 'count': 1 } ],
+            }
+
+            stats = revoker.revoke(subject='1')
+
+            self.assertEqual({ 'units': 2, 'revoked': 2, 'failed': 0, 'resumed': 1, 'total': 2 }, stats)
+            self.assertEqual([], self.stub.responses['auth/token/revoke'])
+
+
+class TrafficRecorderTest(SimpleTestCase):
+    def test_userinfo_redacted(self):
+        claims = {
+            'sub':          'john',
+            'name':         'John Smith',
+            'email':        'john@example.com',
+            'phone_number': '+1 555 0100',
+            'birthdate':    '1970-01-01',
+            'address':      { 'street_address': '1 Main Street' },
+            'nickname':     'Johnny',
+        }
+
+        def response(body):
+            response = requests.Response()
+            response.status_code = 200
+            response._content    = json.dumps(body).encode('utf-8')
+            return response
+
+        with tempfile.NamedTemporaryFile(suffix='.jsonl') as file:
+            recorder = AuthleteTrafficRecorder(file.name)
+
+            # The calls of the userinfo endpoint to Authlete.
+            recorder.record('POST', 'auth/userinfo', json.dumps({ 'token': 'AT' }), response({
+                'action':         'OK',
+                'subject':        'john',
+                'claims':         [ 'name', 'email' ],
+                'userInfoClaims': json.dumps({ 'nickname': { 'value': 'Johnny' } }),
+            }), 0.01)
+
+            recorder.record('POST', 'auth/userinfo/issue', json.dumps({
+                'token':  'AT',
+                'claims': json.dumps(claims),
+                'sub':    'john',
+            }), response({
+                'action':          'JSON',
+                'responseContent': json.dumps(claims),
+            }), 0.01)
+
+            recorded = file.read().decode('utf-8')
+
+        self.assertEqual(2, len(recorded.splitlines()))
+
+        for name, value in claims.items():
+            for text in (value.values() if isinstance(value, dict) else [ value ]):
+                self.assertNotIn(text, recorded)
+
+
+@override_settings(STORAGES=STORAGES)
+class MemoryDiagnosticsTest(TestCase):
+    def setUp(self):
+        self.diagnostics = MemoryDiagnostics()
+        self.staff       = User.objects.create_user('staff', is_staff=True)
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.addCleanup(tracemalloc.stop)
+
+
+    def test_enter_leave(self):
+        # A request alone is attributed to its view.
+        started, token = self.diagnostics.enter()
+        kept = bytearray(1000000)
+        self.diagnostics.leave('alone', started, token)
+
+        # Overlapping requests are only counted.
+        first  = self.diagnostics.enter()
+        second = self.diagnostics.enter()
+        self.diagnostics.leave('second', *second)
+        self.diagnostics.leave('first', *first)
+
+        stats = { s['view']: s for s in self.diagnostics.viewStats() }
+
+        self.assertEqual((1, 0), (stats['alone']['requests'], stats['alone']['overlapped']))
+        self.assertGreaterEqual(stats['alone']['net'], len(kept))
+        self.assertGreaterEqual(stats['alone']['max_peak'], len(kept))
+
+        for view in ('first', 'second'):
+            self.assertEqual((1, 1, 0), (stats[view]['requests'], stats[view]['overlapped'], stats[view]['net']))
+
+
+    def test_view_rejects_bad_parameters(self):
+        self.diagnostics.takeSnapshot('S')
+
+        for query in ('top=S&limit=abc', 'top=S&limit=0', 'top=S&limit=-1', 'top=S&group=size', 'objects=1&limit=x'):
+            request = RequestFactory().get('/admin/memory/?' + query)
+            request.user      = self.staff
+            request._messages = CookieStorage(request)
+
+            response = memory_diagnostics_view(request)
+
+            self.assertEqual(200, response.status_code, query)
+            self.assertEqual(1, len(list(request._messages)), query)
+
+
+@override_settings(DATABASE_REPLICAS=[ REPLICA ])
+class DatabaseRouterTest(TransactionTestCase):
+    # The replica is another connection to the test database, which does not
+    # see what is in the transaction of a TestCase.
+    databases = { 'default', REPLICA }
+
+
+    def setUp(self):
+        self.user = User.objects.create_user('john', 'john@example.com')
+
+
+    def request(self, view, session=None):
+        request = RequestFactory().get('/')
+        request.session = session if session is not None else SessionStore()
+
+        return ReplicaStickinessMiddleware(view)(request), request
+
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(REPLICA, User.objects.all().db)
+
+        # Models which are not routed are read from the primary.
+        self.assertEqual('default', Session.objects.all().db)
+
+
+    def test_write_sticks_to_primary(self):
+        databases = []
+
+        def view(request):
+            databases.append(User.objects.all().db)
+            User.objects.filter(pk=self.user.pk).update(last_login=timezone.now())
+            databases.append(User.objects.all().db)
+            return HttpResponse()
+
+        _, request = self.request(view)
+
+        # Reads go to the primary for the rest of the request...
+        self.assertEqual([ REPLICA, 'default' ], databases)
+        self.assertGreater(request.session['_replica_sticky_until'], time.time())
+
+        # ...and for a while in the same session.
+        self.request(lambda request: HttpResponse(databases.append(User.objects.all().db)), request.session)
+
+        self.assertEqual('default', databases[-1])
+
+        # Requests of other sessions are not affected.
+        self.request(lambda request: HttpResponse(databases.append(User.objects.all().db)))
+
+        self.assertEqual(REPLICA, databases[-1])
+
+
+    def test_no_migration_to_replica(self):
+        self.assertIs(False, router.allow_migrate(REPLICA, 'auth', model_name='user'))
+        self.assertIs(True, router.allow_migrate('default', 'auth', model_name='user'))
+
+
+    # A boto3 client would need an AWS region even though no Cognito API is
+    # called.
+    @mock.patch.object(CognitoBackend, 'get_cognito_client', return_value=None)
+    def test_cognito_backend(self, _):
+        build = CognitoBackend()._CognitoBackend__build_user
+
+        # A new user is created in the primary.
+        with CaptureQueriesContext(connection) as captured:
+            user = build('jane', [ (StandardClaims.EMAIL, 'jane@example.com') ])
+
+        self.assertEqual('jane@example.com', User.objects.using('default').get(username='jane').email)
+        self.assertEqual(user.pk, User.objects.get(username='jane').pk)
+
+        # Only the attributes which changed are written.
+        with CaptureQueriesContext(connection) as captured:
+            build('john', [ (StandardClaims.EMAIL, 'john@example.com'), (StandardClaims.GIVEN_NAME, 'John') ])
+
+        updates = [ q['sql'] for q in captured.captured_queries if q['sql'].startswith('UPDATE') ]
+
+        self.assertEqual(1, len(updates))
+        self.assertIn('"first_name"', updates[0])
+        self.assertNotIn('"email"', updates[0])
+        self.assertNotIn('"password"', updates[0])
+
+        # Nothing is written when nothing changed.
+        with CaptureQueriesContext(connection) as captured:
+            build('john', [ (StandardClaims.GIVEN_NAME, 'John') ])
+
+        self.assertFalse([ q for q in captured.captured_queries if q['sql'].startswith('UPDATE') ])
+
+
+@skipIf(jwt is None, 'PyJWT is not installed.')
+class CognitoIdTokenVerifierTest(SimpleTestCase):
+    def test_jwks_timeout(self):
+        # A JWK Set endpoint which accepts connections but never responds.
+        with socket.socket() as server:
+            server.bind(('127.0.0.1', 0))
+            server.listen()
+
+            verifier = CognitoIdTokenVerifier('us-east-1_Pool', 'client', timeout=30)
+            verifier._issuer = 'http://127.0.0.1:{}'.format(server.getsockname()[1])
+
+            token   = jwt.encode({ 'sub': '1' }, 'secret', algorithm='HS256', headers={ 'kid': 'K1' })
+            started = time.monotonic()
+
+            self.assertIsNone(verifier.verify(token, timeout=0.2))
+            self.assertLess(time.monotonic() - started, 5)
+
+
+class RelyingParty(BaseHTTPRequestHandler):
+    """A client application which receives logout tokens. It fails the first
+    'failures' deliveries with 503."""
+
+    def do_POST(self):
+        body   = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+        server = self.server
+
+        if server.failures > 0:
+            server.failures -= 1
+            self.send_response(503)
+        else:
+            server.tokens.append(body.split('=', 1)[1])
+            server.received.set()
+            self.send_response(200)
+
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+    def log_message(self, *args):
+        pass
+
+
+@skipIf(jwt is None, 'PyJWT is not installed.')
+@override_settings(AUDIT_SINK=None, BACKCHANNEL_LOGOUT_URIS={}, LOGOUT_TOKEN_KEY_ID=None)
+class BackchannelLogoutTest(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RelyingParty)
+        self.server.failures = 0
+        self.server.tokens   = []
+        self.server.received = threading.Event()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self.key))
+        jwk.update(kid='K1', alg='RS256', use='sig')
+
+        client = dict(CLIENT, customMetadata=json.dumps(
+            { 'backchannel_logout_uri': 'http://127.0.0.1:{}/logout'.format(self.server.server_port) }))
+
+        self.stub = AuthleteStub({
+            'service/configuration':         { 'issuer': 'https://as.example.com' },
+            'service/jwks/get':              { 'keys': [ jwk ] },
+            'client/authorization/get/list': { 'clients': [ client, { 'clientId': 1002 } ], 'totalCount': 2 },
+        })
+
+        self.api = PooledAuthleteApi(AuthleteIniConfiguration())
+        self.api.setReplayer(self.stub)
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.api.close()
+
+
+    def test_notify(self):
+        # The first delivery fails and is retried.
+        self.server.failures = 1
+
+        notifier = BackchannelLogoutNotifier(self.api, workers=2, timeout=1.0, retries=1)
+        self.assertTrue(notifier.notify('1'))
+        self.assertTrue(self.server.received.wait(10))
+
+        # Only the client with a back-channel logout URI is notified.
+        self.assertEqual(1, len(self.server.tokens))
+
+        claims = jwt.decode(self.server.tokens[0], self.key.public_key(),
+            algorithms=[ 'RS256' ], audience='1001', issuer='https://as.example.com')
+
+        self.assertEqual('1', claims['sub'])
+        self.assertIn(BACKCHANNEL_LOGOUT_EVENT, claims['events'])
+        self.assertNotIn('nonce', claims)
+        self.assertEqual('logout+jwt', jwt.get_unverified_header(self.server.tokens[0])['typ'])
+
+
+    def test_notify_retries_resolution(self):
+        # Listing the clients of the subject fails once.
+        clients = self.stub.responses.pop('client/authorization/get/list')
+
+        notifier = BackchannelLogoutNotifier(self.api, workers=2, timeout=1.0, retries=1)
+        self.assertTrue(notifier.notify('1'))
+
+        deadline = time.monotonic() + 10
+        while 'client/authorization/get/list' not in self.stub.calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.stub.responses['client/authorization/get/list'] = clients
+
+        self.assertTrue(self.server.received.wait(10))
+        self.assertEqual(2, self.stub.calls.count('client/authorization/get/list'))
+        self.assertEqual(1, len(self.server.tokens))
+
+
+    def test_reset_after_fork(self):
+        notifier = BackchannelLogoutNotifier(self.api, workers=0)
+        notifier.notify('1')
+
+        notifier._reset_after_fork()
+
+        # The job of the parent process is not done again in the child.
+        self.assertTrue(notifier._jobs.empty())
+
+
+TENANTS = {
+    'acme': {
+        'hosts':         [ 'acme.example.com' ],
+        'configuration': { 'baseUrl': 'https://acme.example.com', 'serviceApiKey': 'K', 'serviceApiSecret': 'S' },
+    },
+}
+
+
+@override_settings(**FLOW_SETTINGS,
+    ALLOWED_HOSTS              = [ 'testserver', 'acme.example.com' ],
+    AUTHLETE_TENANTS           = TENANTS,
+    AUTHLETE_TENANT_RESOLUTION = 'path')
+class TenantTest(TestCase):
+    def setUp(self):
+        self.stub       = AuthleteStub(dict(RESPONSES))
+        self.tenantStub = AuthleteStub(dict(RESPONSES))
+        self.registry   = get_tenant_registry()
+        self.client     = Client()
+
+        settings.AUTHLETE_API.setReplayer(self.stub)
+
+        tenant = self.registry.acquire('acme')
+        tenant.api.setReplayer(self.tenantStub)
+        self.registry.release(tenant)
+
+
+    def tearDown(self):
+        settings.AUTHLETE_API.setReplayer(None)
+        self.registry.evict('acme')
+
+
+    def token(self, path, **extra):
+        return self.client.post(path, 'grant_type=client_credentials',
+            content_type='application/x-www-form-urlencoded', HTTP_AUTHORIZATION=BASIC_CREDENTIALS, **extra)
+
+
+    def test_path(self):
+        self.assertEqual(200, self.token('/acme/api/token').status_code)
+        self.assertEqual([ 'auth/token' ], self.tenantStub.calls)
+        self.assertEqual([], self.stub.calls)
+
+        # Requests of no tenant go to the default service.
+        self.assertEqual(200, self.token('/api/token').status_code)
+        self.assertEqual([ 'auth/token' ], self.stub.calls)
+
+        # URLs on the authorization page keep the name of the tenant.
+        response = self.client.get('/acme/api/authorization?' + AUTHORIZATION_QUERY)
+        self.assertContains(response, 'action="/acme/api/authorization/decision"')
+
+
+    def test_host(self):
+        with self.settings(AUTHLETE_TENANT_RESOLUTION='host'):
+            self.assertEqual(200, self.token('/api/token', HTTP_HOST='acme.example.com').status_code)
+
+        self.assertEqual([ 'auth/token' ], self.tenantStub.calls)
+        self.assertEqual([], self.stub.calls)
+
+
+    def test_eviction(self):
+        tenant = self.registry.acquire('acme')
+        api    = tenant.api
+
+        # Not while it is serving a request.
+        self.assertFalse(self.registry.evict('acme'))
+
+        self.registry.release(tenant)
+        self.assertTrue(self.registry.evict('acme'))
+        self.assertNotIn('acme', self.registry.stats())
+
+        # Set up again on the next request.
+        tenant = self.registry.acquire('acme')
+        self.registry.release(tenant)
+        self.assertIsNot(api, tenant.api)
+
+
+    def test_service_apis(self):
+        apis = dict(service_apis())
+
+        self.assertIs(settings.AUTHLETE_API, apis[None])
+
+        # A tenant is set up like the default service.
+        self.registry.evict('acme')
+        tenant = self.registry.acquire('acme')
+        self.registry.release(tenant)
+
+        self.assertIs(self.stub, tenant.api.getReplayer())
+        self.assertEqual(settings.AUTHLETE_API.getSettings().readTimeout, tenant.api.getSettings().readTimeout)
+
+
+    def test_revoke_tokens_command(self):
+        for stub in (self.stub, self.tenantStub):
+            stub.responses['auth/token/get/list'] = { 'accessTokens': [], 'totalCount': 0 }
+
+        call_command('revoke_tokens', subject='1', tenant='acme', stdout=StringIO())
+
+        self.assertEqual([], self.stub.calls)
+        self.assertEqual([ 'auth/token/get/list' ], self.tenantStub.calls)
+
+        call_command('revoke_tokens', subject='1', all_tenants=True, stdout=StringIO())
+
+        self.assertEqual([ 'auth/token/get/list' ], self.stub.calls)
+        self.assertEqual([ 'auth/token/get/list' ] * 2, self.tenantStub.calls)
+
+        with self.assertRaises(CommandError):
+            call_command('revoke_tokens', subject='1', tenant='unknown', stdout=StringIO())
+
+
+    def test_admin_actions(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.force_login(admin)
+
+        # The tokens are revoked in every service.
+        self.client.post('/admin/auth/user/', { 'action': 'revoke_tokens', '_selected_action': [ admin.pk ] })
+
+        self.assertTrue(self.stub.calls)
+        self.assertEqual(self.stub.calls, self.tenantStub.calls)
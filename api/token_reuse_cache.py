@@ -0,0 +1,169 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Reuse of access tokens issued by the client credentials flow.
+#
+# Some clients request a new token for every call instead of caching it.
+# For the clients listed in settings.CLIENT_CREDENTIALS_REUSE, the token
+# endpoint remembers the response to a client credentials request for the
+# configured number of seconds and returns it again, with a smaller
+# 'expires_in', to an identical request: the same client, the same client
+# secret, the same client authentication method and the same parameters
+# (e.g. 'scope' and 'resource').
+#
+# Only requests authenticated with a client secret (client_secret_basic or
+# client_secret_post) are eligible. Requests with a client assertion, a
+# client certificate or a DPoP proof are not, because the token issued for
+# them is bound to something which is not repeated in an identical request.
+# Responses with a refresh token or without 'expires_in' are not reused, nor
+# are tokens which would expire within MIN_REMAINING seconds.
+#
+# Entries of a client are dropped when the client calls the revocation
+# endpoint of the same process. A token revoked in another way (e.g. by
+# 'python manage.py revoke_tokens') may still be returned until the window
+# of the client ends, so keep the window short.
+
+
+import hashlib
+import json
+import threading
+import time
+from collections                         import OrderedDict
+from urllib.parse                        import parse_qsl
+from django.conf                         import settings
+from authlete.django.web.request_utility import RequestUtility
+
+
+# Tokens which expire sooner are not reused.
+MIN_REMAINING = 30
+
+
+class ReusableRequest(object):
+    __slots__ = ('clientId', 'key', 'window')
+
+
+    def __init__(self, clientId, key, window):
+        self.clientId = clientId
+        self.key      = key
+        self.window   = window
+
+
+class TokenReuseCache(object):
+    def __init__(self, maxEntries=10000):
+        self._maxEntries = maxEntries
+        self._entries    = OrderedDict()
+        self._lock       = threading.Lock()
+
+
+    def reusable(self, request):
+        """Check if the response to the token request may be reused.
+
+        Returns:
+            ReusableRequest : None if the response must not be reused.
+        """
+
+        policy = getattr(settings, 'CLIENT_CREDENTIALS_REUSE', None)
+        if not policy:
+            return None
+
+        if request.headers.get('DPoP') or RequestUtility.extractClientCert(request):
+            return None
+
+        params = parse_qsl(RequestUtility.extractRequestBody(request) or '', keep_blank_values=True)
+        names  = dict(params)
+
+        if names.get('grant_type') != 'client_credentials' or 'client_assertion' in names:
+            return None
+
+        credentials = RequestUtility.extractBasicCredentials(request)
+
+        if credentials.userId is not None:
+            clientId, secret, method = credentials.userId, credentials.password, 'basic'
+        elif names.get('client_id') and names.get('client_secret'):
+            clientId, secret, method = names['client_id'], names['client_secret'], 'post'
+        else:
+            return None
+
+        window = policy.get(clientId)
+        if not window:
+            return None
+
+        # The other parameters in a canonical order. Scopes are a set.
+        others = sorted(
+            (k, ' '.join(sorted(v.split())) if k == 'scope' else v)
+            for k, v in params if k not in ('client_id', 'client_secret'))
+
+        key = hashlib.sha256(json.dumps(
+            [ clientId, secret, method, others ]).encode('utf-8')).hexdigest()
+
+        return ReusableRequest(clientId, key, window)
+
+
+    def get(self, reusable):
+        """Get the response content to return again, or None."""
+
+        with self._lock:
+            entry = self._entries.get(reusable.key)
+            if entry is None:
+                return None
+
+            storedAt, clientId, token = entry
+            age = time.monotonic() - storedAt
+
+            if age >= reusable.window or token['expires_in'] - age < MIN_REMAINING:
+                del self._entries[reusable.key]
+                return None
+
+        return json.dumps(dict(token, expires_in=int(token['expires_in'] - age)))
+
+
+    def put(self, reusable, content):
+        try:
+            token = json.loads(content)
+        except ValueError:
+            return
+
+        if not isinstance(token.get('expires_in'), int) or 'refresh_token' in token:
+            return
+
+        with self._lock:
+            self._entries[reusable.key] = (time.monotonic(), reusable.clientId, token)
+            self._entries.move_to_end(reusable.key)
+
+            while len(self._entries) > self._maxEntries:
+                self._entries.popitem(last=False)
+
+
+    def invalidate(self, clientId):
+        """Drop the entries of the client."""
+
+        with self._lock:
+            for key in [ k for k, e in self._entries.items() if e[1] == clientId ]:
+                del self._entries[key]
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = TokenReuseCache()
+
+
+def get_token_reuse_cache():
+    """Get the TokenReuseCache shared in the process."""
+    return _cache
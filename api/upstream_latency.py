@@ -0,0 +1,164 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Timeouts of calls to upstream services (Authlete APIs and Cognito APIs).
+#
+# `upstream_timeout(key, limit)` gives the timeout of a call: the configured
+# timeout `limit`, or the time left before the deadline of the request (see
+# request_deadline.py) if it is shorter. DeadlineExceeded is raised when no
+# time is left, so that no work is done for a caller which has already given
+# up.
+#
+# Optionally (settings.UPSTREAM_TIMEOUT_TIGHTENING), the timeout is tightened
+# further from the observed latencies of the same upstream API: latencies of
+# recent calls are kept per key, and the timeout becomes `multiplier` times
+# their percentile (p99 by default), but not shorter than `minimum`. A call
+# which would take far longer than usual is abandoned early, leaving time for
+# the rest of the request.
+
+
+import threading
+from collections       import deque
+from django.conf       import settings
+from .request_deadline import DeadlineExceeded, remaining
+
+
+class UpstreamLatency(object):
+    def __init__(self, window=1000, percentile=99, multiplier=2.0, minimum=0.5,
+                 min_samples=100, refresh=50):
+        self._window     = window
+        self._percentile = percentile
+        self._multiplier = multiplier
+        self._minimum    = minimum
+        self._minSamples = min_samples
+        self._refresh    = refresh
+        self._samples    = {}
+        self._cached     = {}
+        self._lock       = threading.Lock()
+
+
+    def observe(self, key, seconds):
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self._window)
+
+            samples.append(seconds)
+
+            # Sorting the window at every call would be wasteful. The
+            # percentile is recomputed every 'refresh' samples.
+            entry = self._cached.get(key)
+            if entry is None or self._refresh <= entry[1]:
+                self._cached[key] = (self.__compute(samples), 0)
+            else:
+                self._cached[key] = (entry[0], entry[1] + 1)
+
+
+    def percentile(self, key):
+        """Get the observed percentile latency of the key in seconds, or None
+        if not enough calls have been observed yet."""
+
+        entry = self._cached.get(key)
+
+        return entry[0] if entry is not None else None
+
+
+    def timeout(self, key, limit):
+        """Get `limit` tightened by the observed latency of the key."""
+
+        observed = self.percentile(key)
+        if observed is None:
+            return limit
+
+        return min(limit, max(self._minimum, observed * self._multiplier))
+
+
+    def stats(self):
+        with self._lock:
+            return { key: {
+                'samples':    len(samples),
+                'percentile': self.percentile(key),
+            } for key, samples in self._samples.items() }
+
+
+    def __compute(self, samples):
+        if len(samples) < self._minSamples:
+            return None
+
+        ordered = sorted(samples)
+        index   = min(len(ordered) - 1, int(len(ordered) * self._percentile / 100))
+
+        return ordered[index]
+
+
+_latency = None
+_latencyLock = threading.Lock()
+
+
+def get_upstream_latency():
+    """Get the process-wide UpstreamLatency, or None if tightening is disabled."""
+
+    global _latency
+
+    options = getattr(settings, 'UPSTREAM_TIMEOUT_TIGHTENING', None)
+    if not options:
+        return None
+
+    entry = _latency
+    if entry is not None and entry[0] == options:
+        return entry[1]
+
+    # Build (or rebuild after a configuration change) the tracker.
+    with _latencyLock:
+        if _latency is None or _latency[0] != options:
+            _latency = (options, UpstreamLatency(**options))
+
+        return _latency[1]
+
+
+def upstream_timeout(key, limit):
+    """Get the timeout of a call to the upstream API.
+
+    Args:
+        key (str) : The identifier of the upstream API, e.g. 'authlete:auth/token'.
+        limit (float) : The configured timeout in seconds.
+
+    Returns:
+        float : The timeout in seconds.
+
+    Raises:
+        DeadlineExceeded : The deadline of the request has passed.
+    """
+
+    latency = get_upstream_latency()
+    if latency is not None:
+        limit = latency.timeout(key, limit)
+
+    timeout = remaining(limit)
+    if timeout is not None and timeout <= 0:
+        raise DeadlineExceeded(
+            "The deadline passed before calling '{}'.".format(key))
+
+    return timeout
+
+
+def observe_upstream(key, seconds):
+    """Record the latency of a call to the upstream API."""
+
+    latency = get_upstream_latency()
+    if latency is not None:
+        latency.observe(key, seconds)
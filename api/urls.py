@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2019 Authlete, Inc.
+# Copyright (C) 2019-2026 Authlete, Inc.
 #
 # Licensed under the Apache License, Version 2.0 (the "License");
 # you may not use this file except in compliance with the License.
@@ -25,6 +25,9 @@ urlpatterns = [
     path('authorization/decision', views.authorization_decision, name='authorization_decision'),
     path('jwks',                   views.jwks),
     path('introspection',          views.introspection),
+    path('logout',                 views.end_session, name='end_session'),
+    path('par',                    views.par),
     path('revocation',             views.revocation),
     path('token',                  views.token),
+    path('userinfo',               views.userinfo),
 ]
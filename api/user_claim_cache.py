@@ -0,0 +1,188 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Claims of users resolved from Django User objects, cached per subject.
+#
+# The authorization endpoint (to embed claims in ID tokens) and the userinfo
+# endpoint resolve claims of a user through `user_claims(user)`. The claims
+# of a subject are cached for settings.USERINFO_CLAIMS_TTL seconds so that
+# repeated userinfo requests don't hit the database.
+#
+# The cache entry of a user is deleted when the User object is saved or
+# deleted (see ApiConfig.ready()). Note that QuerySet.update() does not send
+# the signals, so changes made by it are reflected after the TTL.
+#
+# By default, entries are held in the memory of each process, where a change
+# made in another worker process is reflected after the TTL. To share the
+# entries among worker processes, set USERINFO_CLAIMS_CACHE to the alias of
+# a cache in CACHES.
+
+
+import threading
+import time
+from collections                    import OrderedDict
+from django.conf                    import settings
+from django.contrib.auth.models     import User
+from django.core.cache              import caches
+from authlete.types.standard_claims import StandardClaims
+
+
+def user_claims(user):
+    """Get the claims of the user.
+
+    If you want to support more claims, customize the User object and add
+    the claims here.
+
+    Returns:
+        dict : Claim names and their values. Claims whose value is not
+               available are not included.
+    """
+
+    claims = {}
+
+    if user.first_name and user.last_name:
+        claims[StandardClaims.NAME] = '{} {}'.format(user.first_name, user.last_name)
+
+    if user.first_name:
+        claims[StandardClaims.GIVEN_NAME] = user.first_name
+
+    if user.last_name:
+        claims[StandardClaims.FAMILY_NAME] = user.last_name
+
+    if user.email:
+        claims[StandardClaims.EMAIL] = user.email
+
+    return claims
+
+
+class UserClaimCache(object):
+    # The value cached for a subject which has no user. (None means that the
+    # subject is not cached.)
+    NO_USER = False
+
+
+    def __init__(self, maxEntries=10000):
+        self._maxEntries = maxEntries
+        self._entries    = OrderedDict()
+        self._lock       = threading.Lock()
+
+
+    def get(self, subject):
+        """Get the claims of the user identified by the subject.
+
+        Returns:
+            dict : The claims, or None if there is no such user.
+        """
+
+        key     = str(subject)
+        entries = self.__sharedCache()
+
+        if entries is not None:
+            claims = entries.get(self.__sharedKey(key))
+        else:
+            claims = self.__get(key)
+
+        if claims is None:
+            claims = self.__load(key)
+
+            if entries is not None:
+                entries.set(self.__sharedKey(key), claims, self.__ttl())
+            else:
+                self.__put(key, claims)
+
+        return None if claims is self.NO_USER else claims
+
+
+    def invalidate(self, subject):
+        key     = str(subject)
+        entries = self.__sharedCache()
+
+        if entries is not None:
+            entries.delete(self.__sharedKey(key))
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+    def __ttl(self):
+        return getattr(settings, 'USERINFO_CLAIMS_TTL', 60)
+
+
+    def __sharedCache(self):
+        alias = getattr(settings, 'USERINFO_CLAIMS_CACHE', None)
+
+        return caches[alias] if alias else None
+
+
+    def __sharedKey(self, key):
+        return 'userinfo:claims:' + key
+
+
+    def __load(self, key):
+        try:
+            user = User.objects.get(id=key)
+        except (User.DoesNotExist, ValueError):
+            return self.NO_USER
+
+        return user_claims(user)
+
+
+    def __get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+            return entry[1]
+
+
+    def __put(self, key, claims):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.__ttl(), claims)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._maxEntries:
+                self._entries.popitem(last=False)
+
+
+_cache = UserClaimCache()
+
+
+def get_user_claim_cache():
+    """Get the UserClaimCache shared in the process."""
+    return _cache
+
+
+def invalidate_user_claims(sender, instance, update_fields=None, **kwargs):
+    """Receiver of post_save and post_delete signals of User."""
+
+    # Saving only 'last_login' (done at every login) does not change claims.
+    if update_fields is not None and set(update_fields) <= { 'last_login' }:
+        return
+
+    _cache.invalidate(instance.pk)
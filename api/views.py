@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2019-2024 Authlete, Inc.
+# Copyright (C) 2019-2026 Authlete, Inc.
 #
 # Licensed under the Apache License, Version 2.0 (the "License");
 # you may not use this file except in compliance with the License.
@@ -15,67 +15,145 @@
 # License.
 
 
-from django.conf                         import settings
-from django.views.decorators.csrf        import csrf_exempt
-from django.views.decorators.http        import require_GET, require_POST, require_http_methods
-from authlete.django.handler             import *
-from authlete.dto                        import *
-from .authorization_decision_endpoint    import AuthorizationDecisionEndpoint
-from .authorization_endpoint             import AuthorizationEndpoint
-from .introspection_endpoint             import IntrospectionEndpoint
-from .spi.token_request_handler_spi_impl import TokenRequestHandlerSpiImpl
+from django.views.decorators.csrf           import csrf_exempt
+from django.views.decorators.http           import require_GET, require_POST, require_http_methods
+from authlete.django.handler                import *
+from authlete.dto                           import *
+from .authorization_decision_endpoint       import AuthorizationDecisionEndpoint
+from .authorization_endpoint                import AuthorizationEndpoint
+from .concurrency_limiter                   import concurrency_limited
+from .end_session_endpoint                  import EndSessionEndpoint
+from .introspection_endpoint                import IntrospectionEndpoint
+from .passthrough_request_handler           import PassthroughRequestHandler
+from .rate_limiter                          import caller_identity, client_identity, rate_limited
+from .request_deadline                      import endpoint_deadline
+from .response_cache                        import ResponseCache
+from .spi.token_request_handler_spi_impl    import TokenRequestHandlerSpiImpl
+from .spi.userinfo_request_handler_spi_impl import UserInfoRequestHandlerSpiImpl
+from .static_asset_server                   import StaticAssetServer
+from .tenant_registry                       import tenant_api
+
+
+# StaticAssetServer remembers file system lookups, so one instance is shared.
+_static_asset_server = StaticAssetServer()
+
+# Responses of the discovery and JWK Set endpoints. Their content rarely
+# changes. See AUTHLETE_METADATA_CACHE_TTL in settings.py. Each tenant has its
+# own (see tenant_registry.py).
+_metadata_cache = ResponseCache()
+
+
+def _metadata_cache_of(request):
+    tenant = getattr(request, 'tenant', None)
+
+    return _metadata_cache if tenant is None else tenant.metadataCache
 
 
 @require_http_methods(['GET', 'POST'])
+@endpoint_deadline('authorization')
+@concurrency_limited('authorization')
 def authorization(request):
     """Authorization Endpoint"""
-    return AuthorizationEndpoint(settings.AUTHLETE_API).handle(request)
+    return AuthorizationEndpoint(tenant_api(request)).handle(request)
 
 
 @require_POST
+@endpoint_deadline('authorization_decision')
+@concurrency_limited('authorization_decision')
 def authorization_decision(request):
     """Authorization Decision Endpoint"""
-    return AuthorizationDecisionEndpoint(settings.AUTHLETE_API).handle(request)
+    return AuthorizationDecisionEndpoint(tenant_api(request)).handle(request)
 
 
 @require_GET
+@endpoint_deadline('configuration')
+@concurrency_limited('configuration')
 def configuration(request):
     """Discovery Endpoint (.well-known/openid-configuration)"""
-    return ConfigurationRequestHandler(settings.AUTHLETE_API).handle(request)
+    return _metadata_cache_of(request).get('configuration',
+        lambda: ConfigurationRequestHandler(tenant_api(request)).handle(request))
+
+
+@require_http_methods(['GET', 'POST'])
+@csrf_exempt
+@endpoint_deadline('end_session')
+@concurrency_limited('end_session')
+def end_session(request):
+    """End Session Endpoint"""
+    return EndSessionEndpoint(tenant_api(request)).handle(request)
 
 
 @require_GET
+@endpoint_deadline('federation_configuration')
+@concurrency_limited('federation_configuration')
 def federation_configuration(request):
     """Federation Configuration Endpoint (.well-known/openid-federation)"""
     req = FederationConfigurationRequest()
     req.entityTypes = ['OPENID_PROVIDER', 'OPENID_CREDENTIAL_ISSUER']
 
-    return FederationConfigurationRequestHandler(settings.AUTHLETE_API).handle(req)
+    return FederationConfigurationRequestHandler(tenant_api(request)).handle(req)
 
 
 @require_POST
 @csrf_exempt
+@rate_limited('introspection', caller_identity)
+@endpoint_deadline('introspection')
+@concurrency_limited('introspection')
 def introspection(request):
     """Introspection Endpoint"""
-    return IntrospectionEndpoint(settings.AUTHLETE_API).handle(request)
+    return IntrospectionEndpoint(tenant_api(request)).handle(request)
 
 
 @require_GET
+@endpoint_deadline('jwks')
+@concurrency_limited('jwks')
 def jwks(request):
     """JWK Set Endpoint"""
-    return JwksRequestHandler(settings.AUTHLETE_API).handle(request)
+    return _metadata_cache_of(request).get('jwks',
+        lambda: JwksRequestHandler(tenant_api(request)).handle(request))
 
 
 @require_POST
 @csrf_exempt
+@rate_limited('par', client_identity)
+@endpoint_deadline('par')
+@concurrency_limited('par')
+def par(request):
+    """Pushed Authorization Request Endpoint"""
+    return PassthroughRequestHandler(tenant_api(request)).handlePushedAuthorization(request)
+
+
+@require_POST
+@csrf_exempt
+@endpoint_deadline('revocation')
+@concurrency_limited('revocation')
 def revocation(request):
     """Revocation Endpoint"""
-    return RevocationRequestHandler(settings.AUTHLETE_API).handle(request)
+    return PassthroughRequestHandler(tenant_api(request)).handleRevocation(request)
+
+
+@require_http_methods(['GET', 'HEAD'])
+def static_asset(request, path):
+    """Static Files (collected into STATIC_ROOT by collectstatic)"""
+    return _static_asset_server.handle(request, path)
 
 
 @require_POST
 @csrf_exempt
+@rate_limited('token', client_identity)
+@endpoint_deadline('token')
+@concurrency_limited('token')
 def token(request):
     """Token Endpoint"""
-    return TokenRequestHandler(
-        settings.AUTHLETE_API, TokenRequestHandlerSpiImpl()).handle(request)
+    return PassthroughRequestHandler(
+        tenant_api(request), TokenRequestHandlerSpiImpl()).handleToken(request)
+
+
+@require_http_methods(['GET', 'POST'])
+@csrf_exempt
+@endpoint_deadline('userinfo')
+@concurrency_limited('userinfo')
+def userinfo(request):
+    """UserInfo Endpoint"""
+    return UserInfoRequestHandler(
+        tenant_api(request), UserInfoRequestHandlerSpiImpl()).handle(request)
@@ -0,0 +1,146 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# Warm-up that lets the first requests after a deployment or a scale-out
+# skip cold costs.
+#
+# The warm-up is split into two phases.
+#
+#   warm_up_shared()
+#     Work whose result can be shared by worker processes copy-on-write.
+#     A prefork server should run it in the master process before fork():
+#     importing modules, building the URL resolver, compiling templates and
+#     loading the static files manifest. No network access.
+#
+#   warm_up_worker()
+#     Work whose result must not cross fork(): opening connections to
+#     Authlete, prefetching the discovery document and the JWK Set into the
+#     response cache, loading the client registry, and creating the Cognito
+#     client. A prefork server
+#     should run it in each worker before the worker accepts requests.
+#
+# Failures are logged and otherwise ignored. A server must be able to start
+# even if, for example, Authlete is temporarily unreachable.
+
+
+import logging
+import time
+from django.conf                        import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http                        import HttpRequest
+from django.template.loader             import get_template
+from django.urls                        import get_resolver
+
+
+logger = logging.getLogger(__name__)
+
+
+# Templates compiled by warm_up_shared().
+TEMPLATES = [
+    'api/authorization.html',
+    'api/authorization_client.html',
+]
+
+
+def warm_up_shared():
+    """Warm up things which worker processes can share copy-on-write."""
+
+    if not getattr(settings, 'WARM_UP_ENABLED', True):
+        return
+
+    _step('URL resolver', _populate_url_resolver)
+    _step('templates',    _compile_templates)
+    _step('static files', _load_static_manifest)
+
+
+def warm_up_worker():
+    """Warm up things which have to be prepared in each worker process."""
+
+    if not getattr(settings, 'WARM_UP_ENABLED', True):
+        return
+
+    _step('discovery document', lambda: _prefetch('configuration'))
+    _step('JWK Set document',   lambda: _prefetch('jwks'))
+    _step('client registry',    _load_client_registry)
+    _step('Cognito client',     _create_cognito_client)
+
+
+def _step(name, function):
+    started = time.monotonic()
+
+    try:
+        function()
+    except Exception:
+        logger.warning("warmup: Failed to warm up %s.", name, exc_info=True)
+        return
+
+    logger.info("warmup: Warmed up %s in %.3f seconds.", name, time.monotonic() - started)
+
+
+def _populate_url_resolver():
+    # Importing the URLconf imports the views and the handlers they use.
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+
+
+def _compile_templates():
+    # With the cached template loader (the default), compiled templates are
+    # kept in memory. So are those of Jinja2.
+    engine = getattr(settings, 'AUTHORIZATION_PAGE_TEMPLATE_ENGINE', None)
+
+    for name in TEMPLATES:
+        get_template(name, using=engine)
+
+
+def _load_static_manifest():
+    # ManifestStaticFilesStorage loads the manifest lazily.
+    getattr(staticfiles_storage, 'hashed_files', None)
+
+
+def _prefetch(name):
+    # The first call opens a connection to Authlete (kept alive by
+    # PooledAuthleteApi) and stores the response into the response cache.
+    from . import views
+
+    request = HttpRequest()
+    request.method = 'GET'
+
+    response = getattr(views, name)(request)
+
+    if response.status_code >= 300:
+        raise RuntimeError('The {} endpoint returned {}.'.format(name, response.status_code))
+
+
+def _load_client_registry():
+    from .client_registry import get_client_registry
+
+    registry = get_client_registry(settings.AUTHLETE_API)
+    if registry is not None:
+        registry.refresh()
+
+
+def _create_cognito_client():
+    backends = getattr(settings, 'AUTHENTICATION_BACKENDS', ())
+
+    if 'backends.CognitoBackend' not in backends and \
+       'backends.cognito_backend.CognitoBackend' not in backends:
+        return
+
+    from backends import CognitoBackend
+
+    CognitoBackend.get_cognito_client()
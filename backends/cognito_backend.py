@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2021 Authlete, Inc.
+# Copyright (C) 2021-2026 Authlete, Inc.
 #
 # Licensed under the Apache License, Version 2.0 (the "License");
 # you may not use this file except in compliance with the License.
@@ -23,6 +23,20 @@
 # This class implements the two methods by using Cognito's
 # `AdminInitiateAuth` API and `AdminGetUser` API, respectively.
 #
+# When AdminInitiateAuth succeeds, its response contains an ID token which
+# carries the attributes of the user. If the ID token can be verified (see
+# cognito_id_token_verifier.py), `authenticate()` builds a User object from
+# the claims in the ID token and AdminGetUser is not called. AdminGetUser is
+# used only as a fallback, e.g. when PyJWT is not installed or when
+# COGNITO_USE_ID_TOKEN is False.
+#
+# Cognito APIs are called in a thread pool (see cognito_executor.py) with a
+# timeout which is the smaller of COGNITO_TIMEOUT and the time left before
+# the deadline of the request (see api/upstream_latency.py). When Cognito
+# does not respond in time, the user is treated as not authenticated instead
+# of holding the request. Under ASGI, `aauthenticate()` and `aget_user()`
+# await Cognito without blocking the event loop.
+#
 # References:
 #
 #   Customizing authentication in Django
@@ -41,19 +55,110 @@
 
 import boto3
 import logging
+import os
+import threading
+import time
+from asgiref.sync                   import sync_to_async
+from botocore.config                import Config
 from django.conf                    import settings
 from django.contrib.auth.backends   import BaseBackend
 from django.contrib.auth.models     import User
 from authlete.types.standard_claims import StandardClaims
+from api.request_deadline           import DeadlineExceeded
+from api.upstream_latency           import observe_upstream, upstream_timeout
+from .cognito_executor              import CognitoDeadlineExceeded, CognitoExecutor
+from .cognito_id_token_verifier     import CognitoIdTokenVerifier
 
 
 logger = logging.getLogger(__name__)
 
 
 class CognitoBackend(BaseBackend):
+    # Django creates a new instance of an authentication backend every time
+    # it authenticates a user. Creating a boto3 client is expensive, so one
+    # client is created per process and shared by all instances. (boto3
+    # clients are thread-safe.)
+    _shared_cognito_idp = None
+    _shared_executor    = None
+    _shared_verifier    = None
+    _shared_lock        = threading.Lock()
+
+
     def __init__(self):
-        # Create an instance to access Cognito APIs.
-        self._cognito_idp = boto3.client('cognito-idp')
+        # An instance to access Cognito APIs.
+        self._cognito_idp = self.get_cognito_client()
+
+
+    @classmethod
+    def get_cognito_client(cls):
+        client = cls._shared_cognito_idp
+        if client is not None:
+            return client
+
+        with cls._shared_lock:
+            if cls._shared_cognito_idp is None:
+                # Create an instance to access Cognito APIs. boto3's default
+                # timeouts (60 seconds) are far longer than a request budget.
+                timeout = getattr(settings, 'COGNITO_TIMEOUT', 5.0)
+
+                cls._shared_cognito_idp = boto3.client('cognito-idp', config=Config(
+                    connect_timeout      = timeout,
+                    read_timeout         = timeout,
+                    max_pool_connections = cls.__max_concurrency(),
+                    retries              = { 'max_attempts': 2, 'mode': 'standard' }
+                ))
+
+            return cls._shared_cognito_idp
+
+
+    @classmethod
+    def get_executor(cls):
+        executor = cls._shared_executor
+        if executor is not None:
+            return executor
+
+        with cls._shared_lock:
+            if cls._shared_executor is None:
+                # Threads which call Cognito APIs.
+                cls._shared_executor = CognitoExecutor(cls.__max_concurrency())
+
+            return cls._shared_executor
+
+
+    @classmethod
+    def __max_concurrency(cls):
+        # The maximum number of concurrent calls toward Cognito.
+        return getattr(settings, 'COGNITO_MAX_CONCURRENCY', 16)
+
+
+    @classmethod
+    def get_id_token_verifier(cls):
+        verifier = cls._shared_verifier
+        if verifier is not None:
+            return verifier
+
+        with cls._shared_lock:
+            if cls._shared_verifier is None:
+                # The verifier caches the JWK Set of the User Pool.
+                cls._shared_verifier = CognitoIdTokenVerifier(
+                    settings.COGNITO_USER_POOL_ID,
+                    settings.COGNITO_CLIENT_ID,
+                    region  = getattr(settings, 'COGNITO_REGION', None),
+                    timeout = getattr(settings, 'COGNITO_TIMEOUT', 5.0)
+                )
+
+            return cls._shared_verifier
+
+
+    @classmethod
+    def reset_cognito_client(cls):
+        # Forget the client (e.g. in a child process after fork() so that
+        # connections of the parent process are not shared).
+        # Threads of the thread pool don't exist in a child process either.
+        cls._shared_cognito_idp = None
+        cls._shared_executor    = None
+        cls._shared_verifier    = None
+        cls._shared_lock        = threading.Lock()
 
 
     def authenticate(self, request, username=None, password=None):
@@ -63,8 +168,15 @@ class CognitoBackend(BaseBackend):
             # The user was not authenticated.
             return None
 
-        # Build a User object for the authenticated user.
-        return self.get_user(username)
+        # The claims in the ID token issued for the authenticated user.
+        claims = self.__verify_id_token(response)
+        if claims is None:
+            # Build a User object by calling Cognito's AdminGetUser API.
+            return self.get_user(username)
+
+        # Build a User object for the authenticated user without calling
+        # Cognito's AdminGetUser API.
+        return self.__build_user(username, claims.items())
 
 
     def get_user(self, user_id):
@@ -75,7 +187,67 @@ class CognitoBackend(BaseBackend):
             return None
 
         # Build a User object based on the information in the response.
-        return self.__build_user(user_id, response)
+        return self.__build_user(user_id, self.__user_attributes(response))
+
+
+    async def aauthenticate(self, request, username=None, password=None):
+        # Call Cognito's AdminInitiateAuth API.
+        response = await self.__acognito_admin_initiate_auth(username, password)
+        if response is None:
+            # The user was not authenticated.
+            return None
+
+        # Verifying the ID token may fetch the JWK Set of the User Pool.
+        claims = await sync_to_async(self.__verify_id_token, thread_sensitive=False)(response)
+        if claims is None:
+            # Build a User object by calling Cognito's AdminGetUser API.
+            return await self.aget_user(username)
+
+        # Build a User object for the authenticated user without calling
+        # Cognito's AdminGetUser API.
+        return await sync_to_async(self.__build_user)(username, claims.items())
+
+
+    async def aget_user(self, user_id):
+        # Call Cognito's AdminGetUser API.
+        response = await self.__acognito_admin_get_user(user_id)
+        if response is None:
+            # Information about the user was not available.
+            return None
+
+        # Build a User object based on the information in the response.
+        return await sync_to_async(self.__build_user)(user_id, self.__user_attributes(response))
+
+
+    def __user_attributes(self, response):
+        # 'UserAttributes' in the response from Cognito's AdminGetUser API.
+        return [(a['Name'], a['Value']) for a in response.get('UserAttributes', [])]
+
+
+    def __verify_id_token(self, response):
+        # If the use of the ID token is disabled.
+        if not getattr(settings, 'COGNITO_USE_ID_TOKEN', True):
+            return None
+
+        id_token = response.get('AuthenticationResult', {}).get('IdToken')
+        if id_token is None:
+            # e.g. AdminInitiateAuth returned a challenge.
+            return None
+
+        verifier = self.get_id_token_verifier()
+        if not verifier.available:
+            # PyJWT is not installed.
+            return None
+
+        try:
+            # The JWK Set of the User Pool may be fetched within the time
+            # left before the deadline.
+            timeout = upstream_timeout('cognito:jwks', getattr(settings, 'COGNITO_TIMEOUT', 5.0))
+        except DeadlineExceeded:
+            logger.warning("The deadline passed before verifying the ID token issued by Cognito.")
+            return None
+
+        return verifier.verify(id_token, timeout)
 
 
     def __cognito_admin_initiate_auth(self, username, password):
@@ -85,16 +257,22 @@ class CognitoBackend(BaseBackend):
 
         try:
             # Call Cognito's AdminInitiateAuth API.
-            return self.__call_cognito_admin_initiate_auth(username, password)
-        except self._cognito_idp.exceptions.NotAuthorizedException:
-            # There is no user who has the username and the password.
-            logger.debug("Cognito user authentication for '%s' failed.", username)
-            return None
-        except Exception:
-            # Something wrong happened in calling Cognito AdminInitiateAuth API.
-            logger.error("Cognito AdminInitiateAuth API failed.", exc_info=True)
+            return self.__call('AdminInitiateAuth', self.__call_cognito_admin_initiate_auth, username, password)
+        except Exception as cause:
+            return self.__on_cognito_error('AdminInitiateAuth', username, cause)
+
+
+    async def __acognito_admin_initiate_auth(self, username, password):
+        # If settings for Cognito are not available.
+        if not settings.COGNITO_USER_POOL_ID:
             return None
 
+        try:
+            # Call Cognito's AdminInitiateAuth API.
+            return await self.__acall('AdminInitiateAuth', self.__call_cognito_admin_initiate_auth, username, password)
+        except Exception as cause:
+            return self.__on_cognito_error('AdminInitiateAuth', username, cause)
+
 
     def __call_cognito_admin_initiate_auth(self, username, password):
         # Call Cognito's AdminInitiateAuth API.
@@ -116,16 +294,22 @@ class CognitoBackend(BaseBackend):
 
         try:
             # Call Cognito's AdminGetUser API.
-            return self.__call_cognito_admin_get_user(username)
-        except self._cognito_idp.exceptions.UserNotFoundException:
-            # The user was not found in the Cognito User Pool.
-            logger.debug("The user '%s' was not found in the Cognito User Pool.", username)
-            return None
-        except Exception:
-            # Something wrong happened in calling Cognito AdminGetUser API.
-            logger.error("Cognito AdminGetUser API failed.", exc_info=True)
+            return self.__call('AdminGetUser', self.__call_cognito_admin_get_user, username)
+        except Exception as cause:
+            return self.__on_cognito_error('AdminGetUser', username, cause)
+
+
+    async def __acognito_admin_get_user(self, username):
+        # If settings for Cognito are not available.
+        if not settings.COGNITO_USER_POOL_ID:
             return None
 
+        try:
+            # Call Cognito's AdminGetUser API.
+            return await self.__acall('AdminGetUser', self.__call_cognito_admin_get_user, username)
+        except Exception as cause:
+            return self.__on_cognito_error('AdminGetUser', username, cause)
+
 
     def __call_cognito_admin_get_user(self, username):
         # Call Cognito's AdminGetUser API.
@@ -135,36 +319,97 @@ class CognitoBackend(BaseBackend):
         )
 
 
-    def __build_user(self, user_id, response):
+    def __call(self, api, function, *args):
+        timeout = upstream_timeout('cognito:' + api, getattr(settings, 'COGNITO_TIMEOUT', 5.0))
+        started = time.monotonic()
+
+        try:
+            # Wait for the result until the timeout.
+            return self.get_executor().call(timeout, function, *args)
+        finally:
+            observe_upstream('cognito:' + api, time.monotonic() - started)
+
+
+    async def __acall(self, api, function, *args):
+        timeout = upstream_timeout('cognito:' + api, getattr(settings, 'COGNITO_TIMEOUT', 5.0))
+        started = time.monotonic()
+
+        try:
+            # Await the result until the timeout.
+            return await self.get_executor().acall(timeout, function, *args)
+        finally:
+            observe_upstream('cognito:' + api, time.monotonic() - started)
+
+
+    def __on_cognito_error(self, api, username, cause):
+        exceptions = self._cognito_idp.exceptions
+
+        if isinstance(cause, exceptions.NotAuthorizedException):
+            # There is no user who has the username and the password.
+            logger.debug("Cognito user authentication for '%s' failed.", username)
+        elif isinstance(cause, exceptions.UserNotFoundException):
+            # The user was not found in the Cognito User Pool.
+            logger.debug("The user '%s' was not found in the Cognito User Pool.", username)
+        elif isinstance(cause, (CognitoDeadlineExceeded, DeadlineExceeded)):
+            # Cognito did not respond before the deadline.
+            logger.warning("Cognito %s API did not respond in time.", api)
+        else:
+            # Something wrong happened in calling the Cognito API.
+            logger.error("Cognito %s API failed.", api, exc_info=cause)
+
+        # Treat the user as not authenticated (or not found).
+        return None
+
+
+    def __build_user(self, user_id, attributes):
         try:
-            # Search the list of Django User objects for the user.
+            # Search the list of Django User objects for the user. This may
+            # read a replica (see api/database_router.py).
             user = User.objects.get(username = user_id)
         except User.DoesNotExist:
-            # Create a new Django User object for the user.
-            user = User.objects.create_user(user_id)
+            user = self.__create_user(user_id)
 
-        # If the response from Cognito's AdminGetUser does not contain
-        # 'UserAttributes'
-        if 'UserAttributes' not in response:
-            return user
-
-        for attribute in response['UserAttributes']:
-            name  = attribute['Name']
-            value = attribute['Value']
+        # 'attributes' is a list of (name, value) pairs which come from
+        # either the claims in the ID token or 'UserAttributes' in the
+        # response from Cognito's AdminGetUser API.
+        changed = []
 
+        for name, value in attributes:
             # Cognito User Pool supports most of standard claims defined in
             # "OpenID Connect Core 1.0 Section 5.1. Standard Claims". However,
             # the default User object of Django does not. If you want to
             # support more claims, you have to customize the User object and
-            # then add more 'elif' here and getUserClaimValue() method in
-            # AuthorizationRequestHandlerSpiImpl class.
+            # then add more 'elif' here and user_claims() function in
+            # api/user_claim_cache.py.
             if name == StandardClaims.EMAIL:
-                user.email = value
+                field = 'email'
             elif name == StandardClaims.GIVEN_NAME:
-                user.first_name = value
+                field = 'first_name'
             elif name == StandardClaims.FAMILY_NAME:
-                user.last_name = value
+                field = 'last_name'
+            else:
+                continue
+
+            if getattr(user, field) != value:
+                setattr(user, field, value)
+                changed.append(field)
 
-        user.save()
+        # Write only the changed attributes, so that a user read from a
+        # replica does not overwrite newer values of other fields.
+        if changed:
+            user.save(update_fields=changed)
 
         return user
+
+
+    def __create_user(self, user_id):
+        try:
+            # A replica may not have a user created very recently.
+            return User.objects.using('default').get(username = user_id)
+        except User.DoesNotExist:
+            # Create a new Django User object for the user.
+            return User.objects.create_user(user_id)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=CognitoBackend.reset_cognito_client)
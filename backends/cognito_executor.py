@@ -0,0 +1,112 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# This class runs blocking Cognito API calls (boto3) in a thread pool so that
+# the caller can stop waiting when its deadline is reached.
+#
+#   - call()  waits for the result in the calling thread (WSGI).
+#   - acall() waits for the result without blocking the event loop (ASGI).
+#
+# At most `max_concurrency` calls are in flight toward Cognito at a time. A
+# caller which cannot start its call or get its result before the timeout
+# gets CognitoDeadlineExceeded. A call which is abandoned this way keeps its
+# slot until boto3 returns, so an unresponsive Cognito cannot accumulate more
+# than `max_concurrency` outstanding calls.
+
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+
+class CognitoDeadlineExceeded(Exception):
+    pass
+
+
+class CognitoExecutor(object):
+    # Interval at which acall() retries to get a slot.
+    POLL_INTERVAL = 0.01
+
+
+    def __init__(self, max_concurrency=16):
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._executor  = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix='cognito')
+
+
+    def call(self, timeout, function, *args, **kwargs):
+        """Call the function in the thread pool and wait for the result.
+
+        Raises:
+            CognitoDeadlineExceeded : The result was not available in time.
+        """
+
+        deadline = time.monotonic() + timeout
+
+        if timeout <= 0 or not self._semaphore.acquire(timeout=timeout):
+            raise CognitoDeadlineExceeded()
+
+        future = self.__submit(function, args, kwargs)
+
+        try:
+            return future.result(timeout=max(0, deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise CognitoDeadlineExceeded()
+
+
+    async def acall(self, timeout, function, *args, **kwargs):
+        """Call the function in the thread pool and await the result.
+
+        Raises:
+            CognitoDeadlineExceeded : The result was not available in time.
+        """
+
+        deadline = time.monotonic() + timeout
+
+        while not self._semaphore.acquire(blocking=False):
+            if deadline <= time.monotonic():
+                raise CognitoDeadlineExceeded()
+
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+        future = self.__submit(function, args, kwargs)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), max(0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise CognitoDeadlineExceeded()
+
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+    def __submit(self, function, args, kwargs):
+        try:
+            future = self._executor.submit(function, *args, **kwargs)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        # The slot is released when the call finishes (or is cancelled),
+        # not when the caller stops waiting.
+        future.add_done_callback(lambda f: self._semaphore.release())
+
+        return future
@@ -0,0 +1,132 @@
+#
+# Copyright (C) 2026 Authlete, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific
+# language governing permissions and limitations under the
+# License.
+
+
+# This class verifies an ID token issued by a Cognito User Pool and returns
+# its claims.
+#
+# The response from Cognito's AdminInitiateAuth API contains an ID token in
+# 'AuthenticationResult.IdToken'. The ID token carries the attributes of the
+# authenticated user (email, given_name, family_name, etc.), so CognitoBackend
+# can build a User object without calling Cognito's AdminGetUser API.
+#
+# The signature is verified with the JWK Set of the User Pool, which is
+# fetched once and cached. The fetch is made within the timeout given to
+# `verify()` (CognitoBackend gives the time left before the deadline of the
+# request, see api/upstream_latency.py). This class requires PyJWT with the
+# 'crypto' extra (pip install "pyjwt[crypto]"). If it is not installed,
+# `available` is False.
+#
+# References:
+#
+#   Verifying a JSON Web Token
+#     https://docs.aws.amazon.com/cognito/latest/developerguide/amazon-cognito-user-pools-using-tokens-verifying-a-jwt.html
+
+
+import logging
+import threading
+
+try:
+    import jwt
+except ImportError:
+    jwt = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class CognitoIdTokenVerifier(object):
+    def __init__(self, user_pool_id, client_id, region=None, jwks_lifespan=3600, leeway=60, timeout=5.0):
+        # The region is the prefix of a User Pool ID, e.g. 'us-east-1' of
+        # 'us-east-1_AbCdEfGhI'.
+        region = region or user_pool_id.split('_', 1)[0]
+
+        self._issuer    = 'https://cognito-idp.{}.amazonaws.com/{}'.format(region, user_pool_id)
+        self._client_id = client_id
+        self._leeway    = leeway
+        self._jwks      = None
+        self._lifespan  = jwks_lifespan
+        self._timeout   = timeout
+        self._lock      = threading.Lock()
+
+
+    @property
+    def available(self):
+        return jwt is not None
+
+
+    @property
+    def issuer(self):
+        return self._issuer
+
+
+    def verify(self, id_token, timeout=None):
+        """Verify the ID token and return its claims.
+
+        Args:
+            timeout (float) : The timeout of fetching the JWK Set in seconds.
+                              If None, the one given to the constructor.
+
+        Returns:
+            dict : The claims of the ID token, or None if the ID token is
+                   invalid or could not be verified.
+        """
+
+        if jwt is None or not id_token:
+            return None
+
+        try:
+            # The key identified by the 'kid' header. The JWK Set is cached.
+            key = self.__get_signing_key(id_token, self._timeout if timeout is None else timeout)
+
+            claims = jwt.decode(
+                id_token, key.key,
+                algorithms = ['RS256'],
+                audience   = self._client_id,
+                issuer     = self._issuer,
+                leeway     = self._leeway,
+                options    = { 'require': ['exp', 'iat', 'sub'] }
+            )
+        except Exception:
+            logger.warning("The ID token issued by Cognito could not be verified.", exc_info=True)
+            return None
+
+        # Access tokens of Cognito are signed by the same keys.
+        if claims.get('token_use') != 'id':
+            logger.warning("The token issued by Cognito is not an ID token.")
+            return None
+
+        return claims
+
+
+    def __get_signing_key(self, id_token, timeout):
+        # PyJWKClient fetches the JWK Set (only when it is not cached) with
+        # the timeout set on it, so callers take turns to set their own. A
+        # caller does not wait for another's fetch longer than its timeout.
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            raise TimeoutError("The JWK Set of the User Pool is being fetched.")
+
+        try:
+            if self._jwks is None:
+                self._jwks = jwt.PyJWKClient(
+                    self._issuer + '/.well-known/jwks.json',
+                    cache_keys=True, lifespan=self._lifespan)
+
+            self._jwks.timeout = timeout
+
+            return self._jwks.get_signing_key_from_jwt(id_token)
+        finally:
+            self._lock.release()
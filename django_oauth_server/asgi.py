@@ -0,0 +1,21 @@
+"""
+ASGI config for django_oauth_server project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Under ASGI, CognitoBackend authenticates users with aauthenticate(), which
+awaits Cognito APIs without blocking the event loop, e.g.
+
+    uvicorn django_oauth_server.asgi:application
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_oauth_server.settings')
+
+application = get_asgi_application()
@@ -41,15 +41,37 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.tenant_registry.TenantMiddleware',
+    'api.machine_fast_path.MachineFastPathMiddleware',
+    'api.memory_diagnostics.MemoryDiagnosticsMiddleware',
+    'api.request_deadline.RequestDeadlineMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'api.database_router.ReplicaStickinessMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Requests to the endpoints called by machines skip the middleware for
+# browsers (sessions, CSRF, user authentication, messages, clickjacking) and
+# go through M2M_MIDDLEWARE only. See api/machine_fast_path.py.
+M2M_FAST_PATHS = [
+    '/api/token',
+    '/api/introspection',
+    '/api/revocation',
+    '/api/par',
+]
+
+M2M_MIDDLEWARE = [
+    'api.memory_diagnostics.MemoryDiagnosticsMiddleware',
+    'api.request_deadline.RequestDeadlineMiddleware',
+    'api.database_router.ReplicaStickinessMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+]
+
 ROOT_URLCONF = 'django_oauth_server.urls'
 
 TEMPLATES = [
@@ -68,6 +90,27 @@ TEMPLATES = [
     },
 ]
 
+# The template engine which renders the authorization page: 'django', or
+# 'jinja2' to render it with the compiled templates in api/jinja2/ (requires
+# pip install jinja2). See api/jinja2_environment.py.
+AUTHORIZATION_PAGE_TEMPLATE_ENGINE = os.environ.get('AUTHORIZATION_PAGE_TEMPLATE_ENGINE', 'django')
+
+if AUTHORIZATION_PAGE_TEMPLATE_ENGINE == 'jinja2':
+    TEMPLATES.append({
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'environment': 'api.jinja2_environment.environment',
+        },
+    })
+
+# The number of rendered client parts of the authorization page (the name,
+# the logo, the description and the links of a client) kept in memory. They
+# are the same for all users. 0 renders them for every request. See
+# api/page_fragment_cache.py.
+AUTHORIZATION_PAGE_FRAGMENT_CACHE_SIZE = 1000
+
 WSGI_APPLICATION = 'django_oauth_server.wsgi.application'
 
 
@@ -81,6 +124,25 @@ DATABASES = {
     }
 }
 
+# Reads of the models in DATABASE_REPLICA_MODELS (users for authentication
+# and claims) go to one of the read replicas in DATABASE_REPLICAS, which are
+# aliases in DATABASES. All writes go to 'default'. After a routed model is
+# written, reads go to 'default' for the rest of the request and for
+# DATABASE_REPLICA_STICKINESS seconds in the same session. See
+# api/database_router.py. A replica is configured like this:
+#
+#   DATABASES['replica1'] = {
+#       'ENGINE': 'django.db.backends.postgresql',
+#       'NAME':   'oauth',
+#       'HOST':   'replica1.db.example.com',
+#       'TEST':   { 'MIRROR': 'default' },
+#   }
+#   DATABASE_REPLICAS = [ 'replica1' ]
+DATABASE_ROUTERS            = [ 'api.database_router.ReplicaRouter' ]
+DATABASE_REPLICAS           = []
+DATABASE_REPLICA_MODELS     = [ 'auth.user', 'api.consent' ]
+DATABASE_REPLICA_STICKINESS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -120,19 +182,326 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+# The directory into which 'python manage.py collectstatic' collects files.
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# collectstatic copies static files with names that contain a hash of their
+# content (e.g. authorization.3e1f5a2b9c0d.css), writes a manifest and then
+# generates precompressed variants (.gz, and .br if 'brotli' is installed).
+# When DEBUG is False, {% static %} refers to the hashed names, so run
+# collectstatic before starting the server in production.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'api.static_files_storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Set True to let this application serve the files in STATIC_ROOT when no CDN
+# or front web server does it. Hashed files are served with
+# 'Cache-Control: public, max-age=31536000, immutable' and other files with
+# the max-age below (in seconds).
+STATIC_ASSETS_SERVE   = False
+STATIC_ASSETS_MAX_AGE = 60
+
 
 #--------------------------------------------------
 # Authlete
 #--------------------------------------------------
-from authlete.api  import AuthleteApiImpl
-from authlete.conf import AuthleteIniConfiguration
+from authlete.conf           import AuthleteIniConfiguration
+from api.pooled_authlete_api import PooledAuthleteApi
 
-# Read Authlete settings from 'authlete.ini' and set timeouts.
+# Read Authlete settings from 'authlete.ini' and set timeouts. The timeouts
+# are shortened to fit in the deadline of the request (see ENDPOINT_DEADLINES).
 # See https://github.com/authlete/authlete-python/README.md for details.
-AUTHLETE_API = AuthleteApiImpl(AuthleteIniConfiguration())
+# PooledAuthleteApi is AuthleteApiImpl which keeps connections to Authlete
+# alive and reuses them.
+AUTHLETE_API = PooledAuthleteApi(AuthleteIniConfiguration())
 AUTHLETE_API.getSettings().connectionTimeout = 5.0
 AUTHLETE_API.getSettings().readTimeout       = 5.0
 
+# Base URLs of the same Authlete service in several regions, separated by
+# spaces, e.g. 'https://us.authlete.com https://eu.authlete.com'. Each call
+# goes to the healthy one with the lowest latency and fails over to the next
+# one if it cannot be reached. Every base URL is probed every
+# AUTHLETE_PROBE_INTERVAL seconds. Empty to use only 'base_url' of
+# 'authlete.ini'. See api/authlete_endpoint_selector.py.
+from api.authlete_endpoint_selector import AuthleteEndpointSelector
+
+AUTHLETE_BASE_URLS      = os.environ.get('AUTHLETE_BASE_URLS', '').split()
+AUTHLETE_PROBE_INTERVAL = 10.0
+
+if AUTHLETE_BASE_URLS:
+    AUTHLETE_API.setEndpointSelector(
+        AuthleteEndpointSelector(AUTHLETE_BASE_URLS, probeInterval=AUTHLETE_PROBE_INTERVAL))
+
+# Seconds for which the responses of the discovery endpoint and the JWK Set
+# endpoint are cached in each process. 0 disables the cache.
+AUTHLETE_METADATA_CACHE_TTL = 300
+
+# The authorization endpoint keeps an index of the clients registered in the
+# Authlete service and rejects requests with no client_id, an unknown client
+# or an unregistered redirect URI without calling Authlete. The index is
+# rebuilt from Authlete's client list every CLIENT_REGISTRY_REFRESH seconds
+# (0 disables the registry). Client IDs found not to exist, and clients
+# fetched again before a request is rejected, are remembered for
+# CLIENT_REGISTRY_NEGATIVE_TTL seconds. See api/client_registry.py.
+CLIENT_REGISTRY_REFRESH      = 300
+CLIENT_REGISTRY_NEGATIVE_TTL = 60
+
+# Seconds for which the consent of a user to a client is remembered when the
+# user checks "Remember this decision" on the authorization page. While it is
+# valid, the page is skipped for the same client and no more scopes and
+# claims. 0 disables remembered consents. See api/consent_store.py.
+CONSENT_TTL = 30 * 24 * 60 * 60
+
+# The token, introspection and revocation endpoints call Authlete with the
+# request body as is and return Authlete's response content as is, without
+# building DTOs. See api/passthrough_request_handler.py.
+AUTHLETE_PASSTHROUGH = True
+
+# Clients whose identical client credentials requests get the same access
+# token again for a number of seconds instead of a new one, e.g.
+# { '4326385670': 60 }. The client ID is the one presented by the client.
+# See api/token_reuse_cache.py.
+CLIENT_CREDENTIALS_REUSE = {}
+
+# Authlete traffic can be recorded into a file (redacted) and replayed later
+# as a local stand-in for Authlete, e.g. to compare the performance of builds
+# offline with the traffic mix of production. Set a file path to either. The
+# recorded latencies are reproduced multiplied by AUTHLETE_REPLAY_SPEED (0 for
+# no delay). See 'python manage.py replay_traffic'.
+from api.authlete_traffic_recorder import AuthleteTrafficRecorder
+from api.authlete_traffic_replayer import AuthleteTrafficReplayer
+
+AUTHLETE_RECORD_FILE  = os.environ.get('AUTHLETE_RECORD_FILE')
+AUTHLETE_REPLAY_FILE  = os.environ.get('AUTHLETE_REPLAY_FILE')
+AUTHLETE_REPLAY_SPEED = float(os.environ.get('AUTHLETE_REPLAY_SPEED', '1.0'))
+
+if AUTHLETE_REPLAY_FILE:
+    AUTHLETE_API.setReplayer(AuthleteTrafficReplayer(AUTHLETE_REPLAY_FILE, AUTHLETE_REPLAY_SPEED))
+elif AUTHLETE_RECORD_FILE:
+    AUTHLETE_API.setRecorder(AuthleteTrafficRecorder(AUTHLETE_RECORD_FILE))
+
+
+#--------------------------------------------------
+# Tenants
+#--------------------------------------------------
+
+# Other Authlete services served by this deployment, e.g.
+#
+#   AUTHLETE_TENANTS = {
+#       'acme': {
+#           'hosts': [ 'acme.example.com' ],
+#           'configuration': {
+#               'baseUrl':          'https://us.authlete.com',
+#               'serviceApiKey':    '...',
+#               'serviceApiSecret': '...',
+#           },
+#       },
+#       'globex': {
+#           'hosts':     [ 'globex.example.com' ],
+#           'ini':       '/etc/authlete/globex.ini',
+#           'base_urls': [ 'https://us.authlete.com', 'https://eu.authlete.com' ],
+#       },
+#   }
+#
+# 'base_urls' works like AUTHLETE_BASE_URLS for the tenant. The timeouts, the
+# recorder and the replayer of AUTHLETE_API are used for tenants too.
+#
+# A request is served with the Authlete service of the tenant whose 'hosts'
+# include the host of the request (AUTHLETE_TENANT_RESOLUTION = 'host'), or
+# whose name is the first segment of the path, e.g. /acme/api/token
+# (AUTHLETE_TENANT_RESOLUTION = 'path'). Other requests are served with
+# AUTHLETE_API. Add the hosts to ALLOWED_HOSTS. See api/tenant_registry.py.
+AUTHLETE_TENANTS           = {}
+AUTHLETE_TENANT_RESOLUTION = 'host'
+
+# A tenant is set up on its first request and dropped when it has been idle
+# for AUTHLETE_TENANT_IDLE_TIMEOUT seconds or when more than
+# AUTHLETE_TENANT_MAX_ACTIVE tenants are set up. Each tenant keeps up to
+# AUTHLETE_TENANT_POOL_SIZE connections to Authlete.
+AUTHLETE_TENANT_IDLE_TIMEOUT = 600
+AUTHLETE_TENANT_MAX_ACTIVE   = 200
+AUTHLETE_TENANT_POOL_SIZE    = 4
+
+
+#--------------------------------------------------
+# UserInfo Endpoint
+#--------------------------------------------------
+
+# Seconds for which the claims of a user returned from the userinfo endpoint
+# (and embedded in ID tokens) are cached. Saving or deleting the User object
+# discards the cache entry. See api/user_claim_cache.py.
+USERINFO_CLAIMS_TTL = 60
+
+# By default, claims are cached in the memory of each process. To share them
+# among worker processes, set the alias of a cache in CACHES.
+USERINFO_CLAIMS_CACHE = None
+
+
+#--------------------------------------------------
+# Logout
+#--------------------------------------------------
+
+# When a user logs out at /api/logout or is logged out on the admin site, the
+# client applications which the user has authorized are sent logout tokens
+# (OpenID Connect Back-Channel Logout) by this number of worker threads in
+# the background. 0 disables the notifications. See
+# api/backchannel_logout.py.
+BACKCHANNEL_LOGOUT_WORKERS = 4
+
+# Seconds to wait for each client application, the number of retries of a
+# failed delivery (after 2, 4, 8, ... seconds), and the maximum number of
+# deliveries waiting for a worker.
+BACKCHANNEL_LOGOUT_TIMEOUT    = 5.0
+BACKCHANNEL_LOGOUT_RETRIES    = 3
+BACKCHANNEL_LOGOUT_QUEUE_SIZE = 1000
+
+# Back-channel logout URIs of clients, e.g.
+# { '4326385670': 'https://rp.example.com/backchannel_logout' }. A client not
+# listed here is notified at 'backchannel_logout_uri' in its custom metadata
+# in Authlete, if any.
+BACKCHANNEL_LOGOUT_URIS = {}
+
+# Logout tokens are signed with the key of the Authlete service whose key ID
+# is this, or with the first private signing key in its JWK Set if None.
+LOGOUT_TOKEN_KEY_ID   = None
+LOGOUT_TOKEN_LIFETIME = 120
+
+
+#--------------------------------------------------
+# Audit Events
+#--------------------------------------------------
+
+# Security-relevant events (user login, consent, token requests and token
+# revocation) are recorded as structured audit events. Request threads only
+# put events into a bounded in-memory queue, and a background thread writes
+# them to the sink in batches. See api/audit_pipeline.py. AUDIT_SINK is the
+# dotted path of a class which has write(events), instantiated with
+# AUDIT_SINK_OPTIONS. None disables audit events.
+AUDIT_SINK = 'api.rotating_file_audit_sink.RotatingFileAuditSink'
+AUDIT_SINK_OPTIONS = {
+    'path':         os.path.join(BASE_DIR, 'audit', 'audit-{pid}.jsonl'),
+    'max_bytes':    10 * 1024 * 1024,
+    'backup_count': 5,
+}
+
+# The capacity of the queue, the maximum number of events written at once,
+# and the maximum seconds an event waits in the queue.
+AUDIT_QUEUE_SIZE     = 10000
+AUDIT_BATCH_SIZE     = 100
+AUDIT_FLUSH_INTERVAL = 1.0
+
+# What happens when the queue is full: 'drop_new', 'drop_oldest' or 'block'
+# (wait for at most AUDIT_BLOCK_TIMEOUT seconds, then drop the new event).
+AUDIT_QUEUE_POLICY  = 'drop_new'
+AUDIT_BLOCK_TIMEOUT = 0.05
+
+
+#--------------------------------------------------
+# Rate Limiting
+#--------------------------------------------------
+
+# Token-bucket rate limits applied before Authlete APIs are called. The token
+# endpoint and the pushed authorization request endpoint are limited per
+# client ID and the introspection endpoint per API caller. Until the client
+# (or the caller) is authenticated, requests are counted per pair of the
+# claimed ID and the remote address; requests which succeed are counted per
+# client (or caller) too. 'rate' is the number of requests per second allowed in the long
+# run and 'burst' is the number of requests allowed at once. Requests over
+# the limit receive '429 Too Many Requests' with a Retry-After header.
+# Remove an entry to disable the rate limit of the endpoint.
+RATE_LIMITS = {
+    'token':         { 'rate': 10.0, 'burst': 20  },
+    'par':           { 'rate': 10.0, 'burst': 20  },
+    'introspection': { 'rate': 50.0, 'burst': 100 },
+}
+
+# By default, buckets are held in the memory of each process. To share them
+# among worker processes, set the alias of a cache in CACHES (e.g. a cache
+# backed by Redis or Memcached).
+RATE_LIMIT_CACHE = None
+
+
+#--------------------------------------------------
+# Concurrency Limiting
+#--------------------------------------------------
+
+# Each endpoint processes at most 'limit' requests at the same time. The
+# limit starts at 'initial' and adapts between 'min' and 'max': it grows
+# while requests complete within 'latency_target' seconds and shrinks when
+# they are slow or fail. Requests over the limit wait in a queue of up to
+# 'queue' requests for at most 'queue_timeout' seconds, and are otherwise
+# shed with '503 Service Unavailable' and a Retry-After header. When slots
+# become free, waiting requests of endpoints with a higher 'priority' are
+# admitted first. Set CONCURRENCY_LIMITS = {} to disable.
+CONCURRENCY_LIMITS = {
+    'token':                    { 'priority': 3, 'initial': 16, 'max': 64, 'queue': 64, 'queue_timeout': 2.0, 'latency_target': 1.0 },
+    'introspection':            { 'priority': 3, 'initial': 16, 'max': 64, 'queue': 64, 'queue_timeout': 1.0, 'latency_target': 0.5 },
+    'revocation':               { 'priority': 2, 'initial': 8,  'max': 32, 'queue': 32, 'queue_timeout': 2.0, 'latency_target': 1.0 },
+    'par':                      { 'priority': 2, 'initial': 8,  'max': 32, 'queue': 32, 'queue_timeout': 2.0, 'latency_target': 1.0 },
+    'jwks':                     { 'priority': 2, 'initial': 8,  'max': 32, 'queue': 32, 'queue_timeout': 1.0, 'latency_target': 0.5 },
+    'configuration':            { 'priority': 2, 'initial': 8,  'max': 32, 'queue': 32, 'queue_timeout': 1.0, 'latency_target': 0.5 },
+    'federation_configuration': { 'priority': 2, 'initial': 4,  'max': 16, 'queue': 16, 'queue_timeout': 1.0, 'latency_target': 1.0 },
+    'authorization_decision':   { 'priority': 2, 'initial': 8,  'max': 32, 'queue': 32, 'queue_timeout': 3.0, 'latency_target': 2.0 },
+    'end_session':              { 'priority': 2, 'initial': 8,  'max': 32, 'queue': 32, 'queue_timeout': 2.0, 'latency_target': 1.0 },
+    'userinfo':                 { 'priority': 2, 'initial': 8,  'max': 32, 'queue': 32, 'queue_timeout': 1.0, 'latency_target': 1.0 },
+    'authorization':            { 'priority': 1, 'initial': 8,  'max': 32, 'queue': 16, 'queue_timeout': 2.0, 'latency_target': 2.0 },
+}
+
+# The number of requests a process can handle at the same time regardless of
+# endpoints, typically the number of worker threads. None means unlimited,
+# in which case only the limits per endpoint apply.
+CONCURRENCY_CAPACITY = None
+
+
+#--------------------------------------------------
+# Request Deadline
+#--------------------------------------------------
+
+# The time budget of a request in seconds. Calls to external services made
+# while processing a request (Authlete APIs and Cognito APIs) don't wait
+# beyond it. See api/request_deadline.py. None disables the deadline.
+REQUEST_DEADLINE = 10.0
+
+# Tighter budgets of endpoints in seconds, counted from when the view is
+# entered (so the time waiting for a concurrency slot is included). Calls to
+# Authlete and Cognito get the time left as their timeout, and are not made
+# at all once the deadline has passed ('503 Service Unavailable' is returned
+# instead). Remove an entry to use only REQUEST_DEADLINE for the endpoint.
+ENDPOINT_DEADLINES = {
+    'token':                    3.0,
+    'introspection':            1.0,
+    'revocation':               2.0,
+    'par':                      2.0,
+    'jwks':                     1.0,
+    'configuration':            1.0,
+    'federation_configuration': 2.0,
+    'userinfo':                 2.0,
+    'authorization':            5.0,
+    'authorization_decision':   8.0,
+    'end_session':              3.0,
+}
+
+# Set a dictionary to tighten the timeouts of Authlete and Cognito APIs from
+# their observed latencies: the timeout of an API becomes 'multiplier' times
+# the 'percentile' latency of its last 'window' calls, but not shorter than
+# 'minimum' seconds, once 'min_samples' calls have been observed. The
+# percentile is recomputed every 'refresh' calls. See
+# api/upstream_latency.py. None disables the tightening.
+UPSTREAM_TIMEOUT_TIGHTENING = None
+#UPSTREAM_TIMEOUT_TIGHTENING = {
+#    'window':      1000,
+#    'percentile':  99,
+#    'multiplier':  2.0,
+#    'minimum':     0.5,
+#    'min_samples': 100,
+#    'refresh':     50,
+#}
+
 
 #--------------------------------------------------
 # Amazon Cognito
@@ -155,5 +524,53 @@ AUTHLETE_API.getSettings().readTimeout       = 5.0
 #COGNITO_USER_POOL_ID = 'YOUR_COGNITO_USER_POOL_ID'
 #COGNITO_CLIENT_ID    = 'YOUR_COGNITO_CLIENT_ID'
 
+# The attributes of an authenticated user are taken from the ID token in the
+# response from Cognito's AdminInitiateAuth API. The ID token is verified with
+# the JWK Set of the User Pool, which requires PyJWT (pip install
+# "pyjwt[crypto]"). When PyJWT is not installed, the ID token cannot be
+# verified or COGNITO_USE_ID_TOKEN is False, Cognito's AdminGetUser API is
+# called instead. COGNITO_REGION is needed only when the region cannot be
+# derived from COGNITO_USER_POOL_ID.
+
+#COGNITO_USE_ID_TOKEN = True
+#COGNITO_REGION       = 'us-east-1'
+
+# Cognito APIs are called, and the JWK Set of the User Pool is fetched, with a
+# timeout which is the smaller of COGNITO_TIMEOUT (seconds) and the time left
+# before REQUEST_DEADLINE. If Cognito does not respond in time, the user is
+# treated as not authenticated. At most COGNITO_MAX_CONCURRENCY calls toward
+# Cognito are in flight at a time per process.
+
+#COGNITO_TIMEOUT         = 5.0
+#COGNITO_MAX_CONCURRENCY = 16
+
 # Finally, don't forget to grant necessary permissions to the AWS account so
 # that it can call Cognito's AdminInitiateAuth API and AdminGetUser API.
+
+
+#--------------------------------------------------
+# Production Server
+#--------------------------------------------------
+
+# Settings for 'python manage.py serve' (or 'make serve') which runs this
+# server under Gunicorn. See api/management/commands/serve.py.
+SERVER_BIND    = '0.0.0.0:8000'
+SERVER_WORKERS = None   # None = the number of CPUs
+SERVER_THREADS = 4      # Threads per worker
+
+# Warm up before accepting requests: compile templates, open connections to
+# Authlete, prefetch the discovery document and the JWK Set, and create the
+# Cognito client. See api/warmup.py.
+WARM_UP_ENABLED = True
+
+
+#--------------------------------------------------
+# Memory Diagnostics
+#--------------------------------------------------
+
+# Set True to let staff users start tracemalloc, compare snapshots and see
+# the allocations of each view at /admin/memory/. Tracing is off until it is
+# started there. It slows down the process while it is on, and the figures
+# are those of the worker process which serves the page. See
+# api/memory_diagnostics.py.
+MEMORY_DIAGNOSTICS_ENABLED = os.environ.get('MEMORY_DIAGNOSTICS_ENABLED', '') == 'true'
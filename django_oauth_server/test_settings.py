@@ -0,0 +1,12 @@
+"""
+Django settings for the tests of django_oauth_server project.
+
+'python manage.py test' uses these settings. They are the settings in
+settings.py plus a read replica, 'replica', for the tests of
+api/database_router.py. In the tests, the replica is a mirror of the test
+database of 'default'.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = dict(DATABASES, replica=dict(DATABASES['default'], TEST={ 'MIRROR': 'default' }))
@@ -13,13 +13,30 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf    import settings
 from django.contrib import admin
-from django.urls    import include, path
-from api.views      import configuration, federation_configuration
+from django.urls    import include, path, re_path
+from api.admin      import database_metrics_view, memory_diagnostics_view
+from api.views      import configuration, federation_configuration, static_asset
 
 urlpatterns = [
+    path('admin/database/', admin.site.admin_view(database_metrics_view), name='database_metrics'),
     path('admin/', admin.site.urls),
     path('api/',   include('api.urls')),
     path('.well-known/openid-configuration', configuration),
     path('.well-known/openid-federation', federation_configuration),
 ]
+
+# Serve collected static files from this application when no CDN or front
+# web server is configured to do it. See STATIC_ASSETS_SERVE in settings.py.
+if getattr(settings, 'STATIC_ASSETS_SERVE', False):
+    urlpatterns += [
+        re_path(r'^{}(?P<path>.+)$'.format(settings.STATIC_URL.lstrip('/')), static_asset),
+    ]
+
+# Memory diagnostics for staff users. It is placed before the admin site,
+# which would otherwise catch the path. See MEMORY_DIAGNOSTICS_ENABLED in
+# settings.py.
+if getattr(settings, 'MEMORY_DIAGNOSTICS_ENABLED', False):
+    urlpatterns.insert(0,
+        path('admin/memory/', admin.site.admin_view(memory_diagnostics_view), name='memory_diagnostics'))
@@ -5,6 +5,12 @@ It exposes the WSGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
+
+Things that worker processes can share (URL resolver, compiled templates,
+static files manifest) are warmed up when this module is loaded, so a prefork
+server which loads the application before fork (e.g. 'gunicorn --preload')
+shares them copy-on-write. 'python manage.py serve' additionally warms up
+each worker. See api/warmup.py.
 """
 
 import os
@@ -14,3 +20,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_oauth_server.settings')
 
 application = get_wsgi_application()
+
+from api.warmup import warm_up_shared
+
+warm_up_shared()
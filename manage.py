@@ -5,6 +5,9 @@ import sys
 
 
 def main():
+    # The tests run with a read replica (see test_settings.py).
+    if sys.argv[1:2] == ['test']:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_oauth_server.test_settings')
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_oauth_server.settings')
     try:
         from django.core.management import execute_from_command_line